@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+#
+# Copyright 2018 Antonio Miraglia - ISISpace.
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+"""
+Throughput benchmark of the ecss AGC.
+
+A noisy tone with amplitude steps is processed by agc_cc and agc_ff in every
+gain tracking mode and the processed samples per second are printed.
+"""
+
+from gnuradio import gr, blocks, analog
+import ecss
+import argparse, time
+
+
+MODES = (("exact", ecss.AGC_EXACT), ("fast", ecss.AGC_FAST),
+         ("block", ecss.AGC_BLOCK), ("ramp", ecss.AGC_BLOCK_RAMP))
+
+
+def make_signal(args, complex_type):
+    """return a noisy tone with a square amplitude modulation"""
+
+    tb = gr.top_block()
+    length = 1 << 20
+    if complex_type:
+        src = analog.sig_source_c(args.samp_rate, analog.GR_COS_WAVE, args.samp_rate / 10, 1, 0)
+        noise = analog.noise_source_c(analog.GR_GAUSSIAN, 0.1, 0)
+        steps = analog.sig_source_c(args.samp_rate, analog.GR_SQR_WAVE, args.samp_rate / length * 4, 99, 1)
+        adder = blocks.add_vcc(1)
+        mult = blocks.multiply_cc()
+        sink = blocks.vector_sink_c()
+        item = gr.sizeof_gr_complex
+    else:
+        src = analog.sig_source_f(args.samp_rate, analog.GR_COS_WAVE, args.samp_rate / 10, 1, 0)
+        noise = analog.noise_source_f(analog.GR_GAUSSIAN, 0.1, 0)
+        steps = analog.sig_source_f(args.samp_rate, analog.GR_SQR_WAVE, args.samp_rate / length * 4, 99, 1)
+        adder = blocks.add_vff(1)
+        mult = blocks.multiply_ff()
+        sink = blocks.vector_sink_f()
+        item = gr.sizeof_float
+    head = blocks.head(item, length)
+    tb.connect(src, (adder, 0))
+    tb.connect(noise, (adder, 1))
+    tb.connect(adder, (mult, 0))
+    tb.connect(steps, (mult, 1))
+    tb.connect(mult, head, sink)
+    tb.run()
+    return sink.data()
+
+
+def run_agc(args, data, complex_type, mode):
+    """run the flowgraph once and return the processed samples per second"""
+
+    if complex_type:
+        src = blocks.vector_source_c(data, True)
+        agc = ecss.agc_cc(args.settling_time, 1.0, 1.0, 65536.0, args.samp_rate)
+        item = gr.sizeof_gr_complex
+    else:
+        src = blocks.vector_source_f(data, True)
+        agc = ecss.agc_ff(args.settling_time, 1.0, 1.0, 65536.0, args.samp_rate)
+        item = gr.sizeof_float
+    agc.set_block_size(args.block_size)
+    agc.set_mode(mode)
+    head = blocks.head(item, args.items)
+    dst = blocks.null_sink(item)
+
+    tb = gr.top_block()
+    tb.connect(src, head, agc, dst)
+
+    start = time.time()
+    tb.run()
+    elapsed = time.time() - start
+
+    return args.items / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ecss AGC throughput benchmark")
+    parser.add_argument("--items", type=int, default=20000000, help="number of processed samples")
+    parser.add_argument("--samp-rate", type=float, default=10000000, help="sampling rate [Hz]")
+    parser.add_argument("--settling-time", type=float, default=10.0, help="settling time of the AGC [ms]")
+    parser.add_argument("--block-size", type=int, default=64, help="block size of the fast and block modes")
+    args = parser.parse_args()
+
+    for complex_type, name in ((True, "agc_cc"), (False, "agc_ff")):
+        data = make_signal(args, complex_type)
+        for mode_name, mode in MODES:
+            rate = run_agc(args, data, complex_type, mode)
+            print("%s %-6s: %8.3f Msps" % (name, mode_name, rate / 1e6))
+
+
+if __name__ == '__main__':
+    main()
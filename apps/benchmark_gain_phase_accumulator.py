@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+#
+# Copyright 2018 Antonio Miraglia - ISISpace.
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+"""
+Throughput benchmark of the ecss gain phase accumulator.
+
+A random walk of int64 phase words (as produced by the PLL tracking a drifting
+carrier) is processed with the turn around ratios 240/221 and 880/749, and the
+processed samples per second are printed.
+"""
+
+from gnuradio import gr, blocks
+import ecss
+import numpy as np
+import argparse, time
+
+
+RATIOS = ((240, 221), (880, 749))
+
+
+def make_phase(args):
+    """return the int64 phase words as int16 quadruples, to feed them with a vector source"""
+
+    rng = np.random.RandomState(0)
+    steps = rng.randint(-(1 << 58), 1 << 58, size=args.length, dtype=np.int64)
+    phase = np.cumsum(steps, dtype=np.int64)     # wraps as the int64 phase of the PLL
+    return phase.view(np.int16).tolist()
+
+
+def run_gain(args, data, downlink, uplink):
+    """run the flowgraph once and return the processed samples per second"""
+
+    item = gr.sizeof_short * 4                      # one int64 phase word
+    src = blocks.vector_source_s(data, True, 4)
+    head = blocks.head(item, args.items)
+    gain = ecss.gain_phase_accumulator(False, uplink, downlink)
+    dst = blocks.null_sink(item)
+
+    tb = gr.top_block()
+    tb.connect(src, head, gain, dst)
+
+    start = time.time()
+    tb.run()
+    elapsed = time.time() - start
+
+    return args.items / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ecss gain phase accumulator throughput benchmark")
+    parser.add_argument("--items", type=int, default=100000000, help="number of processed samples")
+    parser.add_argument("--length", type=int, default=1 << 20, help="length of the repeated phase sequence")
+    args = parser.parse_args()
+
+    data = make_phase(args)
+    for downlink, uplink in RATIOS:
+        rate = run_gain(args, data, downlink, uplink)
+        print("gain_phase_accumulator %d/%d: %8.3f Msps" % (downlink, uplink, rate / 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+#
+# Copyright 2018 Antonio Miraglia - ISISpace.
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+"""
+Throughput benchmark of the ecss PLL.
+
+The PLL is fed with a tone carrying a stream of "pll" control tags with
+zero, sparse and dense density and the processed samples per second are
+printed for each case.
+"""
+
+from gnuradio import gr, blocks, analog
+import ecss
+import pmt
+import argparse, time
+
+
+def make_tags(period, length):
+    """return a list of "pll" tags placed every period items (no tags if period is 0)"""
+
+    tags = []
+    if period > 0:
+        for offset in range(0, length, period):
+            tag = gr.tag_t()
+            tag.offset = offset
+            tag.key = pmt.intern("pll")
+            tag.value = pmt.intern("start(1e3)")
+            tags.append(tag)
+    return tags
+
+
+def run_pll(args, period):
+    """run the flowgraph once and return the processed samples per second"""
+
+    tb = gr.top_block()
+
+    length = 1 << 20
+    src_tone = analog.sig_source_c(args.samp_rate, analog.GR_COS_WAVE, args.freq, 1, 0)
+    src_head = blocks.head(gr.sizeof_gr_complex, length)
+    sink_tone = blocks.vector_sink_c()
+    tb.connect(src_tone, src_head, sink_tone)
+    tb.run()
+
+    coefficients = ecss.loop_filter.coefficients2ndorder(args.natural_freq, 0.707, args.samp_rate)
+
+    src = blocks.vector_source_c(sink_tone.data(), True, 1, make_tags(period, length))
+    head = blocks.head(gr.sizeof_gr_complex, args.items)
+    pll = ecss.pll(args.samp_rate, args.N, coefficients, 0, args.bw)
+    pll.set_fast(args.fast)
+    pll.set_decimation(args.decimation)
+    dst = blocks.null_sink(gr.sizeof_gr_complex)
+    dst_freq = blocks.null_sink(gr.sizeof_float)
+
+    tb = gr.top_block()
+    tb.connect(src, head, pll, dst)
+    tb.connect((pll, 1), dst_freq)
+
+    start = time.time()
+    tb.run()
+    elapsed = time.time() - start
+
+    return args.items / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ecss PLL throughput benchmark")
+    parser.add_argument("--items", type=int, default=10000000, help="number of processed samples")
+    parser.add_argument("--samp-rate", type=int, default=10000000, help="sampling rate [Hz]")
+    parser.add_argument("--freq", type=float, default=1000.0, help="frequency of the input tone [Hz]")
+    parser.add_argument("--natural-freq", type=float, default=500.0, help="natural frequency of the loop [Hz]")
+    parser.add_argument("--bw", type=float, default=100000.0, help="bandwidth of the PLL [Hz]")
+    parser.add_argument("-N", type=int, default=38, help="number of bits of the PLL")
+    parser.add_argument("--sparse", type=int, default=100000, help="tag period of the sparse stream [items]")
+    parser.add_argument("--fast", action="store_true", help="enable the fast mode of the PLL")
+    parser.add_argument("--decimation", type=int, default=1, help="decimation of the optional outputs of the PLL")
+    parser.add_argument("--dense", type=int, default=10, help="tag period of the dense stream [items]")
+    args = parser.parse_args()
+
+    for name, period in (("zero", 0), ("sparse", args.sparse), ("dense", args.dense)):
+        rate = run_pll(args, period)
+        print("%-8s tags: %8.3f Msps" % (name, rate / 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+#
+# Copyright 2018 Antonio Miraglia - ISISpace.
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+"""
+Scaling benchmark of the ecss blocks that handle tags and messages.
+
+Several independent chains (a PLL fed by a tone with a dense stream of "pll"
+tags and a phase converter publishing a message every work call) run in the
+same flowgraph, one thread per block. The aggregate and per chain throughput
+are printed for an increasing number of chains. The blocks use the shared
+symbols of the ecss library and do not look up the global pmt symbol table
+in their work functions; whether this changes the throughput is left to the
+measurement.
+
+With --baseline PREFIX the same chains are also run, in a child process,
+with the ecss module installed in PREFIX, e.g. a build of the tree before
+the shared symbols (interning the symbols in every call), and both
+throughputs are printed side by side.
+"""
+
+from gnuradio import gr, blocks, analog
+import ecss
+import pmt
+import argparse, glob, os, subprocess, sys, time
+
+
+def make_tags(period, length):
+    """return a list of "pll" tags alternating stop and start every period items"""
+
+    tags = []
+    for offset in range(0, length, period):
+        tag = gr.tag_t()
+        tag.offset = offset
+        tag.key = pmt.intern("pll")
+        tag.value = pmt.intern("stop" if (offset // period) % 2 else "start(1e3)")
+        tags.append(tag)
+    return tags
+
+
+def run_chains(args, chains):
+    """run the flowgraph with the given number of chains and return the processed samples per second"""
+
+    length = 1 << 16
+    tone = [complex(1, 0)] * length
+    coefficients = ecss.loop_filter.coefficients2ndorder(args.natural_freq, 0.707, args.samp_rate)
+
+    tb = gr.top_block()
+    for c in range(chains):
+        src = blocks.vector_source_c(tone, True, 1, make_tags(args.period, length))
+        head = blocks.head(gr.sizeof_gr_complex, args.items)
+        pll = ecss.pll(args.samp_rate, args.N, coefficients, 0, args.bw)
+        dst = blocks.null_sink(gr.sizeof_gr_complex)
+        tb.connect(src, head, pll, dst)
+
+        src_phase = analog.sig_source_f(args.samp_rate, analog.GR_SAW_WAVE, 1000, 1, 0)
+        head_phase = blocks.head(gr.sizeof_float, args.items)
+        converter = ecss.phase_converter(args.N)
+        converter.set_max_output_buffer(args.buffer)
+        dst_phase = blocks.null_sink(8)
+        tb.connect(src_phase, head_phase, converter, dst_phase)
+
+    start = time.time()
+    tb.run()
+    elapsed = time.time() - start
+
+    return 2 * chains * args.items / elapsed
+
+
+def sweep(args):
+    """return a list of (chains, aggregate samples per second) for an increasing number of chains"""
+
+    results = []
+    chains = 1
+    while chains <= args.max_chains:
+        results.append((chains, run_chains(args, chains)))
+        chains *= 2
+    return results
+
+
+def run_baseline(args):
+    """run the sweep with the ecss module installed in args.baseline and return its results"""
+
+    modules = glob.glob(os.path.join(args.baseline, "lib*", "python*", "*-packages", "ecss", "__init__.py"))
+    if not modules:
+        sys.exit("no ecss python module found in %s" % args.baseline)
+    python_dirs = [os.path.dirname(os.path.dirname(m)) for m in modules]
+    lib_dirs = [d for d in glob.glob(os.path.join(args.baseline, "lib*")) if os.path.isdir(d)]
+
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(python_dirs + [env.get("PYTHONPATH", "")])
+    env["LD_LIBRARY_PATH"] = os.pathsep.join(lib_dirs + [env.get("LD_LIBRARY_PATH", "")])
+
+    argv = [sys.executable, os.path.abspath(__file__), "--raw",
+            "--items", str(args.items), "--samp-rate", str(args.samp_rate),
+            "--natural-freq", str(args.natural_freq), "--bw", str(args.bw), "-N", str(args.N),
+            "--period", str(args.period), "--buffer", str(args.buffer), "--max-chains", str(args.max_chains)]
+    output = subprocess.check_output(argv, env=env, universal_newlines=True)
+
+    # skip anything else the runtime prints on the standard output
+    results = []
+    for line in output.splitlines():
+        fields = line.split()
+        if len(fields) == 2 and fields[0].isdigit():
+            results.append((int(fields[0]), float(fields[1])))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ecss tag and message handling scaling benchmark")
+    parser.add_argument("--items", type=int, default=2000000, help="number of processed samples for each block")
+    parser.add_argument("--samp-rate", type=int, default=10000000, help="sampling rate [Hz]")
+    parser.add_argument("--natural-freq", type=float, default=500.0, help="natural frequency of the loop [Hz]")
+    parser.add_argument("--bw", type=float, default=100000.0, help="bandwidth of the PLL [Hz]")
+    parser.add_argument("-N", type=int, default=38, help="number of bits")
+    parser.add_argument("--period", type=int, default=16, help="tag period of the PLL input [items]")
+    parser.add_argument("--buffer", type=int, default=256, help="output buffer of the phase converter [items]")
+    parser.add_argument("--max-chains", type=int, default=8, help="maximum number of parallel chains")
+    parser.add_argument("--baseline", metavar="PREFIX", help="install prefix of the ecss module to compare against")
+    parser.add_argument("--raw", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.raw:
+        for chains, rate in sweep(args):
+            print("%d %f" % (chains, rate))
+        return
+
+    baseline = dict(run_baseline(args)) if args.baseline else None
+
+    for chains, rate in sweep(args):
+        line = "%2d chains: %8.3f Msps aggregate, %8.3f Msps per chain" % (chains, rate / 1e6, rate / chains / 1e6)
+        if baseline is not None:
+            line += ", baseline %8.3f Msps aggregate (x%.2f)" % (baseline[chains] / 1e6, rate / baseline[chains])
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
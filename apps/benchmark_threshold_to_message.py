@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+#
+# Copyright 2018 Antonio Miraglia - ISISpace.
+#
+# This is free software; you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation; either version 3, or (at your option)
+# any later version.
+#
+# This software is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this software; see the file COPYING.  If not, write to
+# the Free Software Foundation, Inc., 51 Franklin Street,
+# Boston, MA 02110-1301, USA.
+#
+"""
+Throughput benchmark of the ecss threshold to message block.
+
+A lock metric sitting between the thresholds, with a lock and an unlock event
+in each repetition of the sequence, is scanned by the block. The scanned
+samples per second are printed together with the rate of a plain copy of the
+same samples (blocks.copy), which is the memory bandwidth bound of the scan.
+"""
+
+from gnuradio import gr, blocks
+import ecss
+import numpy as np
+import argparse, time, pmt
+
+
+def make_metric(args):
+    """return a noisy lock metric between the thresholds, with one lock and one unlock"""
+
+    rng = np.random.RandomState(0)
+    metric = np.clip(0.65 + args.noise * rng.randn(args.length), 0.51, 0.79)
+    metric[args.length // 4] = 0.9
+    metric[3 * args.length // 4] = 0.1
+    return metric.astype(np.float32).tolist()
+
+
+def run_block(args, data, block):
+    """run the flowgraph once and return the processed samples per second"""
+
+    src = blocks.vector_source_f(data, True)
+    head = blocks.head(gr.sizeof_float, args.items)
+
+    tb = gr.top_block()
+    if block is None:
+        dst = blocks.null_sink(gr.sizeof_float)
+        tb.connect(src, head, blocks.copy(gr.sizeof_float), dst)
+    else:
+        tb.connect(src, head, block)
+
+    start = time.time()
+    tb.run()
+    elapsed = time.time() - start
+
+    return args.items / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ecss threshold to message throughput benchmark")
+    parser.add_argument("--items", type=int, default=500000000, help="number of processed samples")
+    parser.add_argument("--length", type=int, default=1 << 20, help="length of the repeated metric sequence")
+    parser.add_argument("--noise", type=float, default=0.02, help="standard deviation of the metric")
+    parser.add_argument("--holdoff", type=int, default=0, help="hold-off of the block in samples")
+    args = parser.parse_args()
+
+    data = make_metric(args)
+
+    rate = run_block(args, data, None)
+    print("copy:                 %8.3f Msps" % (rate / 1e6))
+
+    block = ecss.threshold_to_message(0.8, 0.5, pmt.intern("LOCK"), pmt.intern("UNLOCK"), True)
+    block.set_holdoff(args.holdoff)
+    rate = run_block(args, data, block)
+    print("threshold_to_message: %8.3f Msps" % (rate / 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -28,6 +28,16 @@
 namespace gr {
   namespace ecss {
 
+    /*!
+     * \brief Gain tracking engines of the ecss AGC.
+     */
+    enum agc_mode_t {
+      AGC_EXACT = 0,    /*!< per sample feedback loop with exact exp/log */
+      AGC_FAST = 1,     /*!< log domain loop updated once per sub-block, with an interpolated gain */
+      AGC_BLOCK = 2,    /*!< feed-forward gain estimated on each block, constant along the block */
+      AGC_BLOCK_RAMP = 3  /*!< feed-forward gain estimated on each block, ramped from the previous block */
+    };
+
     /*!
      * \brief AGC Log-based.
      * \ingroup ecss
@@ -36,6 +46,20 @@ namespace gr {
      * an output signal of fixed rms value.
      * The output rms value will be the value of the reference parameter.
      * In order to be more user friendly, it is possible to set the settling time of the AGC.
+     *
+     * In the fast mode (AGC_FAST) the loop runs on sub-blocks of samples instead of on each sample: the mean of
+     * log|x| over a sub-block (evaluated with VOLK, fast log2 approximation) updates the log gain with the closed form
+     * of the per sample recursion, and the linear gain is interpolated along the next sub-block. The sub-block is
+     * limited to 1/16 of the time constant of the loop, so that the settling time stays within 5% of the exact mode
+     * (about 1% in simulation, for steps from 10 to 1000 times).
+     *
+     * In the block modes (AGC_BLOCK and AGC_BLOCK_RAMP) there is no feedback loop: the power of each block of
+     * block_size samples is estimated in advance (VOLK magnitude squared and running sum) and the gain bringing
+     * that block to the reference rms is applied to the same block, either constant or as a linear ramp from the
+     * gain of the previous block. The gain follows a burst within one block, the settling time is not used and
+     * the maximum gain still limits the gain. The block modes process whole blocks only (the output multiple
+     * of the block is the block size). The mode and the block size can be changed while the flowgraph runs, the
+     * change restarts the current block.
      */
     template <class T>
     class ECSS_API agc : virtual public gr::sync_block
@@ -76,6 +100,16 @@ namespace gr {
         */
       virtual float get_maximum_gain() const=0;
 
+      /*!
+        * \brief Returns the gain tracking engine
+        */
+      virtual agc_mode_t get_mode() const=0;
+
+      /*!
+        * \brief Returns the block size
+        */
+      virtual int get_block_size() const=0;
+
       /*******************************************************************
       * SET FUNCTIONS
       *******************************************************************/
@@ -103,6 +137,25 @@ namespace gr {
        * \param maximum_gain (float) new maximum gain
        */
       virtual void set_maximum_gain(float maximum_gain)=0;
+
+      /*!
+       * \brief Set the gain tracking engine of AGC.
+       *
+       * \param mode (agc_mode_t) AGC_EXACT, AGC_FAST, AGC_BLOCK or AGC_BLOCK_RAMP
+       */
+      virtual void set_mode(agc_mode_t mode)=0;
+
+      /*!
+       * \brief Set the block size.
+       *
+       * \details
+       * In the fast mode this is the maximum size of the sub-blocks, the actual size
+       * is further limited to 1/16 of the time constant of the loop. In the block
+       * modes this is the size of the power estimation window.
+       *
+       * \param block_size (int) new maximum size, at least 1
+       */
+      virtual void set_block_size(int block_size)=0;
     };
 
     typedef agc<float> agc_ff;
@@ -36,6 +36,11 @@ namespace gr {
      * That block evaluates In-phase and Quadrature components through sine and cosine functions of the final phase value evaluated.
      * Furthermore, this block allows to reduce the accuracy (setting the number of bits N) of the mathematics in order to simulate properly a real behavior.
      * Finally, this block is designed for work together with a custom PLL designed present in the ecss module of OOT.
+     *
+     * In the fast mode the phasor is read from a table of 2^table_bits entries indexed by the top bits of the N-bit
+     * phase, optionally interpolated linearly on the following bits. The SFDR of the generated carrier is
+     * 6.02 * N dB in the exact mode, 6.02 * min(N, table_bits) dB with the nearest table entry and
+     * min(6.02 * N, 12.04 * table_bits) dB with the interpolation (144 dB with the default 12 bit table).
      */
     class ECSS_API coherent_phase_modulator : virtual public gr::sync_block
     {
@@ -51,6 +56,50 @@ namespace gr {
         * \param N number of bits.
        */
       static sptr make(int N);
+
+      /*******************************************************************
+      * SET FUNCTIONS
+      *******************************************************************/
+
+      /*!
+        * \brief Enable the fast mode (table NCO).
+        *
+        * \param fast (bool) true to enable the fast mode
+        */
+      virtual void set_fast(bool fast) = 0;
+
+      /*!
+        * \brief Set the size of the table of the fast mode.
+        *
+        * \param bits (int) the table has 2^bits entries, in [2, 24]
+        */
+      virtual void set_table_bits(int bits) = 0;
+
+      /*!
+        * \brief Enable the linear interpolation between the table entries.
+        *
+        * \param interpolation (bool) true to interpolate, false to use the nearest entry
+        */
+      virtual void set_interpolation(bool interpolation) = 0;
+
+      /*******************************************************************
+      * GET FUNCTIONS
+      *******************************************************************/
+
+      /*!
+        * \brief Returns true if the fast mode is enabled.
+        */
+      virtual bool get_fast() const = 0;
+
+      /*!
+        * \brief Returns the number of bits of the table of the fast mode.
+        */
+      virtual int get_table_bits() const = 0;
+
+      /*!
+        * \brief Returns true if the table entries are interpolated.
+        */
+      virtual bool get_interpolation() const = 0;
     };
 
   } // namespace ecss
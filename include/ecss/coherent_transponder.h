@@ -0,0 +1,172 @@
+/* -*- c++ -*- */
+/*
+ * Copyright 2018 Antonio Miraglia - ISISpace.
+ *
+ * This is free software; you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation; either version 3, or (at your option)
+ * any later version.
+ *
+ * This software is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this software; see the file COPYING.  If not, write to
+ * the Free Software Foundation, Inc., 51 Franklin Street,
+ * Boston, MA 02110-1301, USA.
+ */
+
+#ifndef INCLUDED_ECSS_COHERENT_TRANSPONDER_H
+#define INCLUDED_ECSS_COHERENT_TRANSPONDER_H
+
+#include <ecss/api.h>
+#include <gnuradio/sync_block.h>
+
+namespace gr {
+  namespace ecss {
+
+    /*!
+     * \brief Coherent transponder: PLL, gain phase accumulator and coherent phase modulator in one block
+     *
+     * \ingroup ecss
+     *
+     * \details This block locks an ecss PLL on the uplink carrier and generates the coherent downlink carrier
+     * with the turn around ratio (downlink / uplink), as the chain ecss PLL (port 3) -> ecss gain phase
+     * accumulator -> ecss coherent phase modulator does, but without the two int64 streams between the blocks.
+     * The output is bit-identical to the chain (with the ports 1 and 2 of the PLL connected, as required by the
+     * scheduler to use the port 3).
+     *
+     * The optional int64 input is a phase (e.g. of the ranging or telemetry signal from the ecss phase converter)
+     * added to the downlink phase before the modulator. The optional output is the output of the mixer of the PLL
+     * (port 0 of the ecss PLL), useful to evaluate the lock state. The "pll" tags of the uplink input (reset, stop,
+     * start, start(1e3) and the ("freq" . f) seed of the FFT signal search) control the PLL as for the ecss PLL.
+     */
+    class ECSS_API coherent_transponder : virtual public gr::sync_block
+    {
+     public:
+       /*!
+        * \brief Return a shared_ptr to a new instance of ecss::coherent_transponder.
+        */
+      typedef boost::shared_ptr<coherent_transponder> sptr;
+
+      /*!
+        * \brief Make a coherent transponder.
+        *
+        * \param samp_rate Sampling rate of signal.
+        * \param N number of bits of the PLL and of the modulator.
+        * \param coefficients value of the coefficients of the loop filter, as for the ecss PLL.
+        * \param freq_central central value of frequency that PLL can catch.
+        * \param bw bandwidth of frequency that PLL can catch.
+        * \param uplink uplink frequency for evaluate the turn around ratio.
+        * \param downlink downlink frequency for evaluate the turn around ratio.
+       */
+      static sptr make(int samp_rate, int N, const std::vector<double> &coefficients, float freq_central, float bw, int uplink, int downlink);
+
+      /*******************************************************************
+      * SET FUNCTIONS
+      *******************************************************************/
+
+      /*!
+        * \brief Set the loop gain coefficients.
+        *
+        * \param coefficients (double) new coefficients
+        */
+      virtual void set_coefficients(const std::vector<double> &coefficients) = 0;
+
+      /*!
+        * \brief Set the control loop's frequency.
+        *
+        * \param freq    (float) new frequency
+        */
+      virtual void set_frequency(float freq) = 0;
+
+      /*!
+        * \brief Set the control loop's central frequency.
+        *
+        * \param freq (float) new central frequency
+        */
+      virtual void set_freq_central(float freq) = 0;
+
+      /*!
+        * \brief Set the bandwidth the control loop can track.
+        *
+        * \param bw (float) new bandwidth
+        */
+      virtual void set_bw(float bw) = 0;
+
+      /*!
+        * \brief Set uplink constant of the turn around ratio.
+        */
+      virtual void set_uplink(int uplink) = 0;
+
+      /*!
+        * \brief Set downlink constant of the turn around ratio.
+        */
+      virtual void set_downlink(int downlink) = 0;
+
+      /*!
+        * \brief Enable the exact turn around ratio, which carries the remainder of the
+        * division between the samples as the exact mode of the ecss gain phase accumulator.
+        *
+        * \param exact (bool) true to enable the exact mode
+        */
+      virtual void set_exact(bool exact) = 0;
+
+      /*!
+        * \brief Enable the fast mode of the PLL and of the modulator.
+        *
+        * \param fast (bool) true to enable the fast mode
+        */
+      virtual void set_fast(bool fast) = 0;
+
+      /*******************************************************************
+      * GET FUNCTIONS
+      *******************************************************************/
+
+      /*!
+        * \brief Returns the loop gain coefficients.
+        */
+      virtual std::vector<double> get_coefficients() const = 0;
+
+      /*!
+        * \brief Get the control loop's frequency estimate.
+        */
+      virtual float get_frequency() const = 0;
+
+      /*!
+        * \brief Get the control loop's central frequency.
+        */
+      virtual float get_freq_central() const = 0;
+
+      /*!
+        * \brief Get the control loop's bandwidth.
+        */
+      virtual float get_bw() const = 0;
+
+      /*!
+        * \brief Return uplink constant
+        */
+      virtual int get_uplink() const = 0;
+
+      /*!
+        * \brief Return downlink constant
+        */
+      virtual int get_downlink() const = 0;
+
+      /*!
+        * \brief Returns true if the exact turn around ratio is enabled.
+        */
+      virtual bool get_exact() const = 0;
+
+      /*!
+        * \brief Returns true if the fast mode is enabled.
+        */
+      virtual bool get_fast() const = 0;
+    };
+
+  } // namespace ecss
+} // namespace gr
+
+#endif /* INCLUDED_ECSS_COHERENT_TRANSPONDER_H */
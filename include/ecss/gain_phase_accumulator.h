@@ -35,6 +35,19 @@ namespace gr {
      * by rounding in int64, this block will consider the number of bits of the trasformation.
      * 
      * This block should to be uses between the ecss PLL and Coherent Phase Modulator.
+     *
+     * The division by the uplink constant is evaluated with a precomputed reciprocal,
+     * the output is bit-exact against the int64 division truncated toward zero.
+     *
+     * The truncation of every sample makes the output drift from the exact turn around
+     * ratio over long passes. In exact mode the remainder of the division is carried to
+     * the next sample, so the output never differs from input * downlink / uplink by more
+     * than one unit of the int64 phase word, and no reset is needed to remove the drift.
+     *
+     * The ratio can be changed at runtime with the setters or with a message on the
+     * "ratio" port: a pair (uplink . downlink) of integers or a dictionary with the keys
+     * "uplink" and "downlink". Messages whose values are not positive or do not fit an int
+     * are ignored.
      */
   class ECSS_API gain_phase_accumulator : virtual public gr::sync_block
   {
@@ -48,7 +61,7 @@ namespace gr {
      * \details The turn around ration is evaluated as (downlink / uplink).
      * 
      * \param reset reset of internal registers.
-     * \param uplink uplink frequency for evaluate the turn aroun ratio.
+     * \param uplink uplink frequency for evaluate the turn aroun ratio (must not be zero).
      * \param downlink downlink frequency for evaluate the turn aroun ratio.
      */
     static sptr make(bool reset, int uplink, int downlink);
@@ -72,6 +85,11 @@ namespace gr {
        */
     virtual int get_downlink() const = 0;
 
+    /*!
+       * \brief Return true if the remainder of the division is carried between the samples
+       */
+    virtual bool get_exact() const = 0;
+
     /*******************************************************************
     * SET FUNCTIONS
     *******************************************************************/
@@ -90,6 +108,16 @@ namespace gr {
        * \brief Set downlink constant
        */
     virtual void set_downlink(int downlink) = 0;
+
+    /*!
+       * \brief Set both the constants of the turn around ratio (downlink / uplink)
+       */
+    virtual void set_ratio(int uplink, int downlink) = 0;
+
+    /*!
+       * \brief Enable the exact mode, which carries the remainder of the division
+       */
+    virtual void set_exact(bool exact) = 0;
     };
 
   } // namespace ecss
@@ -56,6 +56,22 @@
       * \param bit_rate Bit rate of the input signal.
       */
     static sptr make(float bit_rate, float samp_rate);
+
+    /*!
+      * \brief Set the input format: one bit for each byte or packed bytes.
+      *
+      * \details With packed bytes each input byte carries 8 bits, MSB first, and
+      * produces 8 * samp_rate / bit_rate output items, so that no unpack block is
+      * needed upstream. It has to be set before the flowgraph starts.
+      *
+      * \param packed (bool) true for packed bytes
+      */
+    virtual void set_packed(bool packed) = 0;
+
+    /*!
+      * \brief Returns true if the input is made of packed bytes.
+      */
+    virtual bool get_packed() const = 0;
     };
 
   } // namespace ecss
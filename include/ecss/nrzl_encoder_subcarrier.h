@@ -39,6 +39,16 @@ namespace gr {
      * an decimator block.
      * 
      * The output is considered as sigle bit.
+     *
+     * By default the sub-carrier waveform of each bit starts from phase 0, which is
+     * continuous only when the sub-carrier frequency is a multiple of the bit rate.
+     * With set_continuous() the sub-carrier is generated by a running NCO instead:
+     * the phase is a 64-bit word that is never restarted, so that any ratio of the
+     * sub-carrier frequency on the bit rate is allowed (the frequency resolution is
+     * samp_rate / 2^64). The sine comes from the interpolated table of 4096 entries
+     * of the other fast NCOs of ecss (error below 4e-7), the square wave is the sign
+     * of the NCO, sampled 2^-16 samples later so that the edges of an integer ratio
+     * do not depend on the rounding of the phase step.
      */
     class ECSS_API nrzl_encoder_subcarrier : virtual public gr::sync_interpolator
     {
@@ -57,6 +67,35 @@ namespace gr {
         * \param freq_sub Sub-carrier frequency.
         */
       static sptr make(bool sine, float freq_sub, float bit_rate, float samp_rate);
+
+      /*!
+        * \brief Set the input format: one bit for each byte or packed bytes.
+        *
+        * \details With packed bytes each input byte carries 8 bits, MSB first, and
+        * produces 8 * samp_rate / bit_rate output items, so that no unpack block is
+        * needed upstream. It has to be set before the flowgraph starts.
+        *
+        * \param packed (bool) true for packed bytes
+        */
+      virtual void set_packed(bool packed) = 0;
+
+      /*!
+        * \brief Returns true if the input is made of packed bytes.
+        */
+      virtual bool get_packed() const = 0;
+
+      /*!
+        * \brief Generate the sub-carrier with a phase-continuous NCO.
+        *
+        * \param continuous (bool) true for the running NCO, false to restart the
+        * sub-carrier at each bit. The NCO restarts from phase 0.
+        */
+      virtual void set_continuous(bool continuous) = 0;
+
+      /*!
+        * \brief Returns true if the sub-carrier is generated with a phase-continuous NCO.
+        */
+      virtual bool get_continuous() const = 0;
     };
 
   } // namespace ecss
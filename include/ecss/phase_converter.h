@@ -27,6 +27,16 @@
 namespace gr {
   namespace ecss {
 
+    /*!
+     * \brief Batching policies of the message output of the phase converter.
+     */
+    enum pdu_mode_t {
+      PDU_OFF = 0,      /*!< no message is published */
+      PDU_CALL = 1,     /*!< one message with the output of each work call */
+      PDU_ITEMS = 2,    /*!< one message every pdu_items output items */
+      PDU_TIMER = 3     /*!< one message with the output accumulated in each pdu_period, at most pdu_items long */
+    };
+
     /*!
      * \brief Phase Converter from float to integer.
      *
@@ -36,6 +46,15 @@ namespace gr {
      * Furthermore, this block allows to reduce the accuracy (setting the number of bits N) of the mathematics in order to simulate properly a real behavior.
      * Finally, this block is designed for work together with the coherent phase modulator OOT of the ecss module.
      * Pay attention that the input is considered as radiant (suggested to be in the range [-pi; pi], but an wrapping function is done internally). The output is the input value, normalized by pi, rounded and multiplied by 2^(64-N) in order to be suitable as input for an "integer accumulator".
+     *
+     * The output is also published as an s64vector on the message port "async_out". The batching policy sets how the
+     * output is split into messages: by work call (default), by a fixed number of items or by a time period. When the
+     * message port is not connected no message is built and the block only produces the stream output.
+     * In PDU_TIMER mode the messages are filled up to pdu_items items and published when full; the partial message
+     * is published every pdu_period by a timer thread, also when the input stream stalls.
+     *
+     * The messages come from a small pool: a message is reused for a later one as soon as every receiver has
+     * released it, so a receiver must not keep a pointer to the elements of a message it no longer holds.
      */
     class ECSS_API phase_converter : virtual public gr::sync_block
     {
@@ -51,6 +70,42 @@ namespace gr {
         * \param N number of bits.
        */
       static sptr make(int N);
+
+      /*!
+        * \brief Set the batching policy of the message output.
+        *
+        * \param mode (pdu_mode_t) PDU_OFF, PDU_CALL, PDU_ITEMS or PDU_TIMER
+        */
+      virtual void set_pdu_mode(pdu_mode_t mode) = 0;
+
+      /*!
+        * \brief Set the number of items of each message in PDU_ITEMS mode, the maximum in PDU_TIMER mode.
+        *
+        * \param items (int) number of items, at least 1
+        */
+      virtual void set_pdu_items(int items) = 0;
+
+      /*!
+        * \brief Set the period of the messages in PDU_TIMER mode.
+        *
+        * \param period (double) period in seconds, greater than 0
+        */
+      virtual void set_pdu_period(double period) = 0;
+
+      /*!
+        * \brief Returns the batching policy of the message output.
+        */
+      virtual pdu_mode_t get_pdu_mode() const = 0;
+
+      /*!
+        * \brief Returns the number of items of each message in PDU_ITEMS mode.
+        */
+      virtual int get_pdu_items() const = 0;
+
+      /*!
+        * \brief Returns the period of the messages in PDU_TIMER mode.
+        */
+      virtual double get_pdu_period() const = 0;
     };
 
   } // namespace ecss
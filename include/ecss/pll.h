@@ -22,7 +22,7 @@
 #define INCLUDED_ECSS_PLL_H
 
 #include <ecss/api.h>
-#include <gnuradio/sync_block.h>
+#include <gnuradio/block.h>
 
 namespace gr {
   namespace ecss {
@@ -35,8 +35,24 @@ namespace gr {
      * \details This block generates a complex output signal which is the complex multiplication between the input and the reference signal generated by PLL.
      * The ecss PLL provide in output the value of frequency (expressed in Hz) of the internal reference signal, the output of the phase detector (espressed in rad in range [-pi; pi]) and the int64 value of the internal integer accumulator (useful for the ecss coherent phase accumulator).
      * Furthermore, this block allows to reduce the accuracy (setting the number of bits N) of the mathematics in order to simulate properly a real behavior.
+     *
+     * The PLL includes a lock detector: the cosine of the phase error is averaged (with a single pole IIR filter
+     * updated once every lock_decimation samples) and compared with two thresholds. When the average rises above the
+     * lock threshold the message "LOCK" is published on the "lock_out" message port, when it falls below the unlock
+     * threshold the message "UNLOCK" is published. The port can be connected directly to the "lock_in" port of the
+     * ecss signal search blocks.
+     *
+     * The optional outputs (freq, phase error and phase delta) can be decimated by a factor D, so that they produce one
+     * item every D input samples (the last sample of each group, or the average of the group for freq and phase error
+     * if the averaging is enabled), while the main output always runs at the full rate. The "modulator"/"reset" and
+     * "accumulator"/"reset" tags of the phase delta port are placed on the decimated item covering the event.
+     * The phase delta port must not be decimated when it drives the ecss gain phase accumulator.
+     *
+     * A "pll" tag whose value is the pair ("freq" . f) sets the frequency of the loop to f Hz (see set_frequency),
+     * so that the loop starts from the frequency estimated by the ecss FFT signal search instead of pulling in
+     * from freq_central. The signal search places it right after its "pll"/"reset" tag.
      */
-    class ECSS_API pll : virtual public gr::sync_block
+    class ECSS_API pll : virtual public gr::block
     {
      public:
        /*!
@@ -138,6 +154,95 @@ namespace gr {
         */
       virtual void set_bw(float bw) = 0;
 
+      /*!
+        * \brief Enable the fast mode of the PLL.
+        *
+        * \details
+        * In fast mode the reference signal is generated by a 4096 entries
+        * table (with linear interpolation) indexed by the N-bit integer phase
+        * and the phase detector subtracts the N-bit phase of the reference from
+        * a polynomial approximation of the atan2 of the input, so that neither
+        * approximation is in the feedback path of the loop.
+        * The error of the phase detector is lower than 1.2e-5 rad, i.e. lower
+        * than one LSB of the N-bit phase (pi * 2^-(N-1)) for N <= 19, the error
+        * of the reference signal is lower than 4e-7. For greater N, the fast mode
+        * limits the resolution of the phase detector to about 17 bits.
+        *
+        * \param fast (bool) true to enable the fast mode
+        */
+      virtual void set_fast(bool fast) = 0;
+
+      /*!
+        * \brief Set the decimation of the optional outputs.
+        *
+        * \details
+        * The freq, phase error and phase delta ports produce one item every
+        * \p decimation input samples. The main output is not decimated.
+        *
+        * \param decimation (int) new decimation, at least 1
+        */
+      virtual void set_decimation(int decimation) = 0;
+
+      /*!
+        * \brief Enable the averaging of the decimated outputs.
+        *
+        * \details
+        * If enabled, the freq and phase error ports output the average of each
+        * group of samples instead of its last sample. The phase delta port is
+        * never averaged.
+        *
+        * \param average (bool) true to enable the averaging
+        */
+      virtual void set_average(bool average) = 0;
+
+      /*!
+        * \brief Set the lock threshold of the lock detector.
+        *
+        * \details
+        * The "LOCK" message is published when the averaged cosine of the phase
+        * error rises above this value. It must be greater than the unlock threshold,
+        * use set_lock_thresholds to move both thresholds past each other.
+        *
+        * \param threshold (float) new lock threshold, in [-1, 1]
+        */
+      virtual void set_lock_threshold(float threshold) = 0;
+
+      /*!
+        * \brief Set the unlock threshold of the lock detector.
+        *
+        * \details
+        * The "UNLOCK" message is published when the averaged cosine of the phase
+        * error falls below this value. It must be lower than the lock threshold.
+        *
+        * \param threshold (float) new unlock threshold, in [-1, 1]
+        */
+      virtual void set_unlock_threshold(float threshold) = 0;
+
+      /*!
+        * \brief Set both the thresholds of the lock detector.
+        *
+        * \param lock_threshold (float) new lock threshold, in [-1, 1]
+        * \param unlock_threshold (float) new unlock threshold, in [-1, 1], lower than the lock threshold
+        */
+      virtual void set_lock_thresholds(float lock_threshold, float unlock_threshold) = 0;
+
+      /*!
+        * \brief Set the gain of the IIR filter of the lock detector.
+        *
+        * \param alpha (float) new gain, in (0, 1]
+        */
+      virtual void set_lock_alpha(float alpha) = 0;
+
+      /*!
+        * \brief Set the decimation of the lock detector.
+        *
+        * \details
+        * The lock metric is evaluated once every \p decimation samples.
+        *
+        * \param decimation (int) new decimation, at least 1
+        */
+      virtual void set_lock_decimation(int decimation) = 0;
+
       /*******************************************************************
       * GET FUNCTIONS
       *******************************************************************/
@@ -167,6 +272,46 @@ namespace gr {
         * \brief Get the control loop's bandwidth.
         */
       virtual float get_bw() const = 0;
+
+      /*!
+        * \brief Returns true if the fast mode is enabled.
+        */
+      virtual bool get_fast() const = 0;
+
+      /*!
+        * \brief Returns the decimation of the optional outputs.
+        */
+      virtual int get_decimation() const = 0;
+
+      /*!
+        * \brief Returns true if the decimated outputs are averaged.
+        */
+      virtual bool get_average() const = 0;
+
+      /*!
+        * \brief Returns the lock threshold of the lock detector.
+        */
+      virtual float get_lock_threshold() const = 0;
+
+      /*!
+        * \brief Returns the unlock threshold of the lock detector.
+        */
+      virtual float get_unlock_threshold() const = 0;
+
+      /*!
+        * \brief Returns the gain of the IIR filter of the lock detector.
+        */
+      virtual float get_lock_alpha() const = 0;
+
+      /*!
+        * \brief Returns the decimation of the lock detector.
+        */
+      virtual int get_lock_decimation() const = 0;
+
+      /*!
+        * \brief Returns true if the PLL is locked.
+        */
+      virtual bool get_locked() const = 0;
     };
 
   } // namespace ecss
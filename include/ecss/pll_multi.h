@@ -0,0 +1,154 @@
+/* -*- c++ -*- */
+/*
+ * Copyright 2018 Antonio Miraglia - ISISpace.
+ *
+ * This is free software; you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation; either version 3, or (at your option)
+ * any later version.
+ *
+ * This software is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this software; see the file COPYING.  If not, write to
+ * the Free Software Foundation, Inc., 51 Franklin Street,
+ * Boston, MA 02110-1301, USA.
+ */
+
+#ifndef INCLUDED_ECSS_PLL_MULTI_H
+#define INCLUDED_ECSS_PLL_MULTI_H
+
+#include <ecss/api.h>
+#include <gnuradio/sync_block.h>
+
+namespace gr {
+  namespace ecss {
+
+    /*!
+     * \brief Bank of PLLs with complex mixer, one for each input channel
+     *
+     * \ingroup ecss
+     *
+     * \details This block runs M independent ecss PLLs, one for each input stream, in the same
+     * work call. The output i is the complex multiplication between the input i and the reference
+     * signal generated by the PLL i. The loop of each channel behaves as the ecss PLL
+     * (including the "pll" reset/stop/start and frequency tags of the input stream), but the state of all the
+     * channels is stored in arrays and updated together, so that a channel bank pays the
+     * scheduler overhead only once.
+     *
+     * Only the mixer output of the ecss PLL is provided: there are no frequency, phase error
+     * or phase delta outputs and no lock detector, and no "accumulator"/"modulator" tags are
+     * sent downstream on stop and start. A channel can replace an ecss PLL used as a carrier
+     * tracker, not one feeding the gain phase accumulator or the coherent phase modulator.
+     */
+    class ECSS_API pll_multi : virtual public gr::sync_block
+    {
+     public:
+       /*!
+        * \brief Return a shared_ptr to a new instance of ecss::pll_multi.
+        */
+      typedef boost::shared_ptr<pll_multi> sptr;
+
+      /*!
+        * \brief Make a bank of PLLs with complex mixer.
+        *
+        * \param samp_rate Sampling rate of signal.
+        * \param N number of bits.
+        * \param coefficients value of the coefficients of the loop filter (shared by all the channels),
+        * as for the ecss PLL.
+        * \param freq_central central value of frequency of each channel, the number of channels
+        * is the size of this vector.
+        * \param bw bandwidth of frequency that each PLL can catch.
+       */
+      static sptr make(int samp_rate, int N, const std::vector<double> &coefficients, const std::vector<float> &freq_central, float bw);
+
+      /*******************************************************************
+      * SET FUNCTIONS
+      *******************************************************************/
+
+      /*!
+        * \brief Set the precision of the PLLs.
+        *
+        * \param N    (int) new number of bits
+        */
+      virtual void set_N(int N) = 0;
+
+      /*!
+        * \brief Set the loop gain coefficients of all the channels.
+        *
+        * \param coefficients (double) new coefficients
+        */
+      virtual void set_coefficients(const std::vector<double> &coefficients) = 0;
+
+      /*!
+        * \brief Set the control loop's frequency of a channel.
+        *
+        * \param channel (int) channel index
+        * \param freq    (float) new frequency
+        */
+      virtual void set_frequency(int channel, float freq) = 0;
+
+      /*!
+        * \brief Set the control loop's central frequency of a channel.
+        *
+        * \param channel (int) channel index
+        * \param freq (float) new central frequency
+        */
+      virtual void set_freq_central(int channel, float freq) = 0;
+
+      /*!
+        * \brief Set the bandwidth each control loop can track.
+        *
+        * \param bw (float) new bandwidth
+        */
+      virtual void set_bw(float bw) = 0;
+
+      /*!
+        * \brief Enable the fast mode (table NCO and polynomial atan2) as for the ecss PLL.
+        *
+        * \param fast (bool) true to enable the fast mode
+        */
+      virtual void set_fast(bool fast) = 0;
+
+      /*******************************************************************
+      * GET FUNCTIONS
+      *******************************************************************/
+
+      /*!
+        * \brief Returns the number of channels.
+        */
+      virtual int get_channels() const = 0;
+
+      /*!
+        * \brief Returns the loop gain coefficients.
+        */
+      virtual std::vector<double> get_coefficients() const = 0;
+
+      /*!
+        * \brief Get the control loop's frequency estimated for a channel.
+        */
+      virtual float get_frequency(int channel) const = 0;
+
+      /*!
+        * \brief Get the control loop's central frequency of a channel.
+        */
+      virtual float get_freq_central(int channel) const = 0;
+
+      /*!
+        * \brief Get the control loop's bandwidth.
+        */
+      virtual float get_bw() const = 0;
+
+      /*!
+        * \brief Returns true if the fast mode is enabled.
+        */
+      virtual bool get_fast() const = 0;
+    };
+
+  } // namespace ecss
+} // namespace gr
+
+#endif /* INCLUDED_ECSS_PLL_MULTI_H */
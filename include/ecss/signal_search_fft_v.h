@@ -37,14 +37,24 @@ namespace gr
      * \details This block uses an FFT Algorithm to analyze the input 
      * signal.
      * An SNR estimation is performed on input. In addition, also a decimation on input is performed.
+     * The decimation is an integer FIR decimator: its low-pass filter is designed from bandwidth and
+     * decimation to reject the images folded onto the searched band, with at most 24 taps for each
+     * decimation phase, and its state is kept from one input vector to the next one.
+     * The float version (signal_search_fft_vff) searches real input with a real to complex FFT: the spectrum
+     * has fftsize / 2 + 1 bins from 0 to (samp_rate / decimation) / 2, so the searched band must be at
+     * positive frequencies. The detection works as in the complex version (signal_search_fft_vcc).
+     * The first vector of each detection carries a "pll"/"reset" tag followed by a "pll" tag whose value is
+     * the pair ("freq" . f), where f is the frequency (Hz) of the strongest bin of the searched band refined
+     * with a Gaussian interpolation of the bin and of its neighbours. The ecss PLL starts from f.
      */
+    template <class T>
     class ECSS_API signal_search_fft_v : virtual public gr::block
     {
       public:
           /*!
         * \brief Return a shared_ptr to a new instance of ecss::signal_search_fft_v.
         */
-        typedef boost::shared_ptr<signal_search_fft_v> sptr;
+        typedef boost::shared_ptr<signal_search_fft_v<T>> sptr;
 
         /*!
             * \brief Signal Search with Goertzel Algorithm evaluation.
@@ -107,6 +117,21 @@ namespace gr
          */
         virtual bool get_enable() const = 0;
 
+        /*!
+         * \brief Returns the number of periodograms of the Welch average.
+         */
+        virtual int get_averages() const = 0;
+
+        /*!
+         * \brief Returns the overlap of the Welch segments.
+         */
+        virtual float get_overlap() const = 0;
+
+        /*!
+         * \brief Returns the maximum number of peaks published on the peaks port.
+         */
+        virtual int get_peaks() const = 0;
+
         /*******************************************************************
         * SET FUNCTIONS
         *******************************************************************/
@@ -152,8 +177,48 @@ namespace gr
          * \param enable    (bool) new enable
          */
         virtual void set_enable(bool enable) = 0;
+
+        /*!
+         * \brief Set the number of periodograms of the Welch average
+         *
+         * \details
+         * The spectrum of each vector is the average of the periodograms of up to
+         * \p averages segments of fftsize samples (after the decimation). The most
+         * recent segment ends with the current vector and the older ones reach back
+         * into the previous vectors, so the latency does not grow. With 1 (default)
+         * the spectrum is the periodogram of the current vector only.
+         *
+         * \param averages    (int) number of periodograms, must be positive
+         */
+        virtual void set_averages(int averages) = 0;
+
+        /*!
+         * \brief Set the overlap of the Welch segments
+         *
+         * \param overlap    (float) fraction of fftsize shared by two consecutive segments, in [0, 1) (default 0.5)
+         */
+        virtual void set_overlap(float overlap) = 0;
+
+        /*!
+         * \brief Set the number of peaks published on the peaks port
+         *
+         * \details
+         * The whole spectrum of each vector is scanned once for local maxima whose
+         * power is higher than threshold times the noise floor, estimated from the
+         * median of the spectrum. If there is any, the strongest ones (at most \p peaks)
+         * are published as a dictionary of three f32vectors, sorted by decreasing power:
+         * "freq" (frequency of the bin in Hz, after the decimation), "snr" (power over
+         * noise floor in dB) and "power" (power of the bin). The search in the central
+         * band and the output of the block do not change.
+         *
+         * \param peaks    (int) maximum number of peaks, 0 (default) disables the peak list
+         */
+        virtual void set_peaks(int peaks) = 0;
     };
 
+    typedef signal_search_fft_v<gr_complex> signal_search_fft_vcc;
+    typedef signal_search_fft_v<float> signal_search_fft_vff;
+
   } // namespace ecss
 } // namespace gr
 
@@ -23,10 +23,20 @@
 
 #include <ecss/api.h>
 #include <gnuradio/sync_decimator.h>
+#include <gnuradio/endianness.h>
 
     namespace gr {
   namespace ecss {
 
+    /*!
+     * \brief Output formats of the SP-L decoder.
+     */
+    enum decision_t {
+      DECISION_HARD = 0,        /*!< one bit (0 or 1) for each byte, or packed bytes */
+      DECISION_SOFT = 1,        /*!< float soft bit, (first half - second half) / 2 */
+      DECISION_SOFT_INT8 = 2    /*!< int8 soft bit, 64 * (first half - second half) / 2, saturated */
+    };
+
   /*!
      * \brief SP-L (or Manchester) encoder.
      *
@@ -39,7 +49,29 @@
      * The input signal will provid each samp_rate / bit_rate items one output bit; So, this is
      * an decimator block.
      * 
-     * The output is considered as sigle bit.
+     * The output is considered as sigle bit, unless the packed output is
+     * selected with set_packed(): then each output byte carries 8 bits.
+     *
+     * Each bit is decided on both its half-symbols: a bit one is a high first
+     * half followed by a low second half, so the difference of the two halves
+     * is positive for a one and has twice the SNR of a single half-symbol.
+     * The hard decision is the sign of the difference. The soft decisions
+     * (DECISION_SOFT and DECISION_SOFT_INT8) output the difference itself,
+     * which is proportional to the log-likelihood ratio of the bit for an
+     * additive white gaussian noise: positive for a one, +-1 (or +-64) for a
+     * noiseless input of amplitude 1, as expected by the decoders of gr-fec.
+     *
+     * If the symbol synchronizer locks on the wrong half-symbol, every bit is
+     * made of the second half of a bit and the first half of the next one.
+     * Such a pair has two halves with the same sign whenever two consecutive
+     * bits differ, which happens for half of the bits of random data, while an
+     * aligned pair has it only because of the noise. With set_slip_window() the
+     * decoder counts these violations on the last window bits and, when they
+     * exceed threshold * window, it slips the clock phase by one half-symbol
+     * and tags the bit where the slip is decided with the key "clock_slip" and
+     * the number of slips as value. The following bits are decoded with the new
+     * phase. A sequence of equal bits has no violations with both phases, so
+     * the phase can be recovered only on data with transitions.
      */
   class ECSS_API spl_decoder : virtual public gr::sync_decimator
   {
@@ -50,9 +82,77 @@
     typedef boost::shared_ptr<spl_decoder> sptr;
 
     /*!
-      * \brief SP-L encoder.
+      * \brief SP-L decoder.
+      *
+      * \param decision (decision_t) Output format: hard bits (bytes), float soft bits
+      * or int8 soft bits.
+      */
+    static sptr make(decision_t decision = DECISION_HARD);
+
+    /*!
+      * \brief Set the output format: one bit for each byte or packed bytes.
+      *
+      * \details With packed bytes each output byte carries 8 decoded bits, in the
+      * order set by set_endianness(), and consumes 16 input items, so that no pack
+      * block is needed downstream. It has to be set before the flowgraph starts and
+      * it is available with hard decisions only.
+      *
+      * \param packed (bool) true for packed bytes
+      */
+    virtual void set_packed(bool packed) = 0;
+
+    /*!
+      * \brief Set the bit order of the packed bytes.
+      *
+      * \param endianness (endianness_t) GR_MSB_FIRST: the first decoded bit is the MSB;
+      * GR_LSB_FIRST: the first decoded bit is the LSB.
+      */
+    virtual void set_endianness(endianness_t endianness) = 0;
+
+    /*!
+      * \brief Returns true if the output is made of packed bytes.
+      */
+    virtual bool get_packed() const = 0;
+
+    /*!
+      * \brief Returns the bit order of the packed bytes.
+      */
+    virtual endianness_t get_endianness() const = 0;
+
+    /*!
+      * \brief Set the length of the sliding window of the clock phase detector.
+      *
+      * \param window (int) Number of bits of the window, 0 disables the detector.
+      */
+    virtual void set_slip_window(int window) = 0;
+
+    /*!
+      * \brief Set the rate of violations that slips the clock phase.
+      *
+      * \param threshold (float) Fraction of the bits of the window, in (0, 1).
+      * The rate is about 0.5 on random data with a wrong phase.
+      */
+    virtual void set_slip_threshold(float threshold) = 0;
+
+    /*!
+      * \brief Returns the output format.
+      */
+    virtual decision_t get_decision() const = 0;
+
+    /*!
+      * \brief Returns the length of the sliding window of the clock phase detector.
+      */
+    virtual int get_slip_window() const = 0;
+
+    /*!
+      * \brief Returns the rate of violations that slips the clock phase.
+      */
+    virtual float get_slip_threshold() const = 0;
+
+    /*!
+      * \brief Returns the number of clock phase slips since the start.
       */
-    static sptr make();
+    virtual uint64_t get_slips() const = 0;
     };
 
   } // namespace ecss
@@ -33,6 +33,15 @@ namespace gr {
      * \brief Output PMT message on threshold trigger
      * \ingroup ecss
      * \details This block generates a custom PMT output message when a signal reaches a higher or lower threshold
+     *
+     * The input is scanned in chunks of 16 items for the first item crossing the
+     * threshold of the current state, so that the comparisons are vectorized and the
+     * items are checked one by one only in the chunk with the crossing.
+     *
+     * With set_holdoff() each state is kept for at least holdoff items: the crossings
+     * within the hold-off are ignored, and if the input is still beyond the threshold
+     * at its end the state changes on the first item after the hold-off. This
+     * suppresses the bursts of messages of a noisy lock metric around the thresholds.
      */
     class ECSS_API threshold_to_message : virtual public gr::block
     {
@@ -48,6 +57,18 @@ namespace gr {
         * \param init_state Initial state of block (False : Lower | True: Upper)
        */
       static sptr make(float upper_threshold, float lower_threshold, pmt::pmt_t upper_message, pmt::pmt_t lower_message, bool init_state);
+
+      /*!
+       * \brief Set the minimum number of items between two messages.
+       *
+       * \param holdoff (int) Number of items, 0 disables the hold-off.
+       */
+      virtual void set_holdoff(int holdoff) = 0;
+
+      /*!
+       * \brief Returns the minimum number of items between two messages.
+       */
+      virtual int get_holdoff() const = 0;
     };
 
   } // namespace ecss
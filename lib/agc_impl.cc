@@ -24,7 +24,10 @@
 
 #include <gnuradio/io_signature.h>
 #include "agc_impl.h"
+#include <volk/volk.h>
 #include <math.h>
+#include <algorithm>
+#include <stdexcept>
 
 namespace gr {
   namespace ecss {
@@ -35,36 +38,116 @@ namespace gr {
       return gnuradio::get_initial_sptr(new agc_impl<T>(settling_time, reference, initial_gain, maximum_gain, samp_rate));
     }
 
-
-//    agc_impl::~agc_impl()
-//    {}
-
-
-    template <>
-    agc_impl<gr_complex>::agc_impl(float settling_time, float reference, float initial_gain, float maximum_gain, float samp_rate)
+    template <class T>
+    agc_impl<T>::agc_impl(float settling_time, float reference, float initial_gain, float maximum_gain, float samp_rate)
       : gr::sync_block("agc",
-                       gr::io_signature::make(1, 1, sizeof(gr_complex)),
-                       gr::io_signature::make(1, 1, sizeof(gr_complex))),
+                       gr::io_signature::make(1, 1, sizeof(T)),
+                       gr::io_signature::make(1, 1, sizeof(T))),
                        d_settling_time(settling_time),
                        d_reference(reference),
                        d_gain(std::log(initial_gain)),
                        d_samp_rate(samp_rate),
-                       d_maximum_gain(std::log(maximum_gain))
-    {}
+                       d_maximum_gain(std::log(maximum_gain)),
+                       d_mode(AGC_EXACT),
+                       d_block_size(0),
+                       d_magnitude(NULL), d_ramp(NULL)
+    {
+      d_log_reference = std::log(d_reference);
+      set_block_size(64);
+    }
+
+    template <class T>
+    agc_impl<T>::~agc_impl()
+    {
+      volk_free(d_magnitude);
+      volk_free(d_ramp);
+    }
+
+    template <class T>
+    void agc_impl<T>::update_rate()
+    {
+      d_rate = (2950 / (d_samp_rate * d_settling_time)); //settling time expressed in milliseconds
+
+      // the sub-block is short compared to the time constant (1 / rate samples)
+      // of the loop, so that the interpolated gain follows the exact one
+      d_sub_block = std::max(1, std::min(d_block_size, (int)(1.0 / (16.0 * d_rate))));
+      d_decay = std::pow(1.0 - d_rate, d_sub_block);
+
+      // restart the sub-block from the current gain
+      d_count = 0;
+      d_log_sum = 0.0;
+      d_ramp_start = std::exp(d_gain);
+      d_ramp_end = d_ramp_start;
+
+      // the block modes work on whole blocks
+      const bool block_mode = (d_mode == AGC_BLOCK || d_mode == AGC_BLOCK_RAMP);
+      this->set_output_multiple(block_mode ? d_block_size : 1);
+    }
+
+    template <>
+    void agc_impl<gr_complex>::magnitude_squared(const gr_complex *in, int nitems)
+    {
+      volk_32fc_magnitude_squared_32f(d_magnitude, in, nitems);
+    }
+
+    template <>
+    void agc_impl<float>::magnitude_squared(const float *in, int nitems)
+    {
+      volk_32f_x2_multiply_32f(d_magnitude, in, in, nitems);
+    }
 
     template <>
-    int agc_impl<gr_complex>::work(int noutput_items,
-                                   gr_vector_const_void_star &input_items,
-                                   gr_vector_void_star &output_items)
+    void agc_impl<gr_complex>::scale(gr_complex *out, const gr_complex *in, int nitems)
     {
-          gr_complex* in = (gr_complex*)input_items[0];
-          gr_complex* out = (gr_complex*)output_items[0];
+      volk_32fc_32f_multiply_32fc(out, in, d_ramp, nitems);
+    }
 
-          double rate= (2950 / (d_samp_rate * d_settling_time)); //settling time expressed in milliseconds
+    template <>
+    void agc_impl<float>::scale(float *out, const float *in, int nitems)
+    {
+      volk_32f_x2_multiply_32f(out, in, d_ramp, nitems);
+    }
+
+    template <>
+    void agc_impl<gr_complex>::scale(gr_complex *out, const gr_complex *in, float gain, int nitems)
+    {
+      volk_32fc_s32fc_multiply_32fc(out, in, gr_complex(gain, 0), nitems);
+    }
+
+    template <>
+    void agc_impl<float>::scale(float *out, const float *in, float gain, int nitems)
+    {
+      volk_32f_s32f_multiply_32f(out, in, gain, nitems);
+    }
 
+    template <class T>
+    int agc_impl<T>::work(int noutput_items,
+                          gr_vector_const_void_star &input_items,
+                          gr_vector_void_star &output_items)
+    {
+          gr::thread::scoped_lock guard(this->d_setlock);
+
+          const T* in = (const T*)input_items[0];
+          T* out = (T*)output_items[0];
+
+          switch (d_mode)
+          {
+              case AGC_FAST:
+                  return work_fast(noutput_items, in, out);
+              case AGC_BLOCK:
+              case AGC_BLOCK_RAMP:
+                  return work_block(noutput_items, in, out);
+              default:
+                  return work_exact(noutput_items, in, out);
+          }
+    }
+
+    template <>
+    int agc_impl<gr_complex>::work_exact(int noutput_items, const gr_complex *in, gr_complex *out)
+    {
           for(int i = 0; i < noutput_items; i++) {
               out[i]= in[i] * std::exp(d_gain);
-              d_gain += rate * (std::log(d_reference) - std::log (std::sqrt(out[i].real()*out[i].real() + out[i].imag()*out[i].imag())));
+              d_gain += d_rate * (d_log_reference - std::log (std::sqrt(out[i].real()*out[i].real() + out[i].imag()*out[i].imag())));
 
               if (d_gain > d_maximum_gain){
                   d_gain = d_maximum_gain;
@@ -77,32 +160,12 @@ namespace gr {
           return noutput_items;
     }
 
-
-    template <>
-    agc_impl<float>::agc_impl(float settling_time, float reference, float initial_gain, float maximum_gain, float samp_rate)
-      : gr::sync_block("agc",
-                        gr::io_signature::make(1, 1, sizeof(float)),
-                        gr::io_signature::make(1, 1, sizeof(float))),
-                        d_settling_time(settling_time),
-                        d_reference(reference),
-                        d_gain(std::log(initial_gain)),
-                        d_samp_rate(samp_rate),
-                        d_maximum_gain(std::log(maximum_gain))
-    {}
-
     template <>
-    int agc_impl<float>::work(int noutput_items,
-                              gr_vector_const_void_star &input_items,
-                              gr_vector_void_star &output_items)
+    int agc_impl<float>::work_exact(int noutput_items, const float *in, float *out)
     {
-          float* in = (float*)input_items[0];
-          float* out = (float*)output_items[0];
-
-          double rate= (2950 / (d_samp_rate * d_settling_time)); //settling time expressed in milliseconds
-
           for(int i = 0; i < noutput_items; i++) {
               out[i]= in[i] * std::exp(d_gain);
-              d_gain += rate * (std::log(d_reference) - std::log(fabsf(out[i])));
+              d_gain += d_rate * (d_log_reference - std::log(fabsf(out[i])));
 
               if (d_gain > d_maximum_gain){
                   d_gain = d_maximum_gain;
@@ -115,6 +178,92 @@ namespace gr {
           return noutput_items;
     }
 
+    template <class T>
+    int agc_impl<T>::work_fast(int noutput_items, const T *in, T *out)
+    {
+          int i = 0;
+          while (i < noutput_items)
+          {
+              const int nitems = std::min(d_sub_block - d_count, noutput_items - i);
+
+              // linear gain interpolated along the sub-block
+              const float step = (d_ramp_end - d_ramp_start) / d_sub_block;
+              for (int j = 0; j < nitems; j++) {
+                  d_ramp[j] = d_ramp_start + step * (d_count + j + 1);
+              }
+              scale(&out[i], &in[i], nitems);
+
+              float sum;
+              magnitude_squared(&in[i], nitems);
+              volk_32f_log2_32f(d_magnitude, d_magnitude, nitems);
+              volk_32f_accumulator_s32f(&sum, d_magnitude, nitems);
+              d_log_sum += sum;
+
+              d_count += nitems;
+              i += nitems;
+
+              if (d_count == d_sub_block) {
+                  // closed form of the per sample loop along the sub-block, the input
+                  // level is the mean of log|x| (log2(|x|^2) / 2 * ln(2))
+                  const double log_input = d_log_sum / d_sub_block * (0.5 * M_LN2);
+                  d_gain = d_decay * d_gain + (1.0 - d_decay) * (d_log_reference - log_input);
+
+                  if (d_gain > d_maximum_gain){
+                      d_gain = d_maximum_gain;
+                  }
+                  if (d_gain < -d_maximum_gain){
+                      d_gain = -d_maximum_gain;
+                  }
+
+                  d_ramp_start = d_ramp_end;
+                  d_ramp_end = std::exp(d_gain);
+                  d_count = 0;
+                  d_log_sum = 0.0;
+              }
+          }
+
+          return noutput_items;
+    }
+
+    template <class T>
+    int agc_impl<T>::work_block(int noutput_items, const T *in, T *out)
+    {
+          // noutput_items is a multiple of the block size
+          for (int i = 0; i + d_block_size <= noutput_items; i += d_block_size)
+          {
+              // lookahead power estimation on the block to be scaled
+              float sum;
+              magnitude_squared(&in[i], d_block_size);
+              volk_32f_accumulator_s32f(&sum, d_magnitude, d_block_size);
+
+              d_gain = d_log_reference - 0.5 * std::log(sum / d_block_size);
+              if (d_gain > d_maximum_gain){
+                  d_gain = d_maximum_gain;
+              }
+              if (d_gain < -d_maximum_gain){
+                  d_gain = -d_maximum_gain;
+              }
+
+              d_ramp_start = d_ramp_end;
+              d_ramp_end = std::exp(d_gain);
+
+              if (d_mode == AGC_BLOCK_RAMP)
+              {
+                  const float step = (d_ramp_end - d_ramp_start) / d_block_size;
+                  for (int j = 0; j < d_block_size; j++) {
+                      d_ramp[j] = d_ramp_start + step * (j + 1);
+                  }
+                  scale(&out[i], &in[i], d_block_size);
+              }
+              else
+              {
+                  scale(&out[i], &in[i], d_ramp_end, d_block_size);
+              }
+          }
+
+          return noutput_items - (noutput_items % d_block_size);
+    }
+
     template <class T>
     float agc_impl<T>::get_settling_time() const      { return d_settling_time; }
 
@@ -125,14 +274,49 @@ namespace gr {
     float agc_impl<T>::get_maximum_gain() const      { return std::exp(d_maximum_gain);  }
 
     template <class T>
-    void agc_impl<T>::set_settling_time(float settling_time) { d_settling_time = settling_time; }
+    agc_mode_t agc_impl<T>::get_mode() const      { return d_mode; }
 
     template <class T>
-    void agc_impl<T>::set_reference(float reference) { d_reference = reference; }
+    int agc_impl<T>::get_block_size() const      { return d_block_size; }
+
+    template <class T>
+    void agc_impl<T>::set_settling_time(float settling_time)
+    {
+      gr::thread::scoped_lock guard(this->d_setlock);
+      d_settling_time = settling_time;
+      update_rate();
+    }
+
+    template <class T>
+    void agc_impl<T>::set_reference(float reference) { d_reference = reference; d_log_reference = std::log(d_reference); }
 
     template <class T>
     void agc_impl<T>::set_maximum_gain(float maximum_gain) { d_maximum_gain = std::log(maximum_gain); }
 
+    template <class T>
+    void agc_impl<T>::set_mode(agc_mode_t mode)
+    {
+      gr::thread::scoped_lock guard(this->d_setlock);
+      d_mode = mode;
+      update_rate();
+    }
+
+    template <class T>
+    void agc_impl<T>::set_block_size(int block_size)
+    {
+      if (block_size < 1) {
+        throw std::out_of_range("agc: invalid block size. Must be at least 1.");
+      }
+      gr::thread::scoped_lock guard(this->d_setlock);
+      d_block_size = block_size;
+
+      volk_free(d_magnitude);
+      volk_free(d_ramp);
+      d_magnitude = (float *)volk_malloc(d_block_size * sizeof(float), volk_get_alignment());
+      d_ramp = (float *)volk_malloc(d_block_size * sizeof(float), volk_get_alignment());
+      update_rate();
+    }
+
     template class agc<gr_complex>;
     template class agc<float>;
 
@@ -35,10 +35,33 @@
         float d_gain;		// current gain
         float d_maximum_gain;
         float d_samp_rate;
+        agc_mode_t d_mode;
+        int d_block_size;
+
+        double d_rate;          // loop gain for each sample
+        float d_log_reference;
+
+        // fast mode
+        int d_sub_block;        // actual size of the sub-blocks
+        double d_decay;         // decay of the log gain along a sub-block
+        int d_count;            // samples of the current sub-block already processed
+        double d_log_sum;       // sum of log2(|x|^2) of the current sub-block
+        float d_ramp_start;     // linear gain at the start of the current sub-block
+        float d_ramp_end;       // linear gain at the end of the current sub-block
+        float *d_magnitude;     // |x|^2 of the current (sub-)block
+        float *d_ramp;
+
+        void update_rate();
+        void magnitude_squared(const T *in, int nitems);
+        void scale(T *out, const T *in, int nitems);
+        void scale(T *out, const T *in, float gain, int nitems);
+        int work_exact(int noutput_items, const T *in, T *out);
+        int work_fast(int noutput_items, const T *in, T *out);
+        int work_block(int noutput_items, const T *in, T *out);
 
       public:
        agc_impl(float settling_time, float reference, float initial_gain, float maximum_gain, float samp_rate);
-//       ~agc_impl();
+       ~agc_impl();
 
        int work(int noutput_items,
           gr_vector_const_void_star &input_items,
@@ -47,9 +70,13 @@
        float get_settling_time() const;
        float get_reference() const;
        float get_maximum_gain() const;
+       agc_mode_t get_mode() const;
+       int get_block_size() const;
        void set_settling_time(float settling_time);
        void set_reference(float reference);
        void set_maximum_gain(float maximum_gain);
+       void set_mode(agc_mode_t mode);
+       void set_block_size(int block_size);
      };
    } // namespace ecss
  } // namespace gr
@@ -52,9 +52,10 @@ namespace gr {
       : gr::sync_block("coherent_phase_modulator",
               gr::io_signature::make (1, 1,  sizeof(int64_t)),
               gr::io_signature::make(1, 1, sizeof(gr_complex))),
-              d_N(N)
+              d_N(N), d_fast(false), d_interpolation(true), d_nco(12)
     {
       precision = pow(2,(- (N - 1)));
+      d_phase_mask = ~(uint64_t)0 << (64 - N);
     }
 
     coherent_phase_modulator_impl::~coherent_phase_modulator_impl()
@@ -65,12 +66,27 @@ namespace gr {
         gr_vector_const_void_star &input_items,
         gr_vector_void_star &output_items)
     {
+      gr::thread::scoped_lock guard(d_setlock);
+
       const int64_t *input = (int64_t*)input_items[0];
       gr_complex *out = (gr_complex *) output_items[0];
 
       double integer_phase_normalized;
       double oi, oq;
-    
+
+      if (d_fast)
+      {
+        if (d_interpolation)
+        {
+          d_nco.expj(out, input, d_phase_mask, noutput_items);
+        }
+        else
+        {
+          d_nco.expj_nearest(out, input, d_phase_mask, noutput_items);
+        }
+        return noutput_items;
+      }
+
       for(int i = 0; i < noutput_items; i++) 
       {
         integer_phase_normalized = NCO_denormalization(input[i]);
@@ -90,5 +106,52 @@ namespace gr {
       return temp_denormalization * M_PI;
     }
 
+    /*******************************************************************
+     * SET FUNCTIONS
+     *******************************************************************/
+
+    void
+    coherent_phase_modulator_impl::set_fast(bool fast)
+    {
+      gr::thread::scoped_lock guard(d_setlock);
+      d_fast = fast;
+    }
+
+    void
+    coherent_phase_modulator_impl::set_table_bits(int bits)
+    {
+      gr::thread::scoped_lock guard(d_setlock);
+      d_nco.set_bits(bits);
+    }
+
+    void
+    coherent_phase_modulator_impl::set_interpolation(bool interpolation)
+    {
+      gr::thread::scoped_lock guard(d_setlock);
+      d_interpolation = interpolation;
+    }
+
+    /*******************************************************************
+     * GET FUNCTIONS
+     *******************************************************************/
+
+    bool
+    coherent_phase_modulator_impl::get_fast() const
+    {
+      return d_fast;
+    }
+
+    int
+    coherent_phase_modulator_impl::get_table_bits() const
+    {
+      return d_nco.bits();
+    }
+
+    bool
+    coherent_phase_modulator_impl::get_interpolation() const
+    {
+      return d_interpolation;
+    }
+
   } /* namespace ecss */
 } /* namespace gr */
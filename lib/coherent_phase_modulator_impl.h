@@ -27,6 +27,8 @@
 
 #include <pmt/pmt.h>
 
+#include "fast_math.h"
+
 namespace gr {
   namespace ecss {
 
@@ -35,6 +37,10 @@ namespace gr {
      private:
       int d_N;
       double precision;
+      bool d_fast;
+      bool d_interpolation;
+      uint64_t d_phase_mask;                              /*!< Keeps the N most significant bits of the phase */
+      nco_lut d_nco;
 
       /*! \brief Integer phase converter
       *
@@ -50,6 +56,13 @@ namespace gr {
          gr_vector_const_void_star &input_items,
          gr_vector_void_star &output_items);
 
+      void set_fast(bool fast);
+      void set_table_bits(int bits);
+      void set_interpolation(bool interpolation);
+      bool get_fast() const;
+      int get_table_bits() const;
+      bool get_interpolation() const;
+
     };
 
   } // namespace ecss
@@ -0,0 +1,396 @@
+/* -*- c++ -*- */
+/*
+ * Copyright 2018 Antonio Miraglia - ISISpace.
+ *
+ * This is free software; you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation; either version 3, or (at your option)
+ * any later version.
+ *
+ * This software is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this software; see the file COPYING.  If not, write to
+ * the Free Software Foundation, Inc., 51 Franklin Street,
+ * Boston, MA 02110-1301, USA.
+ */
+
+#ifdef HAVE_CONFIG_H
+#include "config.h"
+#endif
+
+#include <gnuradio/io_signature.h>
+#include <gnuradio/expj.h>
+#include <gnuradio/sincos.h>
+#include <math.h>
+#include <stdexcept>
+#include "coherent_transponder_impl.h"
+#include <vector>
+#include <algorithm>
+
+
+namespace gr {
+  namespace ecss {
+
+    #ifndef M_TWOPI
+    #define M_TWOPI (2.0*M_PI)
+    #endif
+
+    coherent_transponder::sptr
+    coherent_transponder::make(int samp_rate, int N, const std::vector<double> &coefficients, float freq_central, float bw, int uplink, int downlink)
+    {
+      return gnuradio::get_initial_sptr(new coherent_transponder_impl(samp_rate, N, coefficients, freq_central, bw, uplink, downlink));
+    }
+
+    static int ios_in[] = {sizeof(gr_complex), sizeof(int64_t)};
+    static std::vector<int> iosig_in(ios_in, ios_in+sizeof(ios_in)/sizeof(int));
+    coherent_transponder_impl::coherent_transponder_impl(int samp_rate, int N, const std::vector<double> &coefficients, float freq_central, float bw, int uplink, int downlink)
+        : gr::sync_block("coherent_transponder",
+                         gr::io_signature::makev(1, 2, iosig_in),
+                         gr::io_signature::make(1, 2, sizeof(gr_complex))),
+          d_N(N), d_samp_rate(samp_rate), d_bw(bw),
+          d_freq_central(freq_central), d_coefficients(3, 0.0),
+          d_fast(false), d_nco(12),
+          d_uplink(uplink), d_downlink(downlink), first(false),
+          d_gain_phase(0), d_gain_phase_accumulator(0),
+          d_exact(false), d_remainder(0)
+    {
+      if(N < 1 || N > 52) {
+        throw std::out_of_range ("coherent transponder: invalid number of bits. Must be in [1, 52].");
+      }
+      if(uplink == 0) {
+        throw std::out_of_range ("coherent transponder: invalid uplink constant. Must not be zero.");
+      }
+      precision = pow(2,(- (N - 1)));
+      d_phase_mask = ~(uint64_t)0 << (64 - N);
+      d_divider.set_divisor(uplink);
+
+      stop = false;
+      set_tag_propagation_policy(TPP_DONT);
+      set_coefficients(coefficients);
+      reset();
+    }
+
+    coherent_transponder_impl::~coherent_transponder_impl()
+    {}
+
+    int
+    coherent_transponder_impl::work (int noutput_items,
+                                     gr_vector_const_void_star &input_items,
+                                     gr_vector_void_star &output_items)
+    {
+      gr::thread::scoped_lock guard(d_setlock);
+
+      const gr_complex *input = (const gr_complex *)input_items[0];
+      const int64_t *phase_input = input_items.size() >= 2 ? (const int64_t *)input_items[1] : NULL;
+      gr_complex *output = (gr_complex *)output_items[0];
+      gr_complex *pll_output = output_items.size() >= 2 ? (gr_complex *)output_items[1] : NULL;
+
+      // fetch all the control tags of this window once, then run the
+      // transponder on the tag-free chunks between them
+      const uint64_t nread = nitems_read(0);
+      get_tags_in_range(d_tags, 0, nread, nread + noutput_items, symbols::key_pll);
+      std::stable_sort(d_tags.begin(), d_tags.end(), tag_t::offset_compare);
+
+      int i = 0;
+      size_t t = 0;
+      while (i < noutput_items)
+      {
+        while (t < d_tags.size() && (d_tags[t].offset - nread) == (uint64_t)i)
+        {
+          handle_tag(d_tags[t]);
+          t++;
+        }
+
+        int next = (t < d_tags.size()) ? (int)(d_tags[t].offset - nread) : noutput_items;
+
+        track(&input[i],
+              phase_input != NULL ? &phase_input[i] : NULL,
+              &output[i],
+              pll_output != NULL ? &pll_output[i] : NULL,
+              next - i);
+        i = next;
+      }
+      return noutput_items;
+    }
+
+    void
+    coherent_transponder_impl::handle_tag(const tag_t &tag)
+    {
+      if (pmt::eq(tag.value, symbols::value_reset))
+      {
+        reset();
+      }
+      else if (pmt::eq(tag.value, symbols::value_stop))
+      {
+        stop = true;
+        reset();
+      }
+      else if (pmt::eq(tag.value, symbols::value_start))
+      {
+        stop = false;
+        reset();
+      }
+      else if (pmt::eq(tag.value, symbols::value_start_1e3))
+      {
+        stop = false;
+      }
+      else if (pmt::is_pair(tag.value) && pmt::eq(pmt::car(tag.value), symbols::key_freq))
+      {
+        set_frequency(pmt::to_double(pmt::cdr(tag.value)));
+      }
+    }
+
+    void
+    coherent_transponder_impl::track(const gr_complex *input, const int64_t *phase_input, gr_complex *output,
+                                     gr_complex *pll_output, int nitems)
+    {
+      double error;
+      double filter_out;
+      gr_complex mixer;
+      double oi, oq;
+
+      const double central_step = d_freq_central / d_samp_rate * M_TWOPI;
+      const int shift = 64 - d_N;
+
+      // the gain phase accumulator starts from the first phase of the PLL
+      if (!first && nitems > 0)
+      {
+        d_gain_phase = d_integer_phase;
+        first = true;
+      }
+
+      for (int i = 0; i < nitems; i++)
+      {
+        // PLL: phase (port 3), mixer and phase detector
+        const int64_t pll_phase = d_integer_phase;
+        if (d_fast)
+        {
+          mixer = input[i] * std::conj(d_nco.expj(d_integer_phase & d_phase_mask));
+          error = fast_atan2(mixer.imag(), mixer.real());
+        }
+        else
+        {
+          mixer = input[i] * gr_expj(-d_integer_phase_denormalized);
+          error = atan2(mixer.imag(), mixer.real());
+        }
+        if (pll_output != NULL)
+        {
+          pll_output[i] = mixer;
+        }
+
+        // PLL: loop filter and integer accumulator, a stopped PLL remains
+        // fixed on the central frequency
+        if (stop)
+        {
+          d_integer_phase = 0;
+          filter_out = 0.0;
+        }
+        else
+        {
+          filter_out = advance_loop(error);
+        }
+        d_integer_phase += ((int64_t)round(((filter_out + central_step) / M_PI) / precision) << shift);
+        d_integer_phase_denormalized = denormalization(d_integer_phase);
+
+        // gain phase accumulator
+        int64_t phase = d_gain_phase;
+        if (d_exact)
+        {
+          d_gain_phase += d_divider.multiply_divide(pll_phase - d_gain_phase_accumulator, d_downlink, d_remainder);
+        }
+        else
+        {
+          d_gain_phase += d_divider.divide(pll_phase - d_gain_phase_accumulator) * d_downlink;
+        }
+        d_gain_phase_accumulator = pll_phase;
+
+        // coherent phase modulator
+        if (phase_input != NULL)
+        {
+          phase = (int64_t)((uint64_t)phase + (uint64_t)phase_input[i]);
+        }
+        if (d_fast)
+        {
+          output[i] = d_nco.expj(phase & d_phase_mask);
+        }
+        else
+        {
+          gr::sincos(denormalization(phase), &oq, &oi);
+          output[i] = gr_complex((float) oi, (float) oq);
+        }
+      }
+    }
+
+    void
+    coherent_transponder_impl::reset()
+    {
+      integrator_order_1 = 0;
+      integrator_order_2_1 = 0;
+      integrator_order_2_2 = 0;
+
+      d_integer_phase_denormalized = 0;
+      d_integer_phase = 0;
+    }
+
+    double
+    coherent_transponder_impl::advance_loop(double error)
+    {
+      const double limit = (d_bw / d_samp_rate * M_TWOPI)/2;
+
+      //2nd order
+      integrator_order_1 += d_coefficients[1] * error;
+
+      // only clip the frequency integrator if a not-null bandwidth hs been set
+      if(d_bw != 0)
+      {
+        integrator_order_1 = std::min(std::max(integrator_order_1, -limit), limit);
+      }
+
+      //3rd order
+      integrator_order_2_1 += d_coefficients[2] * error;
+      integrator_order_2_2 += integrator_order_2_1;
+
+      return d_coefficients[0] * error +		// order 1
+             integrator_order_1 +			// order 2
+             integrator_order_2_2;			// order 3
+    }
+
+    double
+    coherent_transponder_impl::denormalization(int64_t integer_phase)
+    {
+      int64_t temp_integer_phase = (integer_phase >> (64 - d_N));
+      double temp_denormalization = (double)(temp_integer_phase * precision);
+      return temp_denormalization * M_PI;
+    }
+
+    /*******************************************************************
+     * SET FUNCTIONS
+     *******************************************************************/
+
+    void
+    coherent_transponder_impl::set_coefficients(const std::vector<double> &coefficients)
+    {
+      if (coefficients.size() < 3)
+      {
+        // reset the third order integrator in case this is a second order filter
+        integrator_order_2_1 = 0;
+        integrator_order_2_2 = 0;
+      }
+      std::fill(d_coefficients.begin(), d_coefficients.end(), 0.0);
+      for(size_t i = 0; i < std::min(coefficients.size(), d_coefficients.size()); i++)
+      {
+        d_coefficients[i] = coefficients[i];
+      }
+    }
+
+    void
+    coherent_transponder_impl::set_frequency(float freq)
+    {
+      integrator_order_1 = (freq - d_freq_central) / d_samp_rate * M_TWOPI;
+    }
+
+    void
+    coherent_transponder_impl::set_freq_central(float freq)
+    {
+      d_freq_central = freq;
+    }
+
+    void
+    coherent_transponder_impl::set_bw(float bw)
+    {
+      d_bw = bw;
+    }
+
+    void
+    coherent_transponder_impl::set_uplink(int uplink)
+    {
+      if(uplink == 0) {
+        throw std::out_of_range ("coherent transponder: invalid uplink constant. Must not be zero.");
+      }
+      gr::thread::scoped_lock guard(d_setlock);
+      d_uplink = uplink;
+      d_divider.set_divisor(uplink);
+      d_remainder = 0;
+    }
+
+    void
+    coherent_transponder_impl::set_downlink(int downlink)
+    {
+      gr::thread::scoped_lock guard(d_setlock);
+      d_downlink = downlink;
+      d_remainder = 0;
+    }
+
+    void
+    coherent_transponder_impl::set_exact(bool exact)
+    {
+      gr::thread::scoped_lock guard(d_setlock);
+      d_exact = exact;
+      d_remainder = 0;
+    }
+
+    void
+    coherent_transponder_impl::set_fast(bool fast)
+    {
+      gr::thread::scoped_lock guard(d_setlock);
+      d_fast = fast;
+    }
+
+    /*******************************************************************
+     * GET FUNCTIONS
+     *******************************************************************/
+
+    std::vector<double>
+    coherent_transponder_impl::get_coefficients() const
+    {
+      return d_coefficients;
+    }
+
+    float
+    coherent_transponder_impl::get_frequency() const
+    {
+      return d_freq_central + (integrator_order_1 * d_samp_rate / M_TWOPI);
+    }
+
+    float
+    coherent_transponder_impl::get_freq_central() const
+    {
+      return d_freq_central;
+    }
+
+    float
+    coherent_transponder_impl::get_bw() const
+    {
+      return d_bw;
+    }
+
+    int
+    coherent_transponder_impl::get_uplink() const
+    {
+      return d_uplink;
+    }
+
+    int
+    coherent_transponder_impl::get_downlink() const
+    {
+      return d_downlink;
+    }
+
+    bool
+    coherent_transponder_impl::get_exact() const
+    {
+      return d_exact;
+    }
+
+    bool
+    coherent_transponder_impl::get_fast() const
+    {
+      return d_fast;
+    }
+
+  } /* namespace ecss */
+} /* namespace gr */
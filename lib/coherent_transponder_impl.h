@@ -0,0 +1,106 @@
+/* -*- c++ -*- */
+/*
+ * Copyright 2018 Antonio Miraglia - ISISpace.
+ *
+ * This is free software; you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation; either version 3, or (at your option)
+ * any later version.
+ *
+ * This software is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this software; see the file COPYING.  If not, write to
+ * the Free Software Foundation, Inc., 51 Franklin Street,
+ * Boston, MA 02110-1301, USA.
+ */
+
+#ifndef INCLUDED_ECSS_COHERENT_TRANSPONDER_IMPL_H
+#define INCLUDED_ECSS_COHERENT_TRANSPONDER_IMPL_H
+
+#include <ecss/coherent_transponder.h>
+#include <pmt/pmt.h>
+#include "fast_math.h"
+#include "pmt_symbols.h"
+#include <vector>
+
+namespace gr {
+  namespace ecss {
+
+    class coherent_transponder_impl : public coherent_transponder
+    {
+      int d_N;
+      int d_samp_rate;
+      float d_bw;
+      double precision;
+      double d_freq_central;
+      std::vector<double> d_coefficients;
+      bool d_fast;
+      uint64_t d_phase_mask;                              /*!< Keeps the N most significant bits of the phase */
+      nco_lut d_nco;
+      std::vector<tag_t> d_tags;
+
+      // PLL
+      bool stop;
+      int64_t d_integer_phase;
+      double d_integer_phase_denormalized;
+      double integrator_order_1, integrator_order_2_1, integrator_order_2_2;
+
+      // gain phase accumulator
+      int d_uplink;
+      int d_downlink;
+      bool first;
+      int64_t d_gain_phase;
+      int64_t d_gain_phase_accumulator;
+      int_divider d_divider;                              /*!< Reciprocal of the uplink constant */
+      bool d_exact;
+      int64_t d_remainder;                                /*!< Remainder of the division, exact mode */
+
+      void reset();                                       /*! Reset the registers of the PLL */
+      void handle_tag(const tag_t &tag);
+      double advance_loop(double error);
+      double denormalization(int64_t integer_phase);
+
+      /*! \brief Run the transponder on a tag-free chunk of samples
+      *
+      * \details
+      * For each sample, the PLL runs one step, its integer phase is scaled by the
+      * turn around ratio (with the arithmetic of the ecss gain phase accumulator),
+      * the optional phase is added and the downlink phasor is generated.
+      */
+      void track(const gr_complex *input, const int64_t *phase_input, gr_complex *output,
+                 gr_complex *pll_output, int nitems);
+
+      public:
+        coherent_transponder_impl(int samp_rate, int N, const std::vector<double> &coefficients, float freq_central, float bw, int uplink, int downlink);
+        ~coherent_transponder_impl();
+
+        int work(int noutput_items,
+                 gr_vector_const_void_star &input_items,
+                 gr_vector_void_star &output_items);
+
+        void set_coefficients(const std::vector<double> &coefficients);
+        void set_frequency(float freq);
+        void set_freq_central(float freq);
+        void set_bw(float bw);
+        void set_uplink(int uplink);
+        void set_downlink(int downlink);
+        void set_exact(bool exact);
+        void set_fast(bool fast);
+        std::vector<double> get_coefficients() const;
+        float get_frequency() const;
+        float get_freq_central() const;
+        float get_bw() const;
+        int get_uplink() const;
+        int get_downlink() const;
+        bool get_exact() const;
+        bool get_fast() const;
+      };
+
+  } // namespace ecss
+} // namespace gr
+
+#endif /* INCLUDED_ECSS_COHERENT_TRANSPONDER_IMPL_H */
@@ -0,0 +1,119 @@
+/* -*- c++ -*- */
+/*
+ * Copyright 2018 Antonio Miraglia - ISISpace.
+ *
+ * This is free software; you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation; either version 3, or (at your option)
+ * any later version.
+ *
+ * This software is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this software; see the file COPYING.  If not, write to
+ * the Free Software Foundation, Inc., 51 Franklin Street,
+ * Boston, MA 02110-1301, USA.
+ */
+
+#ifdef HAVE_CONFIG_H
+#include "config.h"
+#endif
+
+#include "fast_math.h"
+#include <stdexcept>
+
+namespace gr {
+  namespace ecss {
+
+    #ifndef M_TWOPI
+    #define M_TWOPI (2.0*M_PI)
+    #endif
+
+    nco_lut::nco_lut(int bits)
+    {
+      set_bits(bits);
+    }
+
+    void
+    nco_lut::set_bits(int bits)
+    {
+      if (bits < 2 || bits > 24)
+      {
+        throw std::out_of_range("nco lut: invalid table size. The number of bits must be in [2, 24].");
+      }
+      d_bits = bits;
+
+      // one more entry to interpolate the last segment without wrapping the index
+      const size_t size = ((size_t)1 << bits);
+      d_table.resize(size + 1);
+      for (size_t i = 0; i <= size; i++)
+      {
+        double phase = M_TWOPI * i / size;
+        d_table[i] = gr_complex((float)cos(phase), (float)sin(phase));
+      }
+    }
+
+    void
+    nco_lut::expj(gr_complex *out, const int64_t *phase, uint64_t mask, int nitems) const
+    {
+      for (int i = 0; i < nitems; i++)
+      {
+        out[i] = expj(phase[i] & mask);
+      }
+    }
+
+    void
+    nco_lut::expj_nearest(gr_complex *out, const int64_t *phase, uint64_t mask, int nitems) const
+    {
+      for (int i = 0; i < nitems; i++)
+      {
+        out[i] = expj_nearest(phase[i] & mask);
+      }
+    }
+
+    int64_t
+    nco_lut::sine(float *out, int64_t phase, int64_t step, int nitems) const
+    {
+      // the phase wraps as an unsigned word
+      uint64_t word = (uint64_t)phase;
+      for (int i = 0; i < nitems; i++)
+      {
+        const uint64_t index = word >> (64 - d_bits);
+        const float frac = (float)((word << d_bits) >> 40) * (1.0f / 16777216.0f);
+        const float a = d_table[index].imag();
+        out[i] = a + (d_table[index + 1].imag() - a) * frac;
+        word += (uint64_t)step;
+      }
+      return (int64_t)word;
+    }
+
+    int_divider::int_divider(int divisor)
+    {
+      set_divisor(divisor);
+    }
+
+    void
+    int_divider::set_divisor(int divisor)
+    {
+      if (divisor == 0)
+      {
+        throw std::out_of_range("int divider: the divisor must not be zero.");
+      }
+      d_divisor = divisor;
+      d_sign = divisor < 0 ? ~(uint64_t)0 : 0;
+      const uint64_t d = divisor < 0 ? 0 - (uint64_t)(int64_t)divisor : (uint64_t)divisor;
+
+      // shift = ceil(log2(d)), magic = floor(2^(64 + shift) / d) + 1 - 2^64
+      d_shift = 0;
+      while (((uint64_t)1 << d_shift) < d)
+      {
+        d_shift++;
+      }
+      d_magic = (uint64_t)((((unsigned __int128)1) << (64 + d_shift)) / d + 1);
+    }
+
+  } /* namespace ecss */
+} /* namespace gr */
@@ -24,6 +24,9 @@
 
 #include <gnuradio/io_signature.h>
 #include "gain_phase_accumulator_impl.h"
+#include <stdexcept>
+#include <algorithm>
+#include <limits>
 
 namespace gr {
   namespace ecss {
@@ -39,11 +42,16 @@ namespace gr {
       : gr::sync_block("gain_phase_accumulator",
               gr::io_signature::make(1, 1, sizeof (int64_t)),
               gr::io_signature::make(1, 1, sizeof (int64_t))),
-              d_uplink(uplink), d_downlink(downlink), d_reset(reset)
+              d_uplink(uplink), d_downlink(downlink), d_reset(reset),
+              d_exact(false), d_remainder(0)
     {
       first = false;
       d_integer_phase = 0;
       d_integer_phase_accumulator = 0;
+      set_uplink(uplink);
+
+      message_port_register_in(symbols::port_ratio);
+      set_msg_handler(symbols::port_ratio, [this](pmt::pmt_t msg) { this->handle_ratio(msg); });
     }
 
     gain_phase_accumulator_impl::~gain_phase_accumulator_impl()
@@ -54,38 +62,139 @@ namespace gr {
         gr_vector_const_void_star &input_items,
         gr_vector_void_star &output_items)
     {
+      gr::thread::scoped_lock guard(d_setlock);
+
       const int64_t *in = (const int64_t *) input_items[0];
       int64_t *out = (int64_t *) output_items[0];
 
-      int64_t gain_integer_phase;      
+      if (d_reset == true)
+      {
+        first = false;
+        d_integer_phase = 0;
+        d_remainder = 0;
+        std::fill(out, out + noutput_items, 0);
+        d_integer_phase_accumulator = in[noutput_items - 1];
+        return noutput_items;
+      }
 
-      for (int i = 0; i < noutput_items; i++){
-        if (d_reset == false) {
+      if (first == false)
+      {
+        d_integer_phase = in[0];
+        first = true;
+      }
 
-          if (first == false)
-          {
-            d_integer_phase = in[i];
-            first = true;
-          }
-          
-          out[i] = d_integer_phase;
-          d_integer_phase_step = in[i] - d_integer_phase_accumulator;
+      // the state is kept in registers for the whole buffer, the sums wrap as the
+      // int64 arithmetic of the phase words
+      uint64_t integer_phase = (uint64_t)d_integer_phase;
+      int64_t integer_phase_accumulator = d_integer_phase_accumulator;
+      const uint64_t downlink = (uint64_t)(int64_t)d_downlink;
 
-          gain_integer_phase = d_integer_phase_step / d_uplink;
-          gain_integer_phase = gain_integer_phase * d_downlink;
-          d_integer_phase += gain_integer_phase;
+      if (d_exact)
+      {
+        // the remainder of each division is added to the next step
+        int64_t remainder = d_remainder;
+        for (int i = 0; i < noutput_items; i++)
+        {
+          out[i] = (int64_t)integer_phase;
+          int64_t integer_phase_step = (int64_t)((uint64_t)in[i] - (uint64_t)integer_phase_accumulator);
+          integer_phase += (uint64_t)d_divider.multiply_divide(integer_phase_step, d_downlink, remainder);
+          integer_phase_accumulator = in[i];
         }
-        else
+        d_remainder = remainder;
+      }
+      else
+      {
+        for (int i = 0; i < noutput_items; i++)
         {
-          first = false;
-          d_integer_phase = 0;
-          out[i] = d_integer_phase;
+          out[i] = (int64_t)integer_phase;
+          int64_t integer_phase_step = (int64_t)((uint64_t)in[i] - (uint64_t)integer_phase_accumulator);
+          integer_phase += (uint64_t)d_divider.divide(integer_phase_step) * downlink;
+          integer_phase_accumulator = in[i];
         }
-        
-        d_integer_phase_accumulator = in[i];
       }
+
+      d_integer_phase = (int64_t)integer_phase;
+      d_integer_phase_accumulator = integer_phase_accumulator;
       return noutput_items;
     }
+
+    void
+    gain_phase_accumulator_impl::set_uplink(int uplink)
+    {
+      if(uplink == 0) {
+        throw std::out_of_range ("gain phase accumulator: invalid uplink constant. Must not be zero.");
+      }
+      gr::thread::scoped_lock guard(d_setlock);
+      d_uplink = uplink;
+      d_divider.set_divisor(uplink);
+      d_remainder = 0;
+    }
+
+    void
+    gain_phase_accumulator_impl::set_downlink(int downlink)
+    {
+      gr::thread::scoped_lock guard(d_setlock);
+      d_downlink = downlink;
+      d_remainder = 0;
+    }
+
+    void
+    gain_phase_accumulator_impl::set_ratio(int uplink, int downlink)
+    {
+      if(uplink == 0) {
+        throw std::out_of_range ("gain phase accumulator: invalid uplink constant. Must not be zero.");
+      }
+      // both constants change together for work()
+      gr::thread::scoped_lock guard(d_setlock);
+      d_uplink = uplink;
+      d_divider.set_divisor(uplink);
+      d_downlink = downlink;
+      d_remainder = 0;
+    }
+
+    void
+    gain_phase_accumulator_impl::set_exact(bool exact)
+    {
+      gr::thread::scoped_lock guard(d_setlock);
+      d_exact = exact;
+      d_remainder = 0;
+    }
+
+    void
+    gain_phase_accumulator_impl::handle_ratio(pmt::pmt_t msg)
+    {
+      // a dictionary is a list of pairs too, so the pair of integers is checked first
+      pmt::pmt_t uplink, downlink;
+      if (pmt::is_pair(msg) && pmt::is_integer(pmt::car(msg)))
+      {
+        uplink = pmt::car(msg);
+        downlink = pmt::cdr(msg);
+      }
+      else if (pmt::is_dict(msg))
+      {
+        uplink = pmt::dict_ref(msg, symbols::key_uplink, pmt::PMT_NIL);
+        downlink = pmt::dict_ref(msg, symbols::key_downlink, pmt::PMT_NIL);
+      }
+      else
+      {
+        return;
+      }
+
+      if (!pmt::is_integer(uplink) || !pmt::is_integer(downlink))
+      {
+        return;
+      }
+
+      // the values are narrowed to int, reject them before they can wrap around
+      const long uplink_value = pmt::to_long(uplink);
+      const long downlink_value = pmt::to_long(downlink);
+      if (uplink_value < 1 || uplink_value > std::numeric_limits<int>::max() ||
+          downlink_value < 1 || downlink_value > std::numeric_limits<int>::max())
+      {
+        return;
+      }
+      set_ratio((int)uplink_value, (int)downlink_value);
+    }
   } /* namespace ecss */
 } /* namespace gr */
 
@@ -22,6 +22,9 @@
 #define INCLUDED_ECSS_GAIN_PHASE_ACCUMULATOR_IMPL_H
 
 #include <ecss/gain_phase_accumulator.h>
+#include <pmt/pmt.h>
+#include "fast_math.h"
+#include "pmt_symbols.h"
 
 namespace gr {
   namespace ecss {
@@ -36,6 +39,11 @@ namespace gr {
       int64_t d_integer_phase;
       int64_t d_integer_phase_step;
       int64_t d_integer_phase_accumulator;
+      int_divider d_divider;                              /*!< Reciprocal of the uplink constant */
+      bool d_exact;
+      int64_t d_remainder;                                /*!< Remainder of the division, exact mode */
+
+      void handle_ratio(pmt::pmt_t msg);
 
     public:
       gain_phase_accumulator_impl(bool reset, int uplink, int downlink);
@@ -49,10 +57,13 @@ namespace gr {
       bool get_reset() const { return d_reset; } 
       int get_uplink() const { return d_uplink; }
       int get_downlink() const { return d_downlink; }
+      bool get_exact() const { return d_exact; }
 
       void set_reset(bool reset) { d_reset = reset;}
-      void set_uplink(int uplink) { d_uplink = uplink; }
-      void set_downlink(int downlink) { d_downlink = downlink; }
+      void set_uplink(int uplink);
+      void set_downlink(int downlink);
+      void set_ratio(int uplink, int downlink);
+      void set_exact(bool exact);
       
       };
 
@@ -0,0 +1,109 @@
+/* -*- c++ -*- */
+/*
+ * Copyright 2018 Antonio Miraglia - ISISpace.
+ *
+ * This is free software; you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation; either version 3, or (at your option)
+ * any later version.
+ *
+ * This software is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this software; see the file COPYING.  If not, write to
+ * the Free Software Foundation, Inc., 51 Franklin Street,
+ * Boston, MA 02110-1301, USA.
+ */
+
+#ifdef HAVE_CONFIG_H
+#include "config.h"
+#endif
+
+#include "line_encoder.h"
+#include <cstring>
+#include <stdexcept>
+
+namespace gr {
+  namespace ecss {
+
+    line_encoder::line_encoder()
+      : d_samples_per_bit(0), d_group(1)
+    {}
+
+    void
+    line_encoder::set_waveforms(const std::vector<float> &one, const std::vector<float> &zero)
+    {
+      if (one.empty() || one.size() != zero.size())
+      {
+        throw std::invalid_argument("line encoder: the waveforms must have the same not-null length.");
+      }
+      d_samples_per_bit = one.size();
+      d_one = one;
+      d_zero = zero;
+
+      // largest group whose table fits in 64 KiB
+      const size_t max_table = 65536 / sizeof(float);
+      d_group = 8;
+      while (d_group > 1 && ((size_t)1 << d_group) * d_group * d_samples_per_bit > max_table)
+      {
+        d_group /= 2;
+      }
+
+      // entry e holds the waveforms of the bits of e, MSB first
+      const int entry_size = d_group * d_samples_per_bit;
+      d_table.resize(((size_t)1 << d_group) * entry_size);
+      for (int e = 0; e < (1 << d_group); e++)
+      {
+        for (int k = 0; k < d_group; k++)
+        {
+          const bool bit = (e >> (d_group - 1 - k)) & 1;
+          const std::vector<float> &waveform = bit ? d_one : d_zero;
+          std::copy(waveform.begin(), waveform.end(), d_table.begin() + e * entry_size + k * d_samples_per_bit);
+        }
+      }
+    }
+
+    void
+    line_encoder::encode(const char *bits, float *out, int nbits) const
+    {
+      const int entry_size = d_group * d_samples_per_bit;
+      int i = 0;
+      for (; i + d_group <= nbits; i += d_group)
+      {
+        int index = 0;
+        for (int k = 0; k < d_group; k++)
+        {
+          index = (index << 1) | (bits[i + k] > 0);
+        }
+        memcpy(out, &d_table[index * entry_size], entry_size * sizeof(float));
+        out += entry_size;
+      }
+
+      // remaining bits of an incomplete group
+      for (; i < nbits; i++)
+      {
+        memcpy(out, (bits[i] > 0) ? d_one.data() : d_zero.data(), d_samples_per_bit * sizeof(float));
+        out += d_samples_per_bit;
+      }
+    }
+
+    void
+    line_encoder::encode_packed(const unsigned char *bytes, float *out, int nbytes) const
+    {
+      const int entry_size = d_group * d_samples_per_bit;
+      const int mask = (1 << d_group) - 1;
+      for (int i = 0; i < nbytes; i++)
+      {
+        for (int shift = 8 - d_group; shift >= 0; shift -= d_group)
+        {
+          memcpy(out, &d_table[((bytes[i] >> shift) & mask) * entry_size], entry_size * sizeof(float));
+          out += entry_size;
+        }
+      }
+    }
+
+  } /* namespace ecss */
+} /* namespace gr */
@@ -0,0 +1,70 @@
+/* -*- c++ -*- */
+/*
+ * Copyright 2018 Antonio Miraglia - ISISpace.
+ *
+ * This is free software; you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation; either version 3, or (at your option)
+ * any later version.
+ *
+ * This software is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this software; see the file COPYING.  If not, write to
+ * the Free Software Foundation, Inc., 51 Franklin Street,
+ * Boston, MA 02110-1301, USA.
+ */
+
+#ifndef INCLUDED_ECSS_LINE_ENCODER_H
+#define INCLUDED_ECSS_LINE_ENCODER_H
+
+#include <vector>
+
+namespace gr {
+  namespace ecss {
+
+    /*! \brief Table based engine of the ecss line encoders.
+     *
+     * \details
+     * Each bit is encoded with one of two waveforms of samples_per_bit samples.
+     * The bits are processed in groups of G bits (G = 8, 4, 2 or 1): a table of
+     * 2^G entries holds the concatenated waveforms of every group, so that a
+     * group is encoded with a single copy. G is the largest size that keeps the
+     * table within 64 KiB, i.e. G = 8 up to 8 samples per bit and G = 4 up to
+     * 256 samples per bit.
+     *
+     * The input is either one bit for each byte (a bit is one if the byte,
+     * read as a signed char, is greater than 0) or packed bytes, MSB first.
+     */
+    class line_encoder
+    {
+      private:
+        int d_samples_per_bit;
+        int d_group;                                      /*!< Bits of each table entry */
+        std::vector<float> d_one;
+        std::vector<float> d_zero;
+        std::vector<float> d_table;
+
+      public:
+        line_encoder();
+
+        /*! \brief Set the waveforms of the bits one and zero and build the table. */
+        void set_waveforms(const std::vector<float> &one, const std::vector<float> &zero);
+
+        int samples_per_bit() const { return d_samples_per_bit; }
+        int group() const { return d_group; }
+
+        /*! \brief Encode \p nbits bits, one for each byte. */
+        void encode(const char *bits, float *out, int nbits) const;
+
+        /*! \brief Encode \p nbytes packed bytes, MSB first. */
+        void encode_packed(const unsigned char *bytes, float *out, int nbytes) const;
+    };
+
+  } // namespace ecss
+} // namespace gr
+
+#endif /* INCLUDED_ECSS_LINE_ENCODER_H */
@@ -24,7 +24,7 @@
 
 #include <gnuradio/io_signature.h>
 #include "nrzl_encoder_impl.h"
-#include <volk/volk.h>
+#include <vector>
 
 namespace gr {
   namespace ecss {
@@ -43,21 +43,15 @@ namespace gr {
         : gr::sync_interpolator("nrzl_encoder",
               gr::io_signature::make(1, 1, sizeof(char)),
               gr::io_signature::make(1, 1, sizeof(float)), (int)(samp_rate / bit_rate)),
-          d_interpolation((int)samp_rate / bit_rate)
+          d_interpolation((int)samp_rate / bit_rate), d_packed(false)
     {
       if (d_interpolation % 2 != 0)
       {
         throw std::out_of_range("nrzl encoder: the ratio samp rate on bit rate must to be integer and multiple of 2.");
       }
-      positive = (float *)volk_malloc(d_interpolation * sizeof(float), volk_get_alignment());
-
-      negative = (float *)volk_malloc(d_interpolation * sizeof(float), volk_get_alignment());
-
-      for (size_t i = 0; i < d_interpolation; i++)
-      {
-        positive[i] = +1;
-        negative[i] = -1;
-      }
+      std::vector<float> positive(d_interpolation, +1);
+      std::vector<float> negative(d_interpolation, -1);
+      d_encoder.set_waveforms(positive, negative);
     }
 
     /*
@@ -74,22 +68,30 @@ namespace gr {
     {
       const char *in = (const char *)input_items[0];
       float *out = (float *)output_items[0];
-      int index_interpolation = 0;
-      for (size_t i = 0; i < noutput_items; i += d_interpolation)
+      if (d_packed)
+      {
+        d_encoder.encode_packed((const unsigned char *)in, out, noutput_items / (8 * d_interpolation));
+      }
+      else
       {
-        if (in[index_interpolation] > 0)
-        {
-          memcpy(&out[i], positive, (d_interpolation * sizeof(float)));
-        }
-        else
-        {
-          memcpy(&out[i], negative, (d_interpolation * sizeof(float)));
-        }
-        index_interpolation++;
+        d_encoder.encode(in, out, noutput_items / d_interpolation);
       }
       return noutput_items;
     }
 
+    void
+    nrzl_encoder_impl::set_packed(bool packed)
+    {
+      d_packed = packed;
+      set_interpolation(packed ? 8 * d_interpolation : d_interpolation);
+    }
+
+    bool
+    nrzl_encoder_impl::get_packed() const
+    {
+      return d_packed;
+    }
+
   } /* namespace ecss */
 } /* namespace gr */
 
@@ -22,6 +22,7 @@
 #define INCLUDED_ECSS_NRZL_ENCODER_IMPL_H
 
 #include <ecss/nrzl_encoder.h>
+#include "line_encoder.h"
 
 namespace gr {
   namespace ecss {
@@ -29,9 +30,9 @@ namespace gr {
     class nrzl_encoder_impl : public nrzl_encoder
     {
      private:
-      float *positive;
-      float *negative;
-      int d_interpolation;
+      int d_interpolation;                                /*!< Samples of each bit */
+      bool d_packed;
+      line_encoder d_encoder;
 
      public:
       nrzl_encoder_impl(float bit_rate, float samp_rate);
@@ -41,6 +42,9 @@ namespace gr {
       int work(int noutput_items,
          gr_vector_const_void_star &input_items,
          gr_vector_void_star &output_items);
+
+      void set_packed(bool packed);
+      bool get_packed() const;
     };
 
   } // namespace ecss
@@ -25,6 +25,9 @@
 #include <gnuradio/io_signature.h>
 #include "nrzl_encoder_subcarrier_impl.h"
 #include <volk/volk.h>
+#include <algorithm>
+#include <cmath>
+#include <vector>
     
 namespace gr {
   namespace ecss {
@@ -46,20 +49,22 @@ namespace gr {
         : gr::sync_interpolator("nrzl_encoder_subcarrier",
               gr::io_signature::make(1, 1, sizeof(char)),
               gr::io_signature::make(1, 1, sizeof(float)), (int)(samp_rate / bit_rate)),
-          d_interpolation((int)samp_rate / bit_rate)
+          d_interpolation((int)samp_rate / bit_rate), d_packed(false),
+          d_sine(sine), d_freq(freq_sub), d_samp_rate(samp_rate),
+          d_continuous(false), d_phase(0), d_step(0), d_nco(12)
     {
       if (d_interpolation % 2 != 0)
       {
         throw std::out_of_range("nrzl encoder: the ratio samp rate on bit rate must to be integer and multiple of 2.");
       }
-      positive = (float *)volk_malloc(d_interpolation * sizeof(float), volk_get_alignment());
-      negative = (float *)volk_malloc(d_interpolation * sizeof(float), volk_get_alignment());
-
+      d_carrier = (float *)volk_malloc(BLOCK_SIZE * sizeof(float), volk_get_alignment());
       signal_gen(sine, freq_sub, samp_rate);
     }
 
     nrzl_encoder_subcarrier_impl::~nrzl_encoder_subcarrier_impl()
-    {}
+    {
+      volk_free(d_carrier);
+    }
 
     int
     nrzl_encoder_subcarrier_impl::work(int noutput_items,
@@ -68,20 +73,77 @@ namespace gr {
     {
       const char *in = (const char *)input_items[0];
       float *out = (float *)output_items[0];
-      int index_interpolation = 0;
-      for (size_t i = 0; i < noutput_items; i += d_interpolation)
+      if (d_packed)
+      {
+        d_encoder.encode_packed((const unsigned char *)in, out, noutput_items / (8 * d_interpolation));
+      }
+      else
       {
-        if (in[index_interpolation] > 0)
+        d_encoder.encode(in, out, noutput_items / d_interpolation);
+      }
+
+      if (d_continuous)
+      {
+        modulate(out, noutput_items);
+      }
+      return noutput_items;
+    }
+
+    void
+    nrzl_encoder_subcarrier_impl::modulate(float *out, int nitems)
+    {
+      // the square wave is sampled 2^-16 samples later, so that the rounding of
+      // the step does not move the edges of an integer ratio
+      const uint64_t step = (uint64_t)d_step;
+      const uint64_t delay = step >> 16;
+
+      for (int i = 0; i < nitems; i += BLOCK_SIZE)
+      {
+        const int n = std::min(BLOCK_SIZE, nitems - i);
+        if (d_sine)
         {
-          memcpy(&out[i], positive, (d_interpolation * sizeof(float)));
+          d_phase = d_nco.sine(d_carrier, d_phase, d_step, n);
         }
         else
         {
-          memcpy(&out[i], negative, (d_interpolation * sizeof(float)));
+          // +1 on the first half of the period, -1 on the second one
+          uint64_t word = (uint64_t)d_phase + delay;
+          for (int j = 0; j < n; j++)
+          {
+            d_carrier[j] = 1.0f - 2.0f * (float)(word >> 63);
+            word += step;
+          }
+          d_phase = (int64_t)(word - delay);
         }
-        index_interpolation++;
+        volk_32f_x2_multiply_32f(out + i, out + i, d_carrier, n);
       }
-      return noutput_items;
+    }
+
+    void
+    nrzl_encoder_subcarrier_impl::set_packed(bool packed)
+    {
+      d_packed = packed;
+      set_interpolation(packed ? 8 * d_interpolation : d_interpolation);
+    }
+
+    bool
+    nrzl_encoder_subcarrier_impl::get_packed() const
+    {
+      return d_packed;
+    }
+
+    void
+    nrzl_encoder_subcarrier_impl::set_continuous(bool continuous)
+    {
+      d_continuous = continuous;
+      d_phase = 0;
+      signal_gen(d_sine, d_freq, d_samp_rate);
+    }
+
+    bool
+    nrzl_encoder_subcarrier_impl::get_continuous() const
+    {
+      return d_continuous;
     }
 
     void
@@ -89,7 +151,25 @@ namespace gr {
     {
       double phase = 0;
       double delta_phase;
-      float t_imag, t_real;
+      std::vector<float> positive(d_interpolation);
+      std::vector<float> negative(d_interpolation);
+
+      if (d_continuous)
+      {
+        // NRZ-L levels, the sub-carrier is applied by the NCO; the step is the
+        // normalized frequency on 64 bits, rounded to the nearest
+        const long double cycles = (long double)freq / samp_rate;
+        const long double fraction = cycles - floorl(cycles);
+        const long double word = ldexpl(fraction < 1 ? fraction : 0, 64);
+        uint64_t step = (uint64_t)word;
+        step += (word - step >= 0.5L) ? 1 : 0;
+        d_step = (int64_t)step;
+
+        std::fill(positive.begin(), positive.end(), +1.0f);
+        std::fill(negative.begin(), negative.end(), -1.0f);
+        d_encoder.set_waveforms(positive, negative);
+        return;
+      }
 
       delta_phase = (double)(M_TWOPI * freq) / samp_rate;
 
@@ -123,6 +203,7 @@ namespace gr {
           negative[i] = -level;
         }
       }
+      d_encoder.set_waveforms(positive, negative);
     }
 
   } /* namespace ecss */
@@ -22,6 +22,8 @@
 #define INCLUDED_ECSS_NRZL_ENCODER_SUBCARRIER_IMPL_H
 
 #include <ecss/nrzl_encoder_subcarrier.h>
+#include "line_encoder.h"
+#include "fast_math.h"
 
 namespace gr {
   namespace ecss {
@@ -29,11 +31,24 @@ namespace gr {
     class nrzl_encoder_subcarrier_impl : public nrzl_encoder_subcarrier
     {
      private:
-      float *positive;
-      float *negative;
-      int d_interpolation;
+      static const int BLOCK_SIZE = 1024;                 /*!< Samples of the sub-carrier generated in each pass */
+
+      int d_interpolation;                                /*!< Samples of each bit */
+      bool d_packed;
+      bool d_sine;
+      float d_freq;
+      float d_samp_rate;
+      bool d_continuous;
+      int64_t d_phase;                                    /*!< Phase of the NCO, the int64 range maps [-pi, pi) */
+      int64_t d_step;
+      nco_lut d_nco;
+      float *d_carrier;
+      line_encoder d_encoder;
       void signal_gen(bool sine, float freq, float samp_rate);
 
+      /*! \brief Multiply \p nitems NRZ-L samples by the sub-carrier of the NCO. */
+      void modulate(float *out, int nitems);
+
      public:
       nrzl_encoder_subcarrier_impl(bool sine, float freq_sub, float bit_rate, float samp_rate);
       ~nrzl_encoder_subcarrier_impl();
@@ -42,6 +57,11 @@ namespace gr {
       int work(int noutput_items,
          gr_vector_const_void_star &input_items,
          gr_vector_void_star &output_items);
+
+      void set_packed(bool packed);
+      bool get_packed() const;
+      void set_continuous(bool continuous);
+      bool get_continuous() const;
     };
 
   } // namespace ecss
@@ -23,13 +23,17 @@
 #endif
 
 #include "phase_converter_impl.h"
+#include "pmt_symbols.h"
 
 #include <gnuradio/io_signature.h>
 
 #include <pmt/pmt.h>
 #include <boost/bind.hpp>
+#include <boost/thread/thread.hpp>
 
 #include <cmath>
+#include <algorithm>
+#include <stdexcept>
 
 namespace gr {
   namespace ecss {
@@ -50,15 +54,47 @@ namespace gr {
       : gr::sync_block("phase_converter",
               gr::io_signature::make(1, 1, sizeof(float)),
               gr::io_signature::make(1, 1, sizeof(int64_t))),
-              d_N(N)
+              d_N(N), d_pdu_mode(PDU_CALL), d_pdu_items(4096), d_pdu_period(0.1),
+              d_connected(true), d_pdu(pmt::PMT_NIL), d_pdu_data(NULL), d_pdu_size(0), d_pdu_fill(0),
+              d_finished(false)
     {
       precision = pow(2,(- (N - 1)));
-      this->message_port_register_out(pmt::mp("async_out"));
+      this->message_port_register_out(symbols::port_async_out);
     }
 
     phase_converter_impl::~phase_converter_impl()
     {}
 
+    bool
+    phase_converter_impl::start()
+    {
+      // the subscriptions are fixed once the flowgraph is running
+      d_connected = !pmt::is_null(message_subscribers(symbols::port_async_out));
+      d_last_pdu = std::chrono::steady_clock::now();
+      if (d_connected)
+      {
+        d_finished = false;
+        d_timer = boost::shared_ptr<gr::thread::thread>
+          (new gr::thread::thread(boost::bind(&phase_converter_impl::run_timer, this)));
+      }
+      return true;
+    }
+
+    bool
+    phase_converter_impl::stop()
+    {
+      if (d_timer)
+      {
+        d_finished = true;
+        d_timer->interrupt();
+        d_timer->join();
+        d_timer.reset();
+      }
+      gr::thread::scoped_lock guard(d_setlock);
+      flush();
+      return true;
+    }
+
     int
     phase_converter_impl::work(int noutput_items,
         gr_vector_const_void_star &input_items,
@@ -67,19 +103,219 @@ namespace gr {
       const float *in = (const float *) input_items[0];
       int64_t *out = (int64_t *) output_items[0];
 
-      double phase_normalized;
-      int64_t integer_phase;
+      convert(in, out, noutput_items);
 
-      for(int i = 0; i < noutput_items; i++) {
-        phase_normalized = normalization( phase_wrap( (double) in[i]));
-        integer_phase = double_to_integer(phase_normalized);
-        out[i] = (integer_phase << (64 - d_N));
+      if (d_connected && d_pdu_mode != PDU_OFF)
+      {
+        gr::thread::scoped_lock guard(d_setlock);
+        publish(out, noutput_items);
       }
-      pmt::pmt_t out_msg = pmt::init_s64vector(noutput_items, out);
-      this->message_port_pub(pmt::mp("async_out"), out_msg);
       return noutput_items;
     }
 
+    void
+    phase_converter_impl::run_timer()
+    {
+      while (!d_finished)
+      {
+        // sleep until the end of the current period, the sleep is interrupted by stop()
+        double remaining;
+        {
+          gr::thread::scoped_lock guard(d_setlock);
+          const std::chrono::steady_clock::time_point now = std::chrono::steady_clock::now();
+          remaining = d_pdu_period - std::chrono::duration<double>(now - d_last_pdu).count();
+          if (remaining <= 0)
+          {
+            d_last_pdu = now;
+            remaining = d_pdu_period;
+            if (d_pdu_mode == PDU_TIMER)
+            {
+              flush();
+            }
+          }
+        }
+        try
+        {
+          boost::this_thread::sleep(boost::posix_time::microseconds((long)(remaining * 1e6) + 1));
+        }
+        catch (boost::thread_interrupted &)
+        {
+          return;
+        }
+      }
+    }
+
+    pmt::pmt_t
+    phase_converter_impl::acquire(int size)
+    {
+      int spare = -1;
+      for (size_t p = 0; p < d_pool.size(); p++)
+      {
+        if (d_pool[p].unique())
+        {
+          if ((int)pmt::length(d_pool[p]) == size)
+          {
+            return d_pool[p];
+          }
+          spare = p;
+        }
+      }
+
+      pmt::pmt_t pdu = pmt::make_s64vector(size, 0);
+      if ((int)d_pool.size() < POOL_SIZE)
+      {
+        d_pool.push_back(pdu);
+      }
+      else if (spare >= 0)
+      {
+        d_pool[spare] = pdu;
+      }
+      return pdu;
+    }
+
+    void
+    phase_converter_impl::publish(const int64_t *out, int noutput_items)
+    {
+      size_t len;
+      if (d_pdu_mode == PDU_CALL)
+      {
+        pmt::pmt_t pdu = acquire(noutput_items);
+        int64_t *data = pmt::s64vector_writable_elements(pdu, len);
+        std::copy(out, out + noutput_items, data);
+        this->message_port_pub(symbols::port_async_out, pdu);
+        return;
+      }
+
+      // PDU_ITEMS and PDU_TIMER: the items are copied once, straight into the vector
+      // of the message. In PDU_TIMER mode the full messages are published as they
+      // fill and the timer publishes the partial one.
+      int i = 0;
+      while (i < noutput_items)
+      {
+        if (d_pdu_data == NULL)
+        {
+          d_pdu = acquire(d_pdu_items);
+          d_pdu_data = pmt::s64vector_writable_elements(d_pdu, len);
+          d_pdu_size = (int)len;
+          d_pdu_fill = 0;
+        }
+        const int n = std::min(noutput_items - i, d_pdu_size - d_pdu_fill);
+        std::copy(out + i, out + i + n, d_pdu_data + d_pdu_fill);
+        d_pdu_fill += n;
+        i += n;
+
+        if (d_pdu_fill == d_pdu_size)
+        {
+          this->message_port_pub(symbols::port_async_out, d_pdu);
+          d_pdu = pmt::PMT_NIL;
+          d_pdu_data = NULL;
+        }
+      }
+    }
+
+    void
+    phase_converter_impl::flush()
+    {
+      // publish the partial message of the batching modes
+      if (d_pdu_data != NULL && d_pdu_fill > 0)
+      {
+        size_t len;
+        pmt::pmt_t pdu = acquire(d_pdu_fill);
+        int64_t *data = pmt::s64vector_writable_elements(pdu, len);
+        std::copy(d_pdu_data, d_pdu_data + d_pdu_fill, data);
+        this->message_port_pub(symbols::port_async_out, pdu);
+      }
+      d_pdu = pmt::PMT_NIL;
+      d_pdu_data = NULL;
+      d_pdu_fill = 0;
+    }
+
+    void
+    phase_converter_impl::set_pdu_mode(pdu_mode_t mode)
+    {
+      if (mode < PDU_OFF || mode > PDU_TIMER) {
+        throw std::out_of_range ("phase converter: invalid message mode.");
+      }
+      gr::thread::scoped_lock guard(d_setlock);
+      d_pdu_mode = mode;
+      d_last_pdu = std::chrono::steady_clock::now();
+    }
+
+    void
+    phase_converter_impl::set_pdu_items(int items)
+    {
+      if (items < 1) {
+        throw std::out_of_range ("phase converter: invalid number of items of the messages. Must be at least 1.");
+      }
+      // the message being filled keeps its size
+      gr::thread::scoped_lock guard(d_setlock);
+      d_pdu_items = items;
+    }
+
+    void
+    phase_converter_impl::set_pdu_period(double period)
+    {
+      if (period <= 0) {
+        throw std::out_of_range ("phase converter: invalid period of the messages. Must be greater than 0.");
+      }
+      gr::thread::scoped_lock guard(d_setlock);
+      d_pdu_period = period;
+    }
+
+    void
+    phase_converter_impl::convert(const float *in, int64_t *out, int nitems)
+    {
+      const double scale = 1.0 / precision;
+      const int shift = 64 - d_N;
+      double scaled[BLOCK_SIZE];
+
+      for (int b = 0; b < nitems; b += BLOCK_SIZE)
+      {
+        const int n = std::min(BLOCK_SIZE, nitems - b);
+        bool outside = false;
+
+        // wrap in (-pi, pi] with at most one turn and scale to units of precision,
+        // without branches: the same operations of phase_wrap() in this range
+        for (int i = 0; i < n; i++)
+        {
+          double phase = (double) in[b + i];
+          outside |= !(phase > -3 * M_PI && phase <= 3 * M_PI);
+          phase += (phase <= -M_PI ? M_TWOPI : 0.0) - (phase > M_PI ? M_TWOPI : 0.0);
+          scaled[i] = normalization(phase) * scale;
+        }
+
+        // round half away from zero as round(), |scaled| <= 2^51 is exact in int64
+        for (int i = 0; i < n; i++)
+        {
+          int64_t integer_phase = (int64_t)scaled[i];
+          const double fraction = scaled[i] - (double)integer_phase;
+          integer_phase += (int64_t)(fraction >= 0.5) - (int64_t)(fraction <= -0.5);
+          out[b + i] = (int64_t)((uint64_t)integer_phase << shift);
+        }
+
+        // phases beyond one turn (and NaN) follow the scalar path
+        if (outside)
+        {
+          for (int i = 0; i < n; i++)
+          {
+            const double phase = (double) in[b + i];
+            if (!(phase > -3 * M_PI && phase <= 3 * M_PI))
+            {
+              out[b + i] = convert(in[b + i]);
+            }
+          }
+        }
+      }
+    }
+
+    int64_t
+    phase_converter_impl::convert(float phase)
+    {
+      double phase_normalized = normalization( phase_wrap( (double) phase));
+      int64_t integer_phase = double_to_integer(phase_normalized);
+      return (integer_phase << (64 - d_N));
+    }
+
     int64_t
     phase_converter_impl::double_to_integer(double double_value)
     {
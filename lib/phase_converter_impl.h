@@ -22,6 +22,11 @@
 #define INCLUDED_ECSS_PHASE_CONVERTER_IMPL_H
 
 #include <ecss/phase_converter.h>
+#include <gnuradio/thread/thread.h>
+#include <pmt/pmt.h>
+#include <boost/shared_ptr.hpp>
+#include <chrono>
+#include <vector>
 
 namespace gr {
   namespace ecss {
@@ -32,19 +37,74 @@ namespace gr {
       double precision;
       int d_N;
 
+      // message output
+      pdu_mode_t d_pdu_mode;
+      int d_pdu_items;
+      double d_pdu_period;
+      bool d_connected;                                   /*!< True if the message port has subscribers */
+      pmt::pmt_t d_pdu;                                   /*!< Message being filled in PDU_ITEMS and PDU_TIMER mode */
+      int64_t *d_pdu_data;
+      int d_pdu_size;
+      int d_pdu_fill;
+      std::vector<pmt::pmt_t> d_pool;                     /*!< Messages reused once no receiver holds them */
+      std::chrono::steady_clock::time_point d_last_pdu;
+      boost::shared_ptr<gr::thread::thread> d_timer;
+      bool d_finished;
+
+      static const int POOL_SIZE = 8;
+
+      void publish(const int64_t *out, int noutput_items);
+      void flush();
+
+      /*! \brief Return an s64vector of \p size items from the pool
+      *
+      * \details
+      * A message of the pool is free when the pool holds its only reference, i.e. every
+      * receiver has released it, and is then reused without a new allocation. If no
+      * free message of this size is found, a new one is allocated and pooled in
+      * place of a free one of another size, if there is room.
+      */
+      pmt::pmt_t acquire(int size);
+
+      /*! \brief Publish the partial message of PDU_TIMER mode every pdu_period, even if the stream stalls */
+      void run_timer();
+
+      static const int BLOCK_SIZE = 256;                 /*!< Items converted in each pass */
+
       double phase_wrap(double);
       int64_t double_to_integer(double double_value);
       double normalization(double phase);
 
+      /*! \brief Scalar conversion of one phase, the reference of the batched path */
+      int64_t convert(float phase);
+
+      /*! \brief Batched conversion of \p nitems phases
+      *
+      * \details
+      * The phases in (-3pi, 3pi] are wrapped with a single conditional turn, scaled
+      * and rounded in blocks without branches. The other phases use the scalar
+      * conversion. The output is bit-exact against the scalar conversion.
+      */
+      void convert(const float *in, int64_t *out, int nitems);
+
     public:
       phase_converter_impl(int N);
       ~phase_converter_impl();
 
+      bool start();
+      bool stop();
+
       // Where all the action really happens
       int work(int noutput_items,
          gr_vector_const_void_star &input_items,
          gr_vector_void_star &output_items);
 
+      void set_pdu_mode(pdu_mode_t mode);
+      void set_pdu_items(int items);
+      void set_pdu_period(double period);
+      pdu_mode_t get_pdu_mode() const { return d_pdu_mode; }
+      int get_pdu_items() const { return d_pdu_items; }
+      double get_pdu_period() const { return d_pdu_period; }
     };
 
   } // namespace ecss
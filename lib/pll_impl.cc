@@ -49,14 +49,19 @@ namespace gr {
     static int ios[] = {sizeof(gr_complex), sizeof(float), sizeof(float), sizeof(int64_t)};
     static std::vector<int> iosig(ios, ios+sizeof(ios)/sizeof(int));
     pll_impl::pll_impl(int samp_rate, int N, const std::vector<double> &coefficients, float freq_central, float bw)
-        : gr::sync_block("pll",
+        : gr::block("pll",
                          gr::io_signature::make(1, 1, sizeof(gr_complex)),
                          gr::io_signature::makev(1, 4, iosig)),
           d_N(N), d_integer_phase(0), d_integer_phase_denormalized(0),          
           d_samp_rate(samp_rate),
-          d_freq_central(freq_central), d_coefficients(3, 0.0), d_bw(bw)
+          d_freq_central(freq_central), d_coefficients(3, 0.0), d_bw(bw),
+          d_fast(false), d_nco(12),
+          d_lock_threshold(0.8), d_unlock_threshold(0.5), d_lock_alpha(0.01),
+          d_lock_decimation(64), d_lock_countdown(64), d_lock_metric(0.0), d_locked(false),
+          d_decimation(1), d_average(false), d_decim_count(0), d_sum_freq(0.0), d_sum_error(0.0)
     {
 		stop = false;
+      message_port_register_out(symbols::port_lock_out);
       set_tag_propagation_policy(TPP_DONT);
       set_N(N);
       set_coefficients(coefficients);
@@ -69,8 +74,15 @@ namespace gr {
     pll_impl::~pll_impl()
     {}
 
+    void
+    pll_impl::forecast(int noutput_items, gr_vector_int &ninput_items_required)
+    {
+      ninput_items_required[0] = noutput_items;
+    }
+
     int
-    pll_impl::work (int noutput_items,
+    pll_impl::general_work (int noutput_items,
+                       gr_vector_int &ninput_items,
                        gr_vector_const_void_star &input_items,
                        gr_vector_void_star &output_items)
     {
@@ -83,75 +95,153 @@ namespace gr {
 		float *phase_error = output_items.size() >= 3 ? (float *)output_items[2] : NULL;
 		int64_t *phase_delta = output_items.size() >= 4 ? (int64_t *)output_items[3] : NULL;
 
-      double module, error;
-      double filter_out, filter_out_limited;
-      double t_imag, t_real;
-      int64_t integer_step_phase;
+      gr::thread::scoped_lock guard(d_setlock);
 
-      std::vector<tag_t> tags;
+      // fetch all the control tags of this window once, then run the loop
+      // on the tag-free chunks between them
+      const uint64_t nread = nitems_read(0);
+      get_tags_in_range(d_tags, 0, nread, nread + noutput_items, symbols::key_pll);
+      std::stable_sort(d_tags.begin(), d_tags.end(), tag_t::offset_compare);
 
-      for(int i = 0; i < noutput_items; i++) 
+      int i = 0;
+      size_t t = 0;
+      int produced = 0;       // items written on the (decimated) optional outputs
+      while (i < noutput_items)
+      {
+        // apply all the tags placed on the current item
+        while (t < d_tags.size() && (d_tags[t].offset - nread) == (uint64_t)i)
+        {
+          handle_tag(d_tags[t], produced, phase_delta != NULL);
+          t++;
+        }
+
+        int next = (t < d_tags.size()) ? (int)(d_tags[t].offset - nread) : noutput_items;
+
+        if (d_fast && !stop)
+        {
+          track_fast(&input[i], &output[i], frequency_output, phase_error, phase_delta, produced, next - i);
+        }
+        else
+        {
+          track(&input[i], &output[i], frequency_output, phase_error, phase_delta, produced, next - i);
+        }
+        i = next;
+      }
+
+      consume_each(noutput_items);
+      produce(0, noutput_items);
+      for (size_t port = 1; port < output_items.size(); port++)
+      {
+        produce(port, produced);
+      }
+      return WORK_CALLED_PRODUCE;
+    }
+
+    void
+    pll_impl::handle_tag(const tag_t &tag, int offset, bool phase_delta_connected)
+    {
+      if (pmt::eq(tag.value, symbols::value_reset))
+      {
+        reset();
+      }
+      else if (pmt::eq(tag.value, symbols::value_stop))
+      {
+        stop = true;
+        reset();
+        if (phase_delta_connected)
+        {
+          add_item_tag(3,                            // Port number
+                       nitems_written(3) + offset,   // Offset
+                       symbols::key_modulator,       // Key
+                       symbols::value_reset          // Value
+                       );
+        }
+      }
+      else if (pmt::eq(tag.value, symbols::value_start))
+      {
+        stop = false;
+        reset();
+        if (phase_delta_connected)
+        {
+          add_item_tag(3,                            // Port number
+                       nitems_written(3) + offset,   // Offset
+                       symbols::key_accumulator,     // Key
+                       symbols::value_reset          // Value
+                       );
+        }
+      }
+      else if (pmt::eq(tag.value, symbols::value_start_1e3))
       {
+        stop = false;
+      }
+      else if (pmt::is_pair(tag.value) && pmt::eq(pmt::car(tag.value), symbols::key_freq))
+      {
+        set_frequency(pmt::to_double(pmt::cdr(tag.value)));
+      }
+    }
+
+    void
+    pll_impl::track(const gr_complex *input, gr_complex *output, float *frequency_output,
+                    float *phase_error, int64_t *phase_delta, int &produced, int nitems)
+    {
+      double error;
+      double filter_out;
+      int64_t integer_step_phase;
 
-         get_tags_in_window( // Note the different method name
-             tags, // Tags will be saved here
-             0, // Port 0
-             i, // Start of range (relative to nitems_read(0))
-             (i + 1) // End of relative range
-         );
+      const double central_step = d_freq_central / d_samp_rate * M_TWOPI;
+      const bool fast = d_fast;
+
+      for(int i = 0; i < nitems; i++)
+      {
+		// the optional outputs are written on the last sample of each group
+		const bool last = (++d_decim_count == d_decimation);
 
-		if (tags.size() > 0) 
+		if (phase_delta != NULL && last)
 		{
-			if (tags[0].value == pmt::intern("reset") && tags[0].key == pmt::intern("pll")) 
-			{
-				reset();
-			}
-			if (tags[0].value == pmt::intern("stop") && tags[0].key == pmt::intern("pll")) 
-			{
-				stop = true;
-				reset();
-				add_item_tag(3,                    // Port number
-                    nitems_written(0) + (i),       // Offset
-                    pmt::intern("modulator"),    // Key
-                    pmt::intern("reset")           // Value
-                    );
-			}
-			if (tags[0].value == pmt::intern("start") && tags[0].key == pmt::intern("pll")) 
-			{
-				stop = false;
-				reset();
-				add_item_tag(3,                    // Port number
-                    nitems_written(0) + (i),       // Offset
-                    pmt::intern("accumulator"),    // Key
-                    pmt::intern("reset")           // Value
-                    );
-			}
-			if (tags[0].value == pmt::intern("start(1e3)") && tags[0].key == pmt::intern("pll")) 
-			{
-				stop = false;
-			}
+			phase_delta[produced] = d_integer_phase;
+		}
+		if (fast)
+		{
+			output[i] = input[i] * std::conj(d_nco.expj(d_integer_phase & d_phase_mask));
+			error = fast_atan2(output[i].imag(), output[i].real());
+		}
+		else
+		{
+			output[i] = input[i] * gr_expj(-d_integer_phase_denormalized);
+			error = phase_detector(output[i]);
 		}
 
-		if (phase_delta != NULL)
+		// lock detector, evaluated once every d_lock_decimation samples
+		if (--d_lock_countdown == 0)
 		{
-			phase_delta[i] = d_integer_phase;
+			d_lock_countdown = d_lock_decimation;
+			lock_detector(stop ? 0.0 : cos(error));
 		}
-		output[i] = input[i] * gr_expj(-d_integer_phase_denormalized);
-		error = phase_detector(output[i]);
 
 		// output the phase error, if a signal is connected to the optional port
 		if (phase_error != NULL)
 		{
+			double error_out;
 			if (stop)
 			{
 				d_integer_phase = 0;
-				phase_error[i] = 0;
+				error_out = 0;
 			}
 			else
 			{
-				phase_error[i] = error;
+				error_out = error;
+			}
+
+			if (d_average)
+			{
+				d_sum_error += error_out;
+				error_out = d_sum_error / d_decimation;
 			}
-		}	
+			if (last)
+			{
+				phase_error[produced] = error_out;
+			}
+		}
 		
 		// if the PLL has been stopped, force the error to zero, this makes sure 
 		// the PLL remains fixed on the center frequency
@@ -168,15 +258,167 @@ namespace gr {
 		// output the current PLL frequency, if a signal is connected to the optional port
 		if (frequency_output != NULL)
 		{
-			frequency_output[i] = integrator_order_1 * d_samp_rate / M_TWOPI + d_freq_central;
+			double freq_out = integrator_order_1 * d_samp_rate / M_TWOPI + d_freq_central;
+
+			if (d_average)
+			{
+				d_sum_freq += freq_out;
+				freq_out = d_sum_freq / d_decimation;
+			}
+			if (last)
+			{
+				frequency_output[produced] = freq_out;
+			}
+		}
+
+		if (last)
+		{
+			d_decim_count = 0;
+			d_sum_freq = 0.0;
+			d_sum_error = 0.0;
+			produced++;
 		}
 
-         integer_step_phase = integer_phase_converter(filter_out + (d_freq_central / d_samp_rate * M_TWOPI));
+         integer_step_phase = integer_phase_converter(filter_out + central_step);
          accumulator(integer_step_phase);
-         NCO_denormalization();
-         
+         // the fast mode reads the table with the integer phase directly
+         if (!fast)
+         {
+           NCO_denormalization();
+         }
+      }
+
+      // keep the phase reported by get_phase() current in fast mode
+      if (fast)
+      {
+        NCO_denormalization();
+      }
+    }
+
+    void
+    pll_impl::track_fast(const gr_complex *input, gr_complex *output, float *frequency_output,
+                         float *phase_error, int64_t *phase_delta, int &produced, int nitems)
+    {
+      // the loop state and the constants of the chunk are kept in registers
+      const double central_step = d_freq_central / d_samp_rate * M_TWOPI;
+      const double limit = (d_bw != 0) ? (d_bw / d_samp_rate * M_TWOPI)/2 : INFINITY;
+      const double scale = 1.0 / (M_PI * precision);
+      const double phase_scale = precision * M_PI;
+      const double freq_scale = d_samp_rate / M_TWOPI;
+      const double c0 = d_coefficients[0];
+      const double c1 = d_coefficients[1];
+      const double c2 = d_coefficients[2];
+      const int shift = 64 - d_N;
+      const uint64_t mask = d_phase_mask;
+      const int decimation = d_decimation;
+      const bool average = d_average;
+
+      double i1 = integrator_order_1;
+      double i21 = integrator_order_2_1;
+      double i22 = integrator_order_2_2;
+      int64_t phase = d_integer_phase;
+      int decim_count = d_decim_count;
+      int countdown = d_lock_countdown;
+      double sum_freq = d_sum_freq;
+      double sum_error = d_sum_error;
+
+      for (int i = 0; i < nitems; i++)
+      {
+        // the phase of the input does not depend on the loop, so the error is
+        // the difference of the two phases instead of the phase of the mixer
+        // output: the table and the polynomial are out of the feedback path
+        output[i] = input[i] * std::conj(d_nco.expj(phase & mask));
+        const double error = mod_2pi(fast_atan2(input[i].imag(), input[i].real()) -
+                                     (double)(phase >> shift) * phase_scale);
+
+        if (--countdown == 0)
+        {
+          countdown = d_lock_decimation;
+          lock_detector(cos(error));
+        }
+
+        // loop filter, same as advance_loop()
+        i1 = std::min(std::max(i1 + c1 * error, -limit), limit);
+        i21 += c2 * error;
+        i22 += i21;
+        const double filter_out = c0 * error + i1 + i22;
+
+        // the optional outputs are written on the last sample of each group
+        if (frequency_output != NULL || phase_error != NULL || phase_delta != NULL)
+        {
+          const bool last = (++decim_count == decimation);
+          if (phase_delta != NULL && last)
+          {
+            phase_delta[produced] = phase;
+          }
+          if (phase_error != NULL)
+          {
+            double error_out = error;
+            if (average)
+            {
+              sum_error += error_out;
+              error_out = sum_error / decimation;
+            }
+            if (last)
+            {
+              phase_error[produced] = error_out;
+            }
+          }
+          if (frequency_output != NULL)
+          {
+            double freq_out = i1 * freq_scale + d_freq_central;
+            if (average)
+            {
+              sum_freq += freq_out;
+              freq_out = sum_freq / decimation;
+            }
+            if (last)
+            {
+              frequency_output[produced] = freq_out;
+            }
+          }
+          if (last)
+          {
+            decim_count = 0;
+            sum_freq = 0.0;
+            sum_error = 0.0;
+            produced++;
+          }
+        }
+
+        // rounding half away from zero, as integer_phase_converter()
+        const double step = (filter_out + central_step) * scale;
+        phase += (int64_t)(step + std::copysign(0.5, step)) << shift;
+      }
+
+      integrator_order_1 = i1;
+      integrator_order_2_1 = i21;
+      integrator_order_2_2 = i22;
+      d_integer_phase = phase;
+      d_decim_count = decim_count;
+      d_lock_countdown = countdown;
+      d_sum_freq = sum_freq;
+      d_sum_error = sum_error;
+
+      // keep the phase reported by get_phase() current
+      NCO_denormalization();
+    }
+
+    void
+    pll_impl::lock_detector(double metric)
+    {
+      d_lock_metric += d_lock_alpha * (metric - d_lock_metric);
+
+      if (!d_locked && d_lock_metric >= d_lock_threshold)
+      {
+        d_locked = true;
+        message_port_pub(symbols::port_lock_out, symbols::msg_lock);
+      }
+      else if (d_locked && d_lock_metric < d_unlock_threshold)
+      {
+        d_locked = false;
+        message_port_pub(symbols::port_lock_out, symbols::msg_unlock);
       }
-      return noutput_items;
     }
 
     double
@@ -297,6 +539,7 @@ namespace gr {
       }
       d_N = N;
       precision = pow(2,(- (N - 1)));
+      d_phase_mask = (N == 0) ? 0 : (~(uint64_t)0 << (64 - N));
     }
 
     void
@@ -325,7 +568,6 @@ namespace gr {
     pll_impl::set_frequency(float freq)
     {
       integrator_order_1 = (freq - d_freq_central) / d_samp_rate * M_TWOPI;
-      std::cout << "set_frequency " << freq << std::endl;
     }
 
     void
@@ -350,6 +592,90 @@ namespace gr {
 
     }
 
+    void
+    pll_impl::set_fast(bool fast)
+    {
+      gr::thread::scoped_lock guard(d_setlock);
+      d_fast = fast;
+      NCO_denormalization();
+    }
+
+    void
+    pll_impl::set_decimation(int decimation)
+    {
+      if (decimation < 1)
+      {
+        throw std::out_of_range("pll: invalid decimation. Must be at least 1.");
+      }
+      gr::thread::scoped_lock guard(d_setlock);
+      d_decimation = decimation;
+      // restart the current group
+      d_decim_count = 0;
+      d_sum_freq = 0.0;
+      d_sum_error = 0.0;
+    }
+
+    void
+    pll_impl::set_average(bool average)
+    {
+      d_average = average;
+    }
+
+    void
+    pll_impl::set_lock_threshold(float threshold)
+    {
+      set_lock_thresholds(threshold, d_unlock_threshold);
+    }
+
+    void
+    pll_impl::set_unlock_threshold(float threshold)
+    {
+      set_lock_thresholds(d_lock_threshold, threshold);
+    }
+
+    void
+    pll_impl::set_lock_thresholds(float lock_threshold, float unlock_threshold)
+    {
+      if (lock_threshold < -1.0 || lock_threshold > 1.0)
+      {
+        throw std::out_of_range("pll: invalid lock threshold. Must be in [-1, 1].");
+      }
+      if (unlock_threshold < -1.0 || unlock_threshold > 1.0)
+      {
+        throw std::out_of_range("pll: invalid unlock threshold. Must be in [-1, 1].");
+      }
+      if (lock_threshold <= unlock_threshold)
+      {
+        throw std::out_of_range("pll: invalid lock thresholds. The lock threshold must be greater than the unlock threshold.");
+      }
+      gr::thread::scoped_lock guard(d_setlock);
+      d_lock_threshold = lock_threshold;
+      d_unlock_threshold = unlock_threshold;
+    }
+
+    void
+    pll_impl::set_lock_alpha(float alpha)
+    {
+      if (alpha <= 0.0 || alpha > 1.0)
+      {
+        throw std::out_of_range("pll: invalid lock detector gain. Must be in (0, 1].");
+      }
+      gr::thread::scoped_lock guard(d_setlock);
+      d_lock_alpha = alpha;
+    }
+
+    void
+    pll_impl::set_lock_decimation(int decimation)
+    {
+      if (decimation < 1)
+      {
+        throw std::out_of_range("pll: invalid lock detector decimation. Must be at least 1.");
+      }
+      gr::thread::scoped_lock guard(d_setlock);
+      d_lock_decimation = decimation;
+      d_lock_countdown = std::min(d_lock_countdown, decimation);
+    }
+
     /*******************************************************************
      * GET FUNCTIONS
      *******************************************************************/
@@ -385,5 +711,53 @@ namespace gr {
       return 0;
     }
 
+    bool
+    pll_impl::get_fast() const
+    {
+      return d_fast;
+    }
+
+    int
+    pll_impl::get_decimation() const
+    {
+      return d_decimation;
+    }
+
+    bool
+    pll_impl::get_average() const
+    {
+      return d_average;
+    }
+
+    float
+    pll_impl::get_lock_threshold() const
+    {
+      return d_lock_threshold;
+    }
+
+    float
+    pll_impl::get_unlock_threshold() const
+    {
+      return d_unlock_threshold;
+    }
+
+    float
+    pll_impl::get_lock_alpha() const
+    {
+      return d_lock_alpha;
+    }
+
+    int
+    pll_impl::get_lock_decimation() const
+    {
+      return d_lock_decimation;
+    }
+
+    bool
+    pll_impl::get_locked() const
+    {
+      return d_locked;
+    }
+
   } /* namespace ecss */
 } /* namespace gr */
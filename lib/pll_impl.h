@@ -22,6 +22,9 @@
 #define INCLUDED_ECSS_PLL_IMPL_H
 
 #include <ecss/pll.h>
+#include <pmt/pmt.h>
+#include "fast_math.h"
+#include "pmt_symbols.h"
 #include <vector>
 
 namespace gr {
@@ -39,6 +42,26 @@ namespace gr {
       //double branch_3_par, branch_3, branch_2, branch_2_3;
       double d_freq_central;
       std::vector<double> d_coefficients;
+      bool d_fast;
+      uint64_t d_phase_mask;                              /*!< Keeps the N most significant bits of the phase */
+      nco_lut d_nco;
+      std::vector<tag_t> d_tags;                          /*!< Tags of the current work window */
+
+      // lock detector
+      float d_lock_threshold;
+      float d_unlock_threshold;
+      float d_lock_alpha;
+      int d_lock_decimation;
+      int d_lock_countdown;                               /*!< Samples before the next evaluation of the lock metric */
+      double d_lock_metric;                               /*!< Averaged cosine of the phase error */
+      bool d_locked;
+
+      // decimation of the optional outputs
+      int d_decimation;
+      bool d_average;
+      int d_decim_count;                                  /*!< Samples of the current group already processed */
+      double d_sum_freq;
+      double d_sum_error;
 
       double mod_2pi(double in);                          /*! Keep the value between -2pi and 2pi */
       void reset();                                       /*! Reset all the registers */
@@ -47,6 +70,45 @@ namespace gr {
       double magnitude(gr_complexd sample);
       bool stop;
 
+      /*! \brief Apply a control tag
+      *
+      * \details
+      * Interprets the value of a "pll" tag (reset, stop, start or start(1e3))
+      * found in the current work window. The reset tags for the
+      * accumulator/modulator are added to port 3, on the decimated item
+      * \p offset, only if it is connected.
+      */
+      void handle_tag(const tag_t &tag, int offset, bool phase_delta_connected);
+
+      /*! \brief Update the lock detector
+      *
+      * \details
+      * Averages the new lock metric and publishes LOCK/UNLOCK on the
+      * "lock_out" port when the average crosses the thresholds.
+      */
+      void lock_detector(double metric);
+
+      /*! \brief Run the loop on a tag-free chunk of samples
+      *
+      * \details
+      * Processes \p nitems samples starting from the given pointers. The optional
+      * outputs can be NULL if the corresponding port is not connected, they are
+      * written at the index \p produced, which is advanced once every
+      * d_decimation samples.
+      */
+      void track(const gr_complex *input, gr_complex *output, float *frequency_output,
+                 float *phase_error, int64_t *phase_delta, int &produced, int nitems);
+
+      /*! \brief Run the loop on a tag-free chunk of samples in fast mode
+      *
+      * \details
+      * Same as track(), with the table NCO and the polynomial phase detector.
+      * The loop state is kept in local variables for the whole chunk. It is
+      * not used while the PLL is stopped.
+      */
+      void track_fast(const gr_complex *input, gr_complex *output, float *frequency_output,
+                      float *phase_error, int64_t *phase_delta, int &produced, int nitems);
+
       /*! \brief Integer phase converter
       *
       * converts the filter output into integer mathematics
@@ -102,9 +164,12 @@ namespace gr {
         pll_impl(int samp_rate, int N, const std::vector<double> &coefficients, float freq_central, float bw);
         ~pll_impl();
 
-        int work(int noutput_items,
-                 gr_vector_const_void_star &input_items,
-                 gr_vector_void_star &output_items);
+        void forecast(int noutput_items, gr_vector_int &ninput_items_required);
+
+        int general_work(int noutput_items,
+                         gr_vector_int &ninput_items,
+                         gr_vector_const_void_star &input_items,
+                         gr_vector_void_star &output_items);
 
         void set_N(int N);     
         void set_coefficients(const std::vector<double> &coefficients);      
@@ -112,11 +177,27 @@ namespace gr {
         void set_phase(float phase);       
         void set_freq_central(float freq);       
         void set_bw(float bw);
+        void set_fast(bool fast);
+        void set_decimation(int decimation);
+        void set_average(bool average);
+        void set_lock_threshold(float threshold);
+        void set_unlock_threshold(float threshold);
+        void set_lock_thresholds(float lock_threshold, float unlock_threshold);
+        void set_lock_alpha(float alpha);
+        void set_lock_decimation(int decimation);
         std::vector<double> get_coefficients() const;
         float get_frequency() const;      
         float get_phase() const;       
         float get_freq_central() const;
         float get_bw() const;
+        bool get_fast() const;
+        int get_decimation() const;
+        bool get_average() const;
+        float get_lock_threshold() const;
+        float get_unlock_threshold() const;
+        float get_lock_alpha() const;
+        int get_lock_decimation() const;
+        bool get_locked() const;
       };
 
   } // namespace ecss
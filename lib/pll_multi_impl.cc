@@ -0,0 +1,322 @@
+/* -*- c++ -*- */
+/*
+ * Copyright 2018 Antonio Miraglia - ISISpace.
+ *
+ * This is free software; you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation; either version 3, or (at your option)
+ * any later version.
+ *
+ * This software is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this software; see the file COPYING.  If not, write to
+ * the Free Software Foundation, Inc., 51 Franklin Street,
+ * Boston, MA 02110-1301, USA.
+ */
+
+#ifdef HAVE_CONFIG_H
+#include "config.h"
+#endif
+
+#include <gnuradio/io_signature.h>
+#include <gnuradio/expj.h>
+#include <math.h>
+#include <stdexcept>
+#include "pll_multi_impl.h"
+#include <vector>
+#include <algorithm>
+
+
+namespace gr {
+  namespace ecss {
+
+    #ifndef M_TWOPI
+    #define M_TWOPI (2.0*M_PI)
+    #endif
+
+    pll_multi::sptr
+    pll_multi::make(int samp_rate, int N, const std::vector<double> &coefficients, const std::vector<float> &freq_central, float bw)
+    {
+      return gnuradio::get_initial_sptr(new pll_multi_impl(samp_rate, N, coefficients, freq_central, bw));
+    }
+
+    pll_multi_impl::pll_multi_impl(int samp_rate, int N, const std::vector<double> &coefficients, const std::vector<float> &freq_central, float bw)
+        : gr::sync_block("pll_multi",
+                         gr::io_signature::make(freq_central.size(), freq_central.size(), sizeof(gr_complex)),
+                         gr::io_signature::make(freq_central.size(), freq_central.size(), sizeof(gr_complex))),
+          d_samp_rate(samp_rate), d_channels(freq_central.size()), d_bw(bw),
+          d_fast(false), d_nco(12), d_coefficients(3, 0.0)
+    {
+      if (d_channels < 1)
+      {
+        throw std::out_of_range("pll multi: at least one central frequency must be set.");
+      }
+
+      integrator_order_1.resize(d_channels, 0.0);
+      integrator_order_2_1.resize(d_channels, 0.0);
+      integrator_order_2_2.resize(d_channels, 0.0);
+      d_integer_phase.resize(d_channels, 0);
+      d_error.resize(d_channels, 0.0);
+      d_stop.resize(d_channels, 0);
+      d_freq_central.resize(d_channels, 0.0);
+      d_central_step.resize(d_channels, 0.0);
+      for (int c = 0; c < d_channels; c++)
+      {
+        set_freq_central(c, freq_central[c]);
+      }
+
+      set_tag_propagation_policy(TPP_DONT);
+      set_N(N);
+      set_coefficients(coefficients);
+      for (int c = 0; c < d_channels; c++)
+      {
+        reset(c);
+      }
+    }
+
+    pll_multi_impl::~pll_multi_impl()
+    {}
+
+    int
+    pll_multi_impl::work (int noutput_items,
+                          gr_vector_const_void_star &input_items,
+                          gr_vector_void_star &output_items)
+    {
+      // fetch the control tags of all the channels once and sort them by offset
+      d_channel_tags.clear();
+      for (int c = 0; c < d_channels; c++)
+      {
+        const uint64_t nread = nitems_read(c);
+        get_tags_in_range(d_tags, c, nread, nread + noutput_items, symbols::key_pll);
+        for (size_t t = 0; t < d_tags.size(); t++)
+        {
+          channel_tag tag = {(int)(d_tags[t].offset - nread), c, d_tags[t].value};
+          d_channel_tags.push_back(tag);
+        }
+      }
+      std::stable_sort(d_channel_tags.begin(), d_channel_tags.end(),
+                       [](const channel_tag &a, const channel_tag &b) { return a.offset < b.offset; });
+
+      int i = 0;
+      size_t t = 0;
+      while (i < noutput_items)
+      {
+        while (t < d_channel_tags.size() && d_channel_tags[t].offset == i)
+        {
+          handle_tag(d_channel_tags[t].channel, d_channel_tags[t].value);
+          t++;
+        }
+
+        int next = (t < d_channel_tags.size()) ? d_channel_tags[t].offset : noutput_items;
+
+        track(input_items, output_items, i, next - i);
+        i = next;
+      }
+      return noutput_items;
+    }
+
+    void
+    pll_multi_impl::handle_tag(int channel, const pmt::pmt_t &value)
+    {
+      if (pmt::eq(value, symbols::value_reset))
+      {
+        reset(channel);
+      }
+      else if (pmt::eq(value, symbols::value_stop))
+      {
+        d_stop[channel] = 1;
+        reset(channel);
+      }
+      else if (pmt::eq(value, symbols::value_start))
+      {
+        d_stop[channel] = 0;
+        reset(channel);
+      }
+      else if (pmt::eq(value, symbols::value_start_1e3))
+      {
+        d_stop[channel] = 0;
+      }
+      else if (pmt::is_pair(value) && pmt::eq(pmt::car(value), symbols::key_freq))
+      {
+        set_frequency(channel, pmt::to_double(pmt::cdr(value)));
+      }
+    }
+
+    void
+    pll_multi_impl::track(gr_vector_const_void_star &input_items, gr_vector_void_star &output_items,
+                          int offset, int nitems)
+    {
+      const double limit = (d_bw / d_samp_rate * M_TWOPI)/2;
+      const int shift = 64 - d_N;
+
+      for (int i = offset; i < offset + nitems; i++)
+      {
+        // mixer and phase detector of each channel
+        for (int c = 0; c < d_channels; c++)
+        {
+          const gr_complex *input = (const gr_complex *)input_items[c];
+          gr_complex *output = (gr_complex *)output_items[c];
+
+          if (d_fast)
+          {
+            output[i] = input[i] * std::conj(d_nco.expj(d_integer_phase[c] & d_phase_mask));
+            d_error[c] = fast_atan2(output[i].imag(), output[i].real());
+          }
+          else
+          {
+            double phase = (double)((d_integer_phase[c] >> shift) * precision) * M_PI;
+            output[i] = input[i] * gr_expj(-phase);
+            d_error[c] = atan2(output[i].imag(), output[i].real());
+          }
+        }
+
+        // loop filters and accumulators of all the channels, a stopped
+        // channel remains fixed on its central frequency
+        for (int c = 0; c < d_channels; c++)
+        {
+          double error = d_stop[c] ? 0.0 : d_error[c];
+
+          integrator_order_1[c] += d_coefficients[1] * error;
+          if (d_bw != 0)
+          {
+            integrator_order_1[c] = std::min(std::max(integrator_order_1[c], -limit), limit);
+          }
+          integrator_order_2_1[c] += d_coefficients[2] * error;
+          integrator_order_2_2[c] += integrator_order_2_1[c];
+
+          double filter_out = d_coefficients[0] * error +
+                              integrator_order_1[c] +
+                              integrator_order_2_2[c];
+          filter_out = d_stop[c] ? 0.0 : filter_out;
+
+          double step_phase = (filter_out + d_central_step[c]) / M_PI;
+          int64_t integer_step_phase = (int64_t)round(step_phase / precision);
+          d_integer_phase[c] += (integer_step_phase << shift);
+        }
+      }
+    }
+
+    void
+    pll_multi_impl::reset(int channel)
+    {
+      integrator_order_1[channel] = 0;
+      integrator_order_2_1[channel] = 0;
+      integrator_order_2_2[channel] = 0;
+      d_integer_phase[channel] = 0;
+    }
+
+    void
+    pll_multi_impl::check_channel(int channel) const
+    {
+      if (channel < 0 || channel >= d_channels)
+      {
+        throw std::out_of_range("pll multi: invalid channel.");
+      }
+    }
+
+    /*******************************************************************
+     * SET FUNCTIONS
+     *******************************************************************/
+
+    void
+    pll_multi_impl::set_N(int N)
+    {
+      if(N < 1 || N > 52) {
+        throw std::out_of_range ("pll multi: invalid number of bits. Must be in [1, 52].");
+      }
+      d_N = N;
+      precision = pow(2,(- (N - 1)));
+      d_phase_mask = ~(uint64_t)0 << (64 - N);
+    }
+
+    void
+    pll_multi_impl::set_coefficients(const std::vector<double> &coefficients)
+    {
+      if (coefficients.size() < 3)
+      {
+        // reset the third order integrators in case this is a second order filter
+        std::fill(integrator_order_2_1.begin(), integrator_order_2_1.end(), 0.0);
+        std::fill(integrator_order_2_2.begin(), integrator_order_2_2.end(), 0.0);
+      }
+      std::fill(d_coefficients.begin(), d_coefficients.end(), 0.0);
+      for(size_t i = 0; i < std::min(coefficients.size(), d_coefficients.size()); i++)
+      {
+        d_coefficients[i] = coefficients[i];
+      }
+    }
+
+    void
+    pll_multi_impl::set_frequency(int channel, float freq)
+    {
+      check_channel(channel);
+      integrator_order_1[channel] = (freq - d_freq_central[channel]) / d_samp_rate * M_TWOPI;
+    }
+
+    void
+    pll_multi_impl::set_freq_central(int channel, float freq)
+    {
+      check_channel(channel);
+      d_freq_central[channel] = freq;
+      d_central_step[channel] = d_freq_central[channel] / d_samp_rate * M_TWOPI;
+    }
+
+    void
+    pll_multi_impl::set_bw(float bw)
+    {
+      d_bw = bw;
+    }
+
+    void
+    pll_multi_impl::set_fast(bool fast)
+    {
+      d_fast = fast;
+    }
+
+    /*******************************************************************
+     * GET FUNCTIONS
+     *******************************************************************/
+
+    int
+    pll_multi_impl::get_channels() const
+    {
+      return d_channels;
+    }
+
+    std::vector<double>
+    pll_multi_impl::get_coefficients() const
+    {
+      return d_coefficients;
+    }
+
+    float
+    pll_multi_impl::get_frequency(int channel) const
+    {
+      check_channel(channel);
+      return d_freq_central[channel] + (integrator_order_1[channel] * d_samp_rate / M_TWOPI);
+    }
+
+    float
+    pll_multi_impl::get_freq_central(int channel) const
+    {
+      check_channel(channel);
+      return d_freq_central[channel];
+    }
+
+    float
+    pll_multi_impl::get_bw() const
+    {
+      return d_bw;
+    }
+
+    bool
+    pll_multi_impl::get_fast() const
+    {
+      return d_fast;
+    }
+
+  } /* namespace ecss */
+} /* namespace gr */
@@ -0,0 +1,101 @@
+/* -*- c++ -*- */
+/*
+ * Copyright 2018 Antonio Miraglia - ISISpace.
+ *
+ * This is free software; you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation; either version 3, or (at your option)
+ * any later version.
+ *
+ * This software is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this software; see the file COPYING.  If not, write to
+ * the Free Software Foundation, Inc., 51 Franklin Street,
+ * Boston, MA 02110-1301, USA.
+ */
+
+#ifndef INCLUDED_ECSS_PLL_MULTI_IMPL_H
+#define INCLUDED_ECSS_PLL_MULTI_IMPL_H
+
+#include <ecss/pll_multi.h>
+#include <pmt/pmt.h>
+#include "fast_math.h"
+#include "pmt_symbols.h"
+#include <vector>
+
+namespace gr {
+  namespace ecss {
+
+    class pll_multi_impl : public pll_multi
+    {
+      int d_N;
+      int d_samp_rate;
+      int d_channels;
+      float d_bw;
+      double precision;
+      bool d_fast;
+      uint64_t d_phase_mask;                              /*!< Keeps the N most significant bits of the phase */
+      nco_lut d_nco;
+      std::vector<double> d_coefficients;
+
+      // state of the loops, one element for each channel
+      std::vector<double> integrator_order_1, integrator_order_2_1, integrator_order_2_2;
+      std::vector<int64_t> d_integer_phase;
+      std::vector<double> d_error;
+      std::vector<char> d_stop;
+      std::vector<double> d_freq_central;
+      std::vector<double> d_central_step;                 /*!< Phase step of the central frequency of each channel */
+
+      struct channel_tag
+      {
+        int offset;
+        int channel;
+        pmt::pmt_t value;
+      };
+      std::vector<tag_t> d_tags;
+      std::vector<channel_tag> d_channel_tags;            /*!< Tags of all the channels of the current work window */
+
+      void reset(int channel);                            /*! Reset the registers of a channel */
+      void check_channel(int channel) const;
+      void handle_tag(int channel, const pmt::pmt_t &value);
+
+      /*! \brief Run the loops of all the channels on a tag-free chunk of samples
+      *
+      * \details
+      * For each sample, the phase detector of every channel is evaluated first,
+      * then the loop filters and the integer accumulators of all the channels are
+      * updated in a single pass on the state arrays.
+      */
+      void track(gr_vector_const_void_star &input_items, gr_vector_void_star &output_items,
+                 int offset, int nitems);
+
+      public:
+        pll_multi_impl(int samp_rate, int N, const std::vector<double> &coefficients, const std::vector<float> &freq_central, float bw);
+        ~pll_multi_impl();
+
+        int work(int noutput_items,
+                 gr_vector_const_void_star &input_items,
+                 gr_vector_void_star &output_items);
+
+        void set_N(int N);
+        void set_coefficients(const std::vector<double> &coefficients);
+        void set_frequency(int channel, float freq);
+        void set_freq_central(int channel, float freq);
+        void set_bw(float bw);
+        void set_fast(bool fast);
+        int get_channels() const;
+        std::vector<double> get_coefficients() const;
+        float get_frequency(int channel) const;
+        float get_freq_central(int channel) const;
+        float get_bw() const;
+        bool get_fast() const;
+      };
+
+  } // namespace ecss
+} // namespace gr
+
+#endif /* INCLUDED_ECSS_PLL_MULTI_IMPL_H */
@@ -0,0 +1,59 @@
+/* -*- c++ -*- */
+/*
+ * Copyright 2018 Antonio Miraglia - ISISpace.
+ *
+ * This is free software; you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation; either version 3, or (at your option)
+ * any later version.
+ *
+ * This software is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this software; see the file COPYING.  If not, write to
+ * the Free Software Foundation, Inc., 51 Franklin Street,
+ * Boston, MA 02110-1301, USA.
+ */
+
+#ifdef HAVE_CONFIG_H
+#include "config.h"
+#endif
+
+#include "pmt_symbols.h"
+
+namespace gr {
+  namespace ecss {
+    namespace symbols {
+
+      const pmt::pmt_t key_pll = pmt::mp("pll");
+      const pmt::pmt_t key_accumulator = pmt::mp("accumulator");
+      const pmt::pmt_t key_modulator = pmt::mp("modulator");
+      const pmt::pmt_t key_clock_slip = pmt::mp("clock_slip");
+
+      const pmt::pmt_t key_uplink = pmt::mp("uplink");
+      const pmt::pmt_t key_downlink = pmt::mp("downlink");
+      const pmt::pmt_t key_freq = pmt::mp("freq");
+      const pmt::pmt_t key_snr = pmt::mp("snr");
+      const pmt::pmt_t key_power = pmt::mp("power");
+
+      const pmt::pmt_t value_reset = pmt::mp("reset");
+      const pmt::pmt_t value_stop = pmt::mp("stop");
+      const pmt::pmt_t value_start = pmt::mp("start");
+      const pmt::pmt_t value_start_1e3 = pmt::mp("start(1e3)");
+
+      const pmt::pmt_t msg_lock = pmt::mp("LOCK");
+      const pmt::pmt_t msg_unlock = pmt::mp("UNLOCK");
+
+      const pmt::pmt_t port_async_out = pmt::mp("async_out");
+      const pmt::pmt_t port_lock_in = pmt::mp("lock_in");
+      const pmt::pmt_t port_lock_out = pmt::mp("lock_out");
+      const pmt::pmt_t port_threshold_msg = pmt::mp("threshold_msg");
+      const pmt::pmt_t port_ratio = pmt::mp("ratio");
+      const pmt::pmt_t port_peaks = pmt::mp("peaks");
+
+    } /* namespace symbols */
+  } /* namespace ecss */
+} /* namespace gr */
@@ -0,0 +1,75 @@
+/* -*- c++ -*- */
+/*
+ * Copyright 2018 Antonio Miraglia - ISISpace.
+ *
+ * This is free software; you can redistribute it and/or modify
+ * it under the terms of the GNU General Public License as published by
+ * the Free Software Foundation; either version 3, or (at your option)
+ * any later version.
+ *
+ * This software is distributed in the hope that it will be useful,
+ * but WITHOUT ANY WARRANTY; without even the implied warranty of
+ * MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ * GNU General Public License for more details.
+ *
+ * You should have received a copy of the GNU General Public License
+ * along with this software; see the file COPYING.  If not, write to
+ * the Free Software Foundation, Inc., 51 Franklin Street,
+ * Boston, MA 02110-1301, USA.
+ */
+
+#ifndef INCLUDED_ECSS_PMT_SYMBOLS_H
+#define INCLUDED_ECSS_PMT_SYMBOLS_H
+
+#include <pmt/pmt.h>
+
+namespace gr {
+  namespace ecss {
+
+    /*! \brief PMT symbols shared by the ecss blocks.
+     *
+     * \details
+     * Every call to pmt::intern/pmt::mp looks up the global symbol table of
+     * the pmt library. The tag keys, tag values, message ports and messages
+     * used by the ecss blocks are interned once, when the library is loaded,
+     * so that the blocks compare and publish them without any lookup in their
+     * work functions.
+     */
+    namespace symbols {
+
+      // tag keys
+      extern const pmt::pmt_t key_pll;                    /*!< "pll" */
+      extern const pmt::pmt_t key_accumulator;            /*!< "accumulator" */
+      extern const pmt::pmt_t key_modulator;              /*!< "modulator" */
+      extern const pmt::pmt_t key_clock_slip;             /*!< "clock_slip" */
+
+      // message keys
+      extern const pmt::pmt_t key_uplink;                 /*!< "uplink" */
+      extern const pmt::pmt_t key_downlink;               /*!< "downlink" */
+      extern const pmt::pmt_t key_freq;                   /*!< "freq" */
+      extern const pmt::pmt_t key_snr;                    /*!< "snr" */
+      extern const pmt::pmt_t key_power;                  /*!< "power" */
+
+      // tag values
+      extern const pmt::pmt_t value_reset;                /*!< "reset" */
+      extern const pmt::pmt_t value_stop;                 /*!< "stop" */
+      extern const pmt::pmt_t value_start;                /*!< "start" */
+      extern const pmt::pmt_t value_start_1e3;            /*!< "start(1e3)" */
+
+      // messages
+      extern const pmt::pmt_t msg_lock;                   /*!< "LOCK" */
+      extern const pmt::pmt_t msg_unlock;                 /*!< "UNLOCK" */
+
+      // message ports
+      extern const pmt::pmt_t port_async_out;             /*!< "async_out" */
+      extern const pmt::pmt_t port_lock_in;               /*!< "lock_in" */
+      extern const pmt::pmt_t port_lock_out;              /*!< "lock_out" */
+      extern const pmt::pmt_t port_threshold_msg;         /*!< "threshold_msg" */
+      extern const pmt::pmt_t port_ratio;                 /*!< "ratio" */
+      extern const pmt::pmt_t port_peaks;                 /*!< "peaks" */
+
+    } /* namespace symbols */
+  } /* namespace ecss */
+} /* namespace gr */
+
+#endif /* INCLUDED_ECSS_PMT_SYMBOLS_H */
@@ -24,23 +24,31 @@
 
 #include <gnuradio/io_signature.h>
 #include "signal_search_fft_v_impl.h"
+#include "pmt_symbols.h"
 #include <volk/volk.h>
+#include <algorithm>
+#include <limits>
 
 namespace gr
 {
   namespace ecss
   {
 
-    signal_search_fft_v::sptr
-    signal_search_fft_v::make(bool enable, int fftsize, int decimation, bool average, int wintype, float freq_central, float bandwidth, float freq_cutoff, float threshold, float samp_rate)
+    // budget of the anti-aliasing filter, in taps for each decimation phase
+    static const int TAPS_PER_PHASE = 24;
+
+    template <class T>
+    typename signal_search_fft_v<T>::sptr
+    signal_search_fft_v<T>::make(bool enable, int fftsize, int decimation, bool average, int wintype, float freq_central, float bandwidth, float freq_cutoff, float threshold, float samp_rate)
     {
-      return gnuradio::get_initial_sptr(new signal_search_fft_v_impl(enable, fftsize, decimation, average, wintype, freq_central, bandwidth, freq_cutoff, threshold, samp_rate));
+      return gnuradio::get_initial_sptr(new signal_search_fft_v_impl<T>(enable, fftsize, decimation, average, wintype, freq_central, bandwidth, freq_cutoff, threshold, samp_rate));
     }
 
-    signal_search_fft_v_impl::signal_search_fft_v_impl(bool enable, int fftsize, int decimation, bool average, int wintype, float freq_central, float bandwidth, float freq_cutoff, float threshold, float samp_rate)
+    template <class T>
+    signal_search_fft_v_impl<T>::signal_search_fft_v_impl(bool enable, int fftsize, int decimation, bool average, int wintype, float freq_central, float bandwidth, float freq_cutoff, float threshold, float samp_rate)
         : gr::block("signal_search_fft",
-                    gr::io_signature::make(1, 1, sizeof(gr_complex) * (decimation * fftsize)),
-                    gr::io_signature::make(1, 1, sizeof(gr_complex) * (decimation * fftsize))),
+                    gr::io_signature::make(1, 1, sizeof(T) * (decimation * fftsize)),
+                    gr::io_signature::make(1, 1, sizeof(T) * (decimation * fftsize))),
           d_wintype((filter::firdes::win_type)(wintype)),
           d_fftsize(fftsize), d_freq_central(freq_central),
           d_bandwidth(bandwidth), d_freq_cutoff(freq_cutoff),
@@ -49,13 +57,26 @@ namespace gr
           d_iir_noise(M_PI * freq_cutoff / (samp_rate / decimation)),
           d_average(average), d_decimation(decimation), d_enable(enable)
     {
+      if (decimation < 1)
+      {
+        throw std::out_of_range("signal search: invalid decimation. Must be a positive integer.");
+      }
       first = true;
-      float resamplig = (float)(1.0 / decimation);
       d_fftsize_half = (unsigned int)(floor(d_fftsize / 2.0));
+      d_bins = search_kernels<T>::bins(d_fftsize);
+      d_zero_bin = search_kernels<T>::zero_bin(d_fftsize);
+
+      d_fft = new typename search_kernels<T>::fft(d_fftsize);
 
-      d_fft = new fft::fft_complex(d_fftsize, true);
+      d_ntaps = 1;
+      d_decimator = new typename search_kernels<T>::fir_filter(decimation, std::vector<float>(1, 1.0));
 
-      pfb_decimator = new filter::kernel::pfb_arb_resampler_ccf(resamplig, filter::firdes::low_pass(1, samp_rate, 5000, 100), 32);
+      d_averages = 1;
+      d_overlap = 0.5;
+      welch_reset();
+
+      d_peaks = 0;
+      this->message_port_register_out(symbols::port_peaks);
 
       items_eval();
       create_buffers();
@@ -63,20 +84,28 @@ namespace gr
       average_reset();
     }
 
-    signal_search_fft_v_impl::~signal_search_fft_v_impl()
-    { }
+    template <class T>
+    signal_search_fft_v_impl<T>::~signal_search_fft_v_impl()
+    {
+      delete d_decimator;
+      delete d_fft;
+      destroy_buffers();
+    }
 
 
-    int 
-    signal_search_fft_v_impl::general_work(int noutput_items,
+    template <class T>
+    int
+    signal_search_fft_v_impl<T>::general_work(int noutput_items,
                                         gr_vector_int &ninput_items,
                                         gr_vector_const_void_star &input_items,
                                         gr_vector_void_star &output_items)
     {
-      gr_complex *in = (gr_complex *)input_items[0];
-      gr_complex *out = (gr_complex *)output_items[0];
+      gr::thread::scoped_lock guard(this->d_setlock);
 
-      int item_read;
+      const T *in = (const T *)input_items[0];
+      T *out = (T *)output_items[0];
+
+      const int vlen = d_decimation * d_fftsize;
       int temp_signal_band_max_index;
       uint out_items = 0;
       uint in_items = 0;
@@ -86,10 +115,25 @@ namespace gr
         {
 
           int index = i * d_fftsize * d_decimation;
+          const T *samples = &in[index];
+
+          if (d_decimation > 1)
+          {
+            // the filter reads the last ntaps - 1 samples of the previous vector
+            // and evaluates only the outputs kept by the decimation
+            memcpy(&d_history[d_ntaps - 1], &in[index], sizeof(T) * vlen);
+            d_decimator->filterNdec(&in_decimated[0], &d_history[0], d_fftsize, d_decimation);
+            memmove(&d_history[0], &d_history[vlen], sizeof(T) * (d_ntaps - 1));
 
-          int processed = pfb_decimator->filter(&in_decimated[0], &in[index], (d_decimation * d_fftsize), item_read);
+            samples = &in_decimated[0];
+          }
 
-          fft(d_fbuf, &in_decimated[0], d_fftsize);
+          spectrum(samples);
+
+          if (d_peaks > 0)
+          {
+            find_peaks();
+          }
 
           memcpy(searching_band, &d_fbuf[searching_first_items], sizeof(float) * bw_items);
 
@@ -129,14 +173,23 @@ namespace gr
             out_items++;
             if (out_items <= noutput_items)
             {
-              memcpy(&out[index], &in[index], sizeof(gr_complex) * d_fftsize * d_decimation);
+              // the detected vectors are packed at the start of the output
+              memcpy(&out[(out_items - 1) * vlen], &in[index], sizeof(T) * vlen);
               if (first == true)
               {
-                add_item_tag(0,                           // Port number
-                             nitems_written(0) + (index), // Offset
-                             pmt::intern("reset"),        // Key
-                             pmt::intern("pll")           // Value
-                );
+                this->add_item_tag(0,                                         // Port number
+                                   this->nitems_written(0) + (out_items - 1), // Offset
+                                   symbols::key_pll,                          // Key
+                                   symbols::value_reset                       // Value
+                                   );
+
+                // the PLL starts from the frequency of the detected peak
+                const float freq = peak_frequency(searching_first_items + temp_signal_band_max_index);
+                this->add_item_tag(0,                                         // Port number
+                                   this->nitems_written(0) + (out_items - 1), // Offset
+                                   symbols::key_pll,                          // Key
+                                   pmt::cons(symbols::key_freq, pmt::from_double(freq)) // Value
+                                   );
 
                 average_reset();
                 first = false;
@@ -158,19 +211,20 @@ namespace gr
         {
           std::cout << "out_items > noutput_items: " << out_items << " > " << noutput_items << std::endl;
         }
-        consume_each(noutput_items);
+        this->consume_each(noutput_items);
         return out_items;
       }
       else
       {
-        memcpy(&out[0], &in[0], sizeof(gr_complex) * noutput_items * d_fftsize * d_decimation);
-        consume_each(noutput_items);
+        memcpy(&out[0], &in[0], sizeof(T) * noutput_items * vlen);
+        this->consume_each(noutput_items);
         return noutput_items;
       }     
     }
 
-    void 
-    signal_search_fft_v_impl::fft(float *data_out, const gr_complex *data_in, int size)
+    template <>
+    void
+    signal_search_fft_v_impl<gr_complex>::fft(float *data_out, const gr_complex *data_in, int size)
     {
       if (d_window.size())
       {
@@ -190,8 +244,177 @@ namespace gr
       memcpy(&data_out[d_fftsize_half], d_tmpbuf, sizeof(float) * (d_fftsize_half + 1));
     }
 
-    void 
-    signal_search_fft_v_impl::items_eval()
+    template <>
+    void
+    signal_search_fft_v_impl<float>::fft(float *data_out, const float *data_in, int size)
+    {
+      if (d_window.size())
+      {
+        volk_32f_x2_multiply_32f(d_fft->get_inbuf(), data_in, &d_window.front(), size);
+      }
+      else
+      {
+        memcpy(d_fft->get_inbuf(), data_in, sizeof(float) * size);
+      }
+
+      // the real to complex fft returns the bins from 0 to samp_rate / 2 only,
+      // already in ascending frequency
+      d_fft->execute();
+      volk_32fc_magnitude_squared_32f(data_out, d_fft->get_outbuf(), d_bins);
+    }
+
+    template <class T>
+    void
+    signal_search_fft_v_impl<T>::spectrum(const T *samples)
+    {
+      if (d_averages == 1)
+      {
+        fft(d_fbuf, samples, d_fftsize);
+        return;
+      }
+
+      // the previous vector followed by the current one
+      memcpy(&d_segments[0], &d_segments[d_fftsize], sizeof(T) * d_fftsize);
+      memcpy(&d_segments[d_fftsize], samples, sizeof(T) * d_fftsize);
+      d_filled = std::min(d_filled + d_fftsize, 2 * d_fftsize);
+
+      // the segments end every hop samples of the stream, only the ones ending in
+      // the current vector are new and at most the last averages of them are kept
+      const int first_end = d_fftsize + d_hop - d_phase;
+      const int new_segments = (first_end <= 2 * d_fftsize) ? (2 * d_fftsize - first_end) / d_hop + 1 : 0;
+      d_phase = (d_phase + d_fftsize) % d_hop;
+
+      for (int end = first_end + std::max(new_segments - d_averages, 0) * d_hop; end <= 2 * d_fftsize; end += d_hop)
+      {
+        if (end - d_fftsize < 2 * d_fftsize - d_filled)
+        {
+          continue;
+        }
+
+        // the periodogram of each segment is evaluated once, the sum of the ring
+        // is updated with the expired and the new periodogram
+        float *periodogram = &d_periodograms[d_next * d_bins];
+        if (d_stored == d_averages)
+        {
+          volk_32f_x2_subtract_32f(&d_welch_sum[0], &d_welch_sum[0], periodogram, d_bins);
+        }
+        fft(periodogram, &d_segments[end - d_fftsize], d_fftsize);
+        volk_32f_x2_add_32f(&d_welch_sum[0], &d_welch_sum[0], periodogram, d_bins);
+        d_stored = std::min(d_stored + 1, d_averages);
+        d_next = (d_next + 1) % d_averages;
+
+        // once for each turn of the ring the sum is evaluated again, so that the
+        // rounding errors of the subtractions do not pile up
+        if (d_next == 0)
+        {
+          memcpy(&d_welch_sum[0], &d_periodograms[0], sizeof(float) * d_bins);
+          for (int k = 1; k < d_averages; k++)
+          {
+            volk_32f_x2_add_32f(&d_welch_sum[0], &d_welch_sum[0], &d_periodograms[k * d_bins], d_bins);
+          }
+        }
+      }
+
+      if (d_stored == 0)
+      {
+        // no segment is complete yet at the start of the stream
+        fft(d_fbuf, samples, d_fftsize);
+        return;
+      }
+      volk_32f_s32f_multiply_32f(d_fbuf, &d_welch_sum[0], 1.0f / d_stored, d_bins);
+    }
+
+    template <class T>
+    void
+    signal_search_fft_v_impl<T>::find_peaks()
+    {
+      const float *power = d_fbuf;
+
+      memcpy(&d_sorted[0], power, sizeof(float) * d_bins);
+      std::nth_element(d_sorted.begin(), d_sorted.begin() + d_bins / 2, d_sorted.end());
+      const float noise_floor = std::max(d_sorted[d_bins / 2] / (float)M_LN2, std::numeric_limits<float>::min());
+      const float level = d_threshold * noise_floor;
+
+      for (int b = 1; b < d_bins - 1; b++)
+      {
+        d_mask[b] = (power[b] > power[b - 1]) & (power[b] >= power[b + 1]) & (power[b] > level);
+      }
+
+      d_candidates.clear();
+      for (int b = 0; b < d_bins; b += 8)
+      {
+        uint64_t word;
+        memcpy(&word, &d_mask[b], sizeof(word));
+        if (word == 0)
+        {
+          continue;
+        }
+        for (int k = b; k < b + 8; k++)
+        {
+          if (d_mask[k])
+          {
+            d_candidates.push_back(k);
+          }
+        }
+      }
+
+      const int count = std::min((int)d_candidates.size(), d_peaks);
+      if (count == 0)
+      {
+        return;
+      }
+      std::partial_sort(d_candidates.begin(), d_candidates.begin() + count, d_candidates.end(),
+                        [power](uint32_t a, uint32_t b) { return power[a] > power[b]; });
+
+      for (int i = 0; i < count; i++)
+      {
+        const int bin = d_candidates[i];
+        d_peak_freq[i] = peak_frequency(bin);
+        d_peak_snr[i] = 10 * std::log10(power[bin] / noise_floor);
+        d_peak_power[i] = power[bin];
+      }
+
+      pmt::pmt_t msg = pmt::make_dict();
+      msg = pmt::dict_add(msg, symbols::key_freq, pmt::init_f32vector(count, &d_peak_freq[0]));
+      msg = pmt::dict_add(msg, symbols::key_snr, pmt::init_f32vector(count, &d_peak_snr[0]));
+      msg = pmt::dict_add(msg, symbols::key_power, pmt::init_f32vector(count, &d_peak_power[0]));
+      this->message_port_pub(symbols::port_peaks, msg);
+    }
+
+    template <class T>
+    float
+    signal_search_fft_v_impl<T>::peak_frequency(int bin) const
+    {
+      float delta = 0;
+      if (bin > 0 && bin < d_bins - 1)
+      {
+        const float tiny = std::numeric_limits<float>::min();
+        const float a = std::log(std::max(d_fbuf[bin - 1], tiny));
+        const float b = std::log(std::max(d_fbuf[bin], tiny));
+        const float c = std::log(std::max(d_fbuf[bin + 1], tiny));
+        const float curvature = a - 2 * b + c;
+        delta = (curvature < 0) ? 0.5f * (a - c) / curvature : 0.0f;
+      }
+      return (bin + delta - d_zero_bin) * d_samp_rate / d_decimation / d_fftsize;
+    }
+
+    template <class T>
+    void
+    signal_search_fft_v_impl<T>::welch_reset()
+    {
+      d_hop = std::max((int)round(d_fftsize * (1.0 - d_overlap)), 1);
+      d_filled = 0;
+      d_phase = 0;
+      d_next = 0;
+      d_stored = 0;
+      d_segments.assign(2 * d_fftsize, T(0));
+      d_periodograms.assign(d_averages > 1 ? d_averages * d_bins : 0, 0.0f);
+      d_welch_sum.assign(d_averages > 1 ? d_bins : 0, 0.0f);
+    }
+
+    template <class T>
+    void
+    signal_search_fft_v_impl<T>::items_eval()
     {
       int down_samp = d_samp_rate / d_decimation;
 
@@ -208,11 +431,42 @@ namespace gr
         bw_items = 14;
       }
 
-      searching_first_items = ((d_freq_central / down_samp) * d_fftsize) + d_fftsize_half - (bw_items / 2);
+      searching_first_items = ((d_freq_central / down_samp) * d_fftsize) + d_zero_bin - (bw_items / 2);
+      if (searching_first_items < 0 || searching_first_items + bw_items > d_bins)
+      {
+        throw std::out_of_range("signal search: invalid frequency central. The searched band must be within the spectrum of the decimated signal.");
+      }
+
+      design_decimator();
+    }
+
+    template <class T>
+    void
+    signal_search_fft_v_impl<T>::design_decimator()
+    {
+      if (d_decimation == 1)
+      {
+        d_ntaps = 1;
+        d_history.clear();
+        return;
+      }
+
+      const double rate = (double)d_samp_rate / d_decimation;
+      const double edge = std::abs(d_freq_central) + d_bandwidth / 2.0;
+
+      // the images of [rate - edge, rate + edge] fold onto the searched band,
+      // the Hamming window needs 53 * samp_rate / (22 * transition) taps
+      const double min_transition = 53.0 * d_samp_rate / (22.0 * TAPS_PER_PHASE * d_decimation);
+      const double transition = std::max(rate - 2.0 * edge, min_transition);
+
+      d_decimator->set_taps(filter::firdes::low_pass(1, d_samp_rate, rate / 2.0, transition));
+      d_ntaps = d_decimator->ntaps();
+      d_history.assign(d_ntaps - 1 + d_decimation * d_fftsize, T(0));
     }
 
-    void 
-    signal_search_fft_v_impl::buildwindow()
+    template <class T>
+    void
+    signal_search_fft_v_impl<T>::buildwindow()
     {
       d_window.clear();
       if (d_wintype != filter::firdes::WIN_NONE)
@@ -221,34 +475,56 @@ namespace gr
       }
     }
 
-    float 
-    signal_search_fft_v_impl::get_freq_central() const { return d_freq_central; }
+    template <class T>
+    float
+    signal_search_fft_v_impl<T>::get_freq_central() const { return d_freq_central; }
+
+    template <class T>
+    float
+    signal_search_fft_v_impl<T>::get_bandwidth() const { return d_bandwidth; }
 
-    float 
-    signal_search_fft_v_impl::get_bandwidth() const { return d_bandwidth; }
+    template <class T>
+    float
+    signal_search_fft_v_impl<T>::get_freq_cutoff() const { return d_freq_cutoff; }
 
-    float 
-    signal_search_fft_v_impl::get_freq_cutoff() const { return d_freq_cutoff; }
+    template <class T>
+    float
+    signal_search_fft_v_impl<T>::get_threshold() const { return 10 * std::log10(d_threshold); }
 
-    float 
-    signal_search_fft_v_impl::get_threshold() const { return 10 * std::log10(d_threshold); }
+    template <class T>
+    bool
+    signal_search_fft_v_impl<T>::get_average() const { return d_average; }
 
-    bool 
-    signal_search_fft_v_impl::get_average() const { return d_average; }
+    template <class T>
+    bool
+    signal_search_fft_v_impl<T>::get_enable() const { return d_enable; }
 
-    bool 
-    signal_search_fft_v_impl::get_enable() const { return d_enable; }
 
+    template <class T>
+    int
+    signal_search_fft_v_impl<T>::get_decimation() const { return d_decimation; }
 
-    int 
-    signal_search_fft_v_impl::get_decimation() const { return d_decimation; }
+    template <class T>
+    int
+    signal_search_fft_v_impl<T>::get_averages() const { return d_averages; }
 
-    int 
-    signal_search_fft_v_impl::get_fftsize() const { return d_fftsize; }
+    template <class T>
+    float
+    signal_search_fft_v_impl<T>::get_overlap() const { return d_overlap; }
 
-    void 
-    signal_search_fft_v_impl::set_freq_central(float freq_central)
+    template <class T>
+    int
+    signal_search_fft_v_impl<T>::get_peaks() const { return d_peaks; }
+
+    template <class T>
+    int
+    signal_search_fft_v_impl<T>::get_fftsize() const { return d_fftsize; }
+
+    template <class T>
+    void
+    signal_search_fft_v_impl<T>::set_freq_central(float freq_central)
     {
+      gr::thread::scoped_lock guard(this->d_setlock);
 
       if (abs(freq_central) >= (d_samp_rate / (2 * d_decimation)))
       {
@@ -258,8 +534,11 @@ namespace gr
       items_eval();
     }
 
-    void signal_search_fft_v_impl::set_bandwidth(float bandwidth)
+    template <class T>
+    void
+    signal_search_fft_v_impl<T>::set_bandwidth(float bandwidth)
     {
+      gr::thread::scoped_lock guard(this->d_setlock);
 
       if (bandwidth >= (d_samp_rate / (3 * d_decimation)) || bandwidth < 0)
       {
@@ -269,8 +548,9 @@ namespace gr
       items_eval();
     }
 
-    void 
-    signal_search_fft_v_impl::set_freq_cutoff(float freq_cutoff)
+    template <class T>
+    void
+    signal_search_fft_v_impl<T>::set_freq_cutoff(float freq_cutoff)
     {
 
       if (freq_cutoff > (d_samp_rate / (d_decimation) || freq_cutoff < 0))
@@ -284,31 +564,80 @@ namespace gr
       average_reset();
     }
 
-    void 
-    signal_search_fft_v_impl::set_threshold(float threshold)
+    template <class T>
+    void
+    signal_search_fft_v_impl<T>::set_threshold(float threshold)
     {
       d_threshold = std::pow(10.0, threshold / 10);
     }
 
 
-    void 
-    signal_search_fft_v_impl::set_average(bool average)
+    template <class T>
+    void
+    signal_search_fft_v_impl<T>::set_average(bool average)
     {
       d_average = average;
       average_reset();
     }
 
-    void 
-    signal_search_fft_v_impl::set_enable(bool enable)
+    template <class T>
+    void
+    signal_search_fft_v_impl<T>::set_enable(bool enable)
     {
       d_enable = enable;
     }
 
-    void 
-    signal_search_fft_v_impl::create_buffers()
+    template <class T>
+    void
+    signal_search_fft_v_impl<T>::set_averages(int averages)
     {
+      if (averages < 1)
+      {
+        throw std::out_of_range("signal search: invalid number of averages. Must be a positive integer.");
+      }
+      gr::thread::scoped_lock guard(this->d_setlock);
+      d_averages = averages;
+      welch_reset();
+    }
 
-      in_decimated.resize((d_fftsize));
+    template <class T>
+    void
+    signal_search_fft_v_impl<T>::set_overlap(float overlap)
+    {
+      if (overlap < 0 || overlap >= 1)
+      {
+        throw std::out_of_range("signal search: invalid overlap. Must be in [0, 1).");
+      }
+      gr::thread::scoped_lock guard(this->d_setlock);
+      d_overlap = overlap;
+      welch_reset();
+    }
+
+    template <class T>
+    void
+    signal_search_fft_v_impl<T>::set_peaks(int peaks)
+    {
+      if (peaks < 0)
+      {
+        throw std::out_of_range("signal search: invalid number of peaks. Must be positive, or 0 to disable the peak list.");
+      }
+      gr::thread::scoped_lock guard(this->d_setlock);
+      d_peaks = peaks;
+      d_peak_freq.resize(peaks);
+      d_peak_snr.resize(peaks);
+      d_peak_power.resize(peaks);
+    }
+
+    template <class T>
+    void
+    signal_search_fft_v_impl<T>::create_buffers()
+    {
+
+      in_decimated.resize(d_fftsize);
+
+      d_sorted.resize(d_bins);
+      d_mask.assign(d_bins + 8, 0);
+      d_candidates.reserve(d_bins);
 
       searching_band = (float *)volk_malloc(bw_items * sizeof(float), volk_get_alignment());
       memset(searching_band, 0, bw_items * sizeof(float));
@@ -332,14 +661,17 @@ namespace gr
 
       d_fbuf = (float *)volk_malloc(d_fftsize * sizeof(float), volk_get_alignment());
       memset(d_fbuf, 0, d_fftsize * sizeof(float));
+
     }
 
-    void 
-    signal_search_fft_v_impl::destroy_buffers()
+    template <class T>
+    void
+    signal_search_fft_v_impl<T>::destroy_buffers()
     {
       in_decimated.clear();
 
       volk_free(searching_band);
+      volk_free(signal_band_acc);
       volk_free(signal_band_max_index);
       volk_free(noise_band_acc);
       volk_free(d_residbuf);
@@ -348,12 +680,16 @@ namespace gr
       volk_free(d_fbuf);
     }
 
-    void 
-    signal_search_fft_v_impl::average_reset()
+    template <class T>
+    void
+    signal_search_fft_v_impl<T>::average_reset()
     {
       d_iir_signal.reset();
       d_iir_noise.reset();
     }
 
+    template class signal_search_fft_v<gr_complex>;
+    template class signal_search_fft_v<float>;
+
   } /* namespace ecss */
 } /* namespace gr */
@@ -24,7 +24,7 @@
 #include <ecss/signal_search_fft_v.h>
 #include <gnuradio/filter/single_pole_iir.h>
 #include <gnuradio/filter/firdes.h>
-#include <gnuradio/filter/pfb_arb_resampler.h>
+#include <gnuradio/filter/fir_filter.h>
 #include <gnuradio/fft/fft.h>
 #include <vector>
 
@@ -33,7 +33,37 @@ namespace gr
   namespace ecss
   {
 
-    class signal_search_fft_v_impl : public signal_search_fft_v
+    /*!
+     * \brief Filter and fft kernels of each input type.
+     *
+     * \details
+     * The complex spectrum has fftsize bins, shifted so that the frequency 0 is at
+     * fftsize / 2. The real input is transformed with a real to complex fft, that
+     * returns the fftsize / 2 + 1 bins from 0 to samp_rate / 2 only.
+     */
+    template <class T>
+    struct search_kernels;
+
+    template <>
+    struct search_kernels<gr_complex>
+    {
+      typedef filter::kernel::fir_filter_ccf fir_filter;
+      typedef fft::fft_complex fft;
+      static int bins(int fftsize) { return fftsize; }
+      static int zero_bin(int fftsize) { return fftsize / 2; }
+    };
+
+    template <>
+    struct search_kernels<float>
+    {
+      typedef filter::kernel::fir_filter_fff fir_filter;
+      typedef fft::fft_real_fwd fft;
+      static int bins(int fftsize) { return fftsize / 2 + 1; }
+      static int zero_bin(int) { return 0; }
+    };
+
+    template <class T>
+    class signal_search_fft_v_impl : public signal_search_fft_v<T>
     {
       private:
         bool first;
@@ -50,6 +80,8 @@ namespace gr
         float signal_band_p, signal_band_avg;
         int d_fftsize;
         int d_fftsize_half;
+        int d_bins;                                       /*!< Bins of the power spectrum */
+        int d_zero_bin;                                   /*!< Bin of the frequency 0 */
         int bw_items;
         int searching_first_items;
         filter::firdes::win_type d_wintype;
@@ -59,9 +91,25 @@ namespace gr
         filter::single_pole_iir<float, float, float> d_iir_signal;
         filter::single_pole_iir<float, float, float> d_iir_noise;
 
-        filter::kernel::pfb_arb_resampler_ccf *pfb_decimator;
-        // std::vector<gr_complex> d_new_taps;
-        fft::fft_complex *d_fft;
+        typename search_kernels<T>::fir_filter *d_decimator;
+        std::vector<T> d_history;                         /*!< Last ntaps - 1 input samples followed by the current vector */
+        int d_ntaps;
+        int d_averages;
+        float d_overlap;
+        int d_hop;                                        /*!< Distance between two consecutive Welch segments */
+        int d_filled;                                     /*!< Valid samples in d_segments */
+        int d_phase;                                      /*!< Samples since the end of the last Welch segment */
+        int d_next;                                       /*!< Slot of the ring for the next periodogram */
+        int d_stored;                                     /*!< Periodograms stored in the ring */
+        std::vector<T> d_segments;                        /*!< Previous and current decimated vector */
+        std::vector<float> d_periodograms;                /*!< Ring of the last averages periodograms */
+        std::vector<float> d_welch_sum;                   /*!< Sum of the periodograms in the ring */
+        int d_peaks;
+        std::vector<float> d_sorted;                      /*!< Copy of the spectrum partially sorted for the median */
+        std::vector<uint8_t> d_mask;                      /*!< Local maxima above the level, padded to a multiple of 8 */
+        std::vector<uint32_t> d_candidates;
+        std::vector<float> d_peak_freq, d_peak_snr, d_peak_power;
+        typename search_kernels<T>::fft *d_fft;
 
         gr_complex *d_residbuf;
         double *d_magbuf;
@@ -73,9 +121,44 @@ namespace gr
         float *d_tmpbuf;
         float *d_fbuf;
 
-        std::vector<gr_complex> in_decimated;
+        std::vector<T> in_decimated;
+
+        void fft(float *data_out, const T *data_in, int size);
+
+        /*! \brief Evaluate in d_fbuf the power spectrum of the current vector
+        *
+        * \details
+        * With averages > 1 the spectrum is the Welch average of the periodograms
+        * of the last averages segments, which end every fftsize * (1 - overlap)
+        * samples of the stream. The periodogram of each segment is evaluated once,
+        * when the segment ends, and kept in a ring: for each vector only the new
+        * segments are transformed and their power is added to the sum of the ring,
+        * while the expired one is subtracted. When the hop divides fftsize the most
+        * recent segment ends with the current vector, so no further input is waited for.
+        */
+        void spectrum(const T *samples);
+        void welch_reset();
 
-        void fft(float *data_out, const gr_complex *data_in, int size);
+        /*! \brief Publish the strongest peaks of the spectrum in d_fbuf
+        *
+        * \details
+        * The noise floor is the mean power of a noise bin, evaluated from the median
+        * of the spectrum (the power of a noise bin is exponential, its median is
+        * ln(2) times its mean). The local maxima higher than threshold times the
+        * floor are marked on the whole spectrum with a branch-free loop, collected
+        * skipping 8 empty bins at a time, and the strongest ones are published.
+        */
+        void find_peaks();
+
+        /*! \brief Return the frequency of the peak of d_fbuf at \p bin, with a sub-bin resolution
+        *
+        * \details
+        * The vertex of the parabola through the logarithm of the power of the bin and
+        * of its two neighbours (Gaussian interpolation). Its worst case bias on a sine
+        * is 0.003 bins with the Blackman-Harris window, 0.016 bins with the Hann and
+        * Hamming windows and 0.17 bins without window.
+        */
+        float peak_frequency(int bin) const;
 
         void create_buffers();
         void destroy_buffers();
@@ -83,6 +166,16 @@ namespace gr
         void items_eval();
         void average_reset();
 
+        /*! \brief Design the anti-aliasing filter of the decimator
+        *
+        * \details
+        * The low-pass filter keeps the searched band, |freq_central| + bandwidth / 2,
+        * free from the images folded by the decimation. Its transition width is
+        * widened when the filter would exceed the budget of TAPS_PER_PHASE taps
+        * for each polyphase branch, and the state of the filter restarts.
+        */
+        void design_decimator();
+
       public:
       signal_search_fft_v_impl(bool enable, int fftsize, int decimation, bool average, int wintype, float freq_central, float bandwidth, float freq_cutoff, float threshold, float samp_rate);
       ~signal_search_fft_v_impl();
@@ -100,6 +193,9 @@ namespace gr
       int get_decimation() const;
       int get_fftsize() const;
       bool get_enable() const;
+      int get_averages() const;
+      float get_overlap() const;
+      int get_peaks() const;
 
       void set_freq_central(float freq_central);
       void set_bandwidth(float bandwidth);
@@ -107,6 +203,9 @@ namespace gr
       void set_threshold(float threshold);
       void set_average(bool average);
       void set_enable(bool enable);
+      void set_averages(int averages);
+      void set_overlap(float overlap);
+      void set_peaks(int peaks);
     };
 
   } // namespace ecss
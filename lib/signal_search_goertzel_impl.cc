@@ -23,6 +23,7 @@
 
 #include <gnuradio/io_signature.h>
 #include "signal_search_goertzel_impl.h"
+#include "pmt_symbols.h"
 #include <volk/volk.h>
 #include <gnuradio/sincos.h>
 #include <gnuradio/math.h>
@@ -57,8 +58,8 @@ namespace gr{
       set_size();
       average_reset();
       coeff_eval(freq_central, bandwidth);
-      message_port_register_in(pmt::mp("lock_in"));
-      set_msg_handler(pmt::mp("lock_in"), [this](pmt::pmt_t msg) { this->handle_lockmsg(msg); });
+      message_port_register_in(symbols::port_lock_in);
+      set_msg_handler(symbols::port_lock_in, [this](pmt::pmt_t msg) { this->handle_lockmsg(msg); });
     }
 
     signal_search_goertzel_impl::~signal_search_goertzel_impl()
@@ -67,11 +68,11 @@ namespace gr{
     void 
     signal_search_goertzel_impl::handle_lockmsg(pmt::pmt_t msg)
     {
-      if(pmt::eqv(msg, pmt::mp("LOCK")) )
+      if(pmt::eqv(msg, symbols::msg_lock) )
       {
         d_locked = true;
       }
-      else if(pmt::eqv(msg, pmt::mp("UNLOCK")) )
+      else if(pmt::eqv(msg, symbols::msg_unlock) )
       {
         d_locked = false;
         first = true;
@@ -110,8 +111,8 @@ namespace gr{
           std::cout<<"INSERTING PLL STOP TAG - First iteration"<<std::endl;
           add_item_tag(0,                         // Port number
                     nitems_written(0) + (i),      // Offset
-                    pmt::intern("pll"),           // Key
-                    pmt::intern("stop")           // Value
+                    symbols::key_pll,             // Key
+                    symbols::value_stop           // Value
                     );
           first = false;
       }
@@ -147,8 +148,8 @@ namespace gr{
               std::cout<<"INSERTING PLL START TAG"<<std::endl;
               add_item_tag(0,                           // Port number
                           nitems_written(0) + (i),      // Offset
-                          pmt::intern("pll"),           // Key
-                          pmt::intern("start")          // Value
+                          symbols::key_pll,             // Key
+                          symbols::value_start          // Value
             );
               // average_reset();
             }
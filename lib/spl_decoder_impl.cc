@@ -24,31 +24,66 @@
 
 #include <gnuradio/io_signature.h>
 #include "spl_decoder_impl.h"
+#include "pmt_symbols.h"
 #include <volk/volk.h>
+#include <algorithm>
+#include <cstring>
+#include <stdexcept>
 
 namespace gr {
   namespace ecss {
 
     spl_decoder::sptr
-    spl_decoder::make()
+    spl_decoder::make(decision_t decision)
     {
       return gnuradio::get_initial_sptr
-        (new spl_decoder_impl());
+        (new spl_decoder_impl(decision));
+    }
+
+    static int
+    output_size(decision_t decision)
+    {
+      switch (decision)
+      {
+        case DECISION_HARD:
+        case DECISION_SOFT_INT8:
+          return sizeof(char);
+        case DECISION_SOFT:
+          return sizeof(float);
+        default:
+          throw std::out_of_range("spl decoder: invalid decision.");
+      }
     }
 
     /*
      * The private constructor
      */
-    spl_decoder_impl::spl_decoder_impl()
+    spl_decoder_impl::spl_decoder_impl(decision_t decision)
         : gr::sync_decimator("spl_decoder",
                              gr::io_signature::make(1, 1, sizeof(float)),
-                             gr::io_signature::make(1, 1, sizeof(char)), 2)
+                             gr::io_signature::make(1, 1, output_size(decision)), 2),
+          d_decision(decision), d_packed(false),
+          d_offset(1), d_window(0), d_threshold(0.35), d_slips(0)
     {
-      d_clock = 0;
+      const size_t alignment = volk_get_alignment();
+      d_first_half = (float *)volk_malloc(BLOCK_SIZE * sizeof(float), alignment);
+      d_second_half = (float *)volk_malloc(BLOCK_SIZE * sizeof(float), alignment);
+      d_difference = (float *)volk_malloc(BLOCK_SIZE * sizeof(float), alignment);
+      d_bits = (int8_t *)volk_malloc(BLOCK_SIZE * sizeof(int8_t), alignment);
+      set_endianness(GR_MSB_FIRST);
+      set_slip_window(0);
+
+      // one item of history to slip back by one half-symbol
+      set_history(2);
     }
 
     spl_decoder_impl::~spl_decoder_impl()
-    { }
+    {
+      volk_free(d_first_half);
+      volk_free(d_second_half);
+      volk_free(d_difference);
+      volk_free(d_bits);
+    }
 
     int
     spl_decoder_impl::work(int noutput_items,
@@ -56,50 +91,206 @@ namespace gr {
         gr_vector_void_star &output_items)
     {
       const float *in = (const float *) input_items[0];
-      char *out = (char *) output_items[0];
-      int datain1;
-      int datain2;
-      int temp_data1;
-      int temp_data2;
+      const int nbits = d_packed ? 8 * noutput_items : noutput_items;
 
-      for (size_t i = 0; i < noutput_items; i++)
+      // the blocks fit the scratch buffers, a block of packed bits is made of whole bytes
+      for (int i = 0; i < nbits; i += BLOCK_SIZE)
       {
-        datain1 = data_converter(in[i*2]);
-        datain2 = data_converter(in[i*2 + 1]);
-
-        if (datain1 == d_clock)
-          temp_data1 = 0;
-        else
-          temp_data1 = 1;
-        toggle_clock();
-
-        if (datain2 == d_clock)
-          temp_data2 = 0;
-        else
-          temp_data2 = 1;
-        toggle_clock();
-
-        out[i] = (char)temp_data1;
+        const int n = std::min(BLOCK_SIZE, nbits - i);
+        split(in, i, n);
+        volk_32f_x2_subtract_32f(d_difference, d_first_half, d_second_half, n);
+
+        switch (d_decision)
+        {
+          case DECISION_SOFT:
+            volk_32f_s32f_multiply_32f((float *)output_items[0] + i, d_difference, 0.5f, n);
+            break;
+          case DECISION_SOFT_INT8:
+            // rounded and saturated to [-128, 127]
+            volk_32f_s32f_convert_8i((int8_t *)output_items[0] + i, d_difference, 32.0f, n);
+            break;
+          default:
+            if (d_packed)
+            {
+              unsigned char *out = (unsigned char *)output_items[0] + i / 8;
+              volk_32f_binary_slicer_8i(d_bits, d_difference, n);
+
+              // with 8 bytes of 0 or 1 in a word, each bit of the product lands once
+              // in the top byte, without carries
+              for (int j = 0; j < n / 8; j++)
+              {
+                uint64_t word;
+                memcpy(&word, d_bits + 8 * j, sizeof(word));
+                out[j] = (unsigned char)((word * d_pack_multiplier) >> 56);
+              }
+            }
+            else
+            {
+              volk_32f_binary_slicer_8i((int8_t *)output_items[0] + i, d_difference, n);
+            }
+        }
       }
       return noutput_items;
     }
 
     void
-    spl_decoder_impl::toggle_clock(){
-      if (d_clock == 1)
-        d_clock = 0;
-      else
-        d_clock = 1;
+    spl_decoder_impl::split(const float *in, int bit, int nbits)
+    {
+      // the clock is low during the first half of each bit, so a bit one is a
+      // high first half followed by a low second half
+      int i = 0;
+      while (i < nbits)
+      {
+        const int n = nbits - i;
+        volk_32fc_deinterleave_32f_x2(d_first_half + i, d_second_half + i,
+                                      (const lv_32fc_t *)(in + d_offset + 2 * (bit + i)), n);
+        if (d_window == 0)
+        {
+          return;
+        }
+
+        const int violation = detect(d_first_half + i, d_second_half + i, n);
+        if (violation == n)
+        {
+          return;
+        }
+
+        // the bits after the violation are split again with the new phase
+        slip(bit + i + violation);
+        i += violation + 1;
+      }
     }
 
     int
-    spl_decoder_impl::data_converter(float in){
-      if(in >= 0.0)
-        return 1;
-      else
-        return 0;
+    spl_decoder_impl::detect(const float *first, const float *second, int nbits)
+    {
+      // a violation is a pair of half-symbols with the same sign
+      volk_32f_x2_multiply_32f(d_difference, first, second, nbits);
+      volk_32f_binary_slicer_8i(d_bits, d_difference, nbits);
+
+      // sliding sum on the window, the first bit exceeding the threshold is
+      // selected without branches
+      int violation = nbits;
+      for (int i = 0; i < nbits; i++)
+      {
+        d_violations += d_bits[i] - d_ring[d_ring_index];
+        d_ring[d_ring_index] = d_bits[i];
+        d_ring_index = (d_ring_index + 1 == d_window) ? 0 : d_ring_index + 1;
+        violation = (d_violations > d_max_violations && violation == nbits) ? i : violation;
+      }
+      return violation;
+    }
+
+    void
+    spl_decoder_impl::slip(int bit)
+    {
+      // the window after the violation has been filled with the old phase
+      d_offset ^= 1;
+      reset_window();
+      d_slips++;
+      add_item_tag(0,                                                 // Port number
+                   nitems_written(0) + (d_packed ? bit / 8 : bit),    // Offset
+                   symbols::key_clock_slip,                           // Key
+                   pmt::from_uint64(d_slips)                          // Value
+                   );
+    }
+
+    void
+    spl_decoder_impl::reset_window()
+    {
+      std::fill(d_ring.begin(), d_ring.end(), 0);
+      d_violations = 0;
+      d_ring_index = 0;
+    }
+
+    void
+    spl_decoder_impl::set_packed(bool packed)
+    {
+      if (packed && d_decision != DECISION_HARD)
+      {
+        throw std::out_of_range("spl decoder: the packed output is available with hard decisions only.");
+      }
+      d_packed = packed;
+      set_decimation(packed ? 16 : 2);
+    }
+
+    void
+    spl_decoder_impl::set_endianness(endianness_t endianness)
+    {
+      // the words are loaded little endian: the first bit is the lowest byte
+      switch (endianness)
+      {
+        case GR_MSB_FIRST:
+          d_pack_multiplier = 0x8040201008040201ULL;
+          break;
+        case GR_LSB_FIRST:
+          d_pack_multiplier = 0x0102040810204080ULL;
+          break;
+        default:
+          throw std::out_of_range("spl decoder: invalid endianness.");
+      }
+      d_endianness = endianness;
+    }
+
+    void
+    spl_decoder_impl::set_slip_window(int window)
+    {
+      if (window < 0)
+      {
+        throw std::out_of_range("spl decoder: invalid slip window. Must be positive, or 0 to disable the detector.");
+      }
+      d_window = window;
+      d_ring.assign(window, 0);
+      d_max_violations = (int)(d_threshold * d_window);
+      reset_window();
+    }
+
+    void
+    spl_decoder_impl::set_slip_threshold(float threshold)
+    {
+      if (!(threshold > 0 && threshold < 1))
+      {
+        throw std::out_of_range("spl decoder: invalid slip threshold. Must be in (0, 1).");
+      }
+      d_threshold = threshold;
+      d_max_violations = (int)(d_threshold * d_window);
+    }
+
+    bool
+    spl_decoder_impl::get_packed() const
+    {
+      return d_packed;
+    }
+
+    endianness_t
+    spl_decoder_impl::get_endianness() const
+    {
+      return d_endianness;
+    }
+
+    decision_t
+    spl_decoder_impl::get_decision() const
+    {
+      return d_decision;
+    }
+
+    int
+    spl_decoder_impl::get_slip_window() const
+    {
+      return d_window;
+    }
+
+    float
+    spl_decoder_impl::get_slip_threshold() const
+    {
+      return d_threshold;
+    }
+
+    uint64_t
+    spl_decoder_impl::get_slips() const
+    {
+      return d_slips;
     }
 
   } /* namespace ecss */
 } /* namespace gr */
-
@@ -17,10 +17,13 @@
  * the Free Software Foundation, Inc., 51 Franklin Street,
  * Boston, MA 02110-1301, USA.
  */
+
 #ifndef INCLUDED_ECSS_SPL_DECODER_IMPL_H
 #define INCLUDED_ECSS_SPL_DECODER_IMPL_H
 
 #include <ecss/spl_decoder.h>
+#include <cstdint>
+#include <vector>
 
 namespace gr {
   namespace ecss {
@@ -28,22 +31,62 @@ namespace gr {
     class spl_decoder_impl : public spl_decoder
     {
       private:
-        int d_clock;
-        void toggle_clock();
-        int data_converter(float in);
+        static const int BLOCK_SIZE = 1024;               /*!< Bits decoded in each pass on the scratch buffers */
+
+        decision_t d_decision;
+        bool d_packed;
+        endianness_t d_endianness;
+        uint64_t d_pack_multiplier;                       /*!< Gathers 8 bytes of 0/1 in the top byte, in the selected order */
+        float *d_first_half;                              /*!< First half-symbol of each bit */
+        float *d_second_half;                             /*!< Second half-symbol of each bit */
+        float *d_difference;                              /*!< First half minus second half of each bit */
+        int8_t *d_bits;                                   /*!< Decoded bits, one for each byte */
+
+        // clock phase detector
+        int d_offset;                                     /*!< Input item of the first bit: 1 with the initial phase, 0 after a slip */
+        int d_window;
+        float d_threshold;
+        int d_max_violations;                             /*!< Violations of the window that slip the phase */
+        int d_violations;                                 /*!< Violations of the last window bits */
+        int d_ring_index;
+        std::vector<int8_t> d_ring;                       /*!< Violation flags of the last window bits */
+        uint64_t d_slips;
+
+        /*! \brief Split the half-symbols of \p nbits bits (at most BLOCK_SIZE) from
+         * the bit \p bit of the work call, slipping the clock phase when needed. */
+        void split(const float *in, int bit, int nbits);
+
+        /*! \brief Update the window with \p nbits bits, return the bit where the
+         * violations exceed the threshold or \p nbits. */
+        int detect(const float *first, const float *second, int nbits);
+
+        /*! \brief Slip the clock phase by one half-symbol, the tag goes on the bit \p bit. */
+        void slip(int bit);
+
+        void reset_window();
 
       public:
-        spl_decoder_impl();
+        spl_decoder_impl(decision_t decision);
         ~spl_decoder_impl();
 
         // Where all the action really happens
         int work(int noutput_items,
             gr_vector_const_void_star &input_items,
             gr_vector_void_star &output_items);
+
+        void set_packed(bool packed);
+        void set_endianness(endianness_t endianness);
+        void set_slip_window(int window);
+        void set_slip_threshold(float threshold);
+        bool get_packed() const;
+        endianness_t get_endianness() const;
+        decision_t get_decision() const;
+        int get_slip_window() const;
+        float get_slip_threshold() const;
+        uint64_t get_slips() const;
     };
 
   } // namespace ecss
 } // namespace gr
 
 #endif /* INCLUDED_ECSS_SPL_DECODER_IMPL_H */
-
@@ -24,7 +24,7 @@
 
 #include <gnuradio/io_signature.h>
 #include "spl_encoder_impl.h"
-#include <volk/volk.h>
+#include <vector>
 
 namespace gr
 {
@@ -41,15 +41,14 @@ namespace gr
         : gr::sync_interpolator("spl_encoder",
               gr::io_signature::make(1, 1, sizeof(char)),
               gr::io_signature::make(1, 1, sizeof(float)), (int)(samp_rate / bit_rate)),
-              d_interpolation((int) samp_rate / bit_rate)
+              d_interpolation((int) samp_rate / bit_rate), d_packed(false)
     {
       if (d_interpolation % 2 != 0)
       {
         throw std::out_of_range("spl encoder: the ratio samp rate on bit rate must to be integer and multiple of 2.");
       }
-      rising_edge = (float *)volk_malloc(d_interpolation * sizeof(float), volk_get_alignment());
-
-      falling_edge = (float *)volk_malloc(d_interpolation * sizeof(float), volk_get_alignment());
+      std::vector<float> rising_edge(d_interpolation);
+      std::vector<float> falling_edge(d_interpolation);
 
       for (size_t i = 0; i < d_interpolation; i++)
       {
@@ -64,6 +63,8 @@ namespace gr
           falling_edge[i] = -1;
         }
       }
+      // a bit one is a falling edge
+      d_encoder.set_waveforms(falling_edge, rising_edge);
     }
 
     spl_encoder_impl::~spl_encoder_impl()
@@ -74,24 +75,32 @@ namespace gr
         gr_vector_const_void_star &input_items,
         gr_vector_void_star &output_items)
     {
-      const char *in = (const char *) input_items[0];
-      float *out = (float *) output_items[0];
-      int index_interpolation = 0;
-      for (size_t i = 0; i < noutput_items; i += d_interpolation)
+      const char *in = (const char *)input_items[0];
+      float *out = (float *)output_items[0];
+      if (d_packed)
       {
-        if (in[index_interpolation] > 0)
-        {
-          memcpy(&out[i], falling_edge, (d_interpolation * sizeof(float)));
-        }
-        else
-        {
-          memcpy(&out[i], rising_edge, (d_interpolation * sizeof(float)));
-        }
-        index_interpolation ++;
+        d_encoder.encode_packed((const unsigned char *)in, out, noutput_items / (8 * d_interpolation));
+      }
+      else
+      {
+        d_encoder.encode(in, out, noutput_items / d_interpolation);
       }
       return noutput_items;
     }
 
+    void
+    spl_encoder_impl::set_packed(bool packed)
+    {
+      d_packed = packed;
+      set_interpolation(packed ? 8 * d_interpolation : d_interpolation);
+    }
+
+    bool
+    spl_encoder_impl::get_packed() const
+    {
+      return d_packed;
+    }
+
   } /* namespace ecss */
 } /* namespace gr */
 
@@ -21,6 +21,7 @@
 #define INCLUDED_ECSS_SPL_ENCODER_IMPL_H
 
 #include <ecss/spl_encoder.h>
+#include "line_encoder.h"
 
 namespace gr {
   namespace ecss {
@@ -28,9 +29,9 @@ namespace gr {
     class spl_encoder_impl : public spl_encoder
     {
       private:
-        float *rising_edge;
-        float *falling_edge;
-        int d_interpolation;
+        int d_interpolation;                                /*!< Samples of each bit */
+        bool d_packed;
+        line_encoder d_encoder;
 
       public:
         spl_encoder_impl(float bit_rate, float samp_rate);
@@ -40,6 +41,9 @@ namespace gr {
         int work(int noutput_items,
           gr_vector_const_void_star &input_items,
           gr_vector_void_star &output_items);
+
+        void set_packed(bool packed);
+        bool get_packed() const;
     };
 
   } // namespace ecss
@@ -25,10 +25,71 @@
 #include <gnuradio/io_signature.h>
 #include <gnuradio/blocks/pdu.h>
 #include "threshold_to_message_impl.h"
+#include <algorithm>
+#include <cstring>
+#include <stdexcept>
 
 namespace gr {
   namespace ecss {
 
+    static const int SCAN_CHUNK = 16;
+
+    /*! \brief Return the index of the first item >= \p threshold, or \p nitems. */
+    static inline int
+    find_at_or_above(const float *in, int nitems, float threshold)
+    {
+      // a branch only at the end of each chunk, the chunk with the crossing is
+      // checked again item by item
+      int i = 0;
+      for (; i + SCAN_CHUNK <= nitems; i += SCAN_CHUNK)
+      {
+        int hit = 0;
+        for (int k = 0; k < SCAN_CHUNK; k++)
+        {
+          hit |= in[i + k] >= threshold;
+        }
+        if (hit)
+        {
+          break;
+        }
+      }
+      for (; i < nitems; i++)
+      {
+        if (in[i] >= threshold)
+        {
+          return i;
+        }
+      }
+      return nitems;
+    }
+
+    /*! \brief Return the index of the first item < \p threshold, or \p nitems. */
+    static inline int
+    find_below(const float *in, int nitems, float threshold)
+    {
+      int i = 0;
+      for (; i + SCAN_CHUNK <= nitems; i += SCAN_CHUNK)
+      {
+        int hit = 0;
+        for (int k = 0; k < SCAN_CHUNK; k++)
+        {
+          hit |= in[i + k] < threshold;
+        }
+        if (hit)
+        {
+          break;
+        }
+      }
+      for (; i < nitems; i++)
+      {
+        if (in[i] < threshold)
+        {
+          return i;
+        }
+      }
+      return nitems;
+    }
+
     threshold_to_message::sptr
     threshold_to_message::make(float upper_threshold, float lower_threshold, pmt::pmt_t upper_message, pmt::pmt_t lower_message, bool init_state)
     {
@@ -44,9 +105,10 @@ namespace gr {
       : gr::block("threshold_to_message",
               gr::io_signature::make(1, 1, sizeof(float)),
               gr::io_signature::make(0, 1, sizeof(float))),
-      d_upper_threshold(upper_threshold), d_lower_threshold(lower_threshold), d_lower_msg(lower_message), d_upper_msg(upper_message), d_state(init_state)
+      d_upper_threshold(upper_threshold), d_lower_threshold(lower_threshold), d_lower_msg(lower_message), d_upper_msg(upper_message), d_state(init_state),
+      d_holdoff(0), d_holdoff_left(0)
     {
-      gr::basic_block::message_port_register_out(d_port);
+      gr::basic_block::message_port_register_out(symbols::port_threshold_msg);
     }
 
     /*
@@ -65,30 +127,65 @@ namespace gr {
       const float *in = (const float *) input_items[0];
       float *out = output_items.size() >= 1 ? (float *)output_items[0] : NULL;
 
-      for(int i = 0; i < ninput_items[0]; i++)
+      // the optional output is a copy of the input
+      const int nitems = (out != NULL) ? std::min(ninput_items[0], noutput_items) : ninput_items[0];
+
+      int i = 0;
+      while (i < nitems)
       {
+        const int skip = std::min(d_holdoff_left, nitems - i);
+        d_holdoff_left -= skip;
+        i += skip;
+
         //Check Lock
-        if (in[i] >= d_upper_threshold && d_state)
+        i += d_state ? find_at_or_above(in + i, nitems - i, d_upper_threshold)
+                     : find_below(in + i, nitems - i, d_lower_threshold);
+        if (i == nitems)
+        {
+          break;
+        }
+
+        if (d_state)
         {
           d_state = false;
-          message_port_pub(d_port, d_upper_msg);
+          message_port_pub(symbols::port_threshold_msg, d_upper_msg);
         }
-        else if (in[i] < d_lower_threshold && !d_state)
+        else
         {
           d_state = true;
-          message_port_pub(d_port, d_lower_msg);
+          message_port_pub(symbols::port_threshold_msg, d_lower_msg);
         }
+        d_holdoff_left = d_holdoff;
+        i++;
       }
-      consume_each (ninput_items[0]);
+
+      consume_each (nitems);
       if( out != NULL)
       {
-        return ninput_items[0];   
+        memcpy(out, in, nitems * sizeof(float));
+        return nitems;
       }
       else
       {
         return 0;
       }
-      
+    }
+
+    void
+    threshold_to_message_impl::set_holdoff(int holdoff)
+    {
+      if (holdoff < 0)
+      {
+        throw std::out_of_range("threshold to message: invalid hold-off. Must not be negative.");
+      }
+      d_holdoff = holdoff;
+      d_holdoff_left = std::min(d_holdoff_left, holdoff);
+    }
+
+    int
+    threshold_to_message_impl::get_holdoff() const
+    {
+      return d_holdoff;
     }
 
   } /* namespace ecss */
@@ -22,6 +22,7 @@
 #define INCLUDED_ECSS_threshold_TO_MESSAGE_IMPL_H
 
 #include <ecss/threshold_to_message.h>
+#include "pmt_symbols.h"
 
 namespace gr {
   namespace ecss {
@@ -33,8 +34,9 @@ namespace gr {
       float d_upper_threshold;
       pmt::pmt_t d_lower_msg;
       pmt::pmt_t d_upper_msg;
-      const pmt::pmt_t d_port = pmt::mp("threshold_msg");
       bool d_state = false;
+      int d_holdoff;
+      int d_holdoff_left;                                 /*!< Items of the hold-off still to be skipped */
 
 
      public:
@@ -48,6 +50,8 @@ namespace gr {
            gr_vector_const_void_star &input_items,
            gr_vector_void_star &output_items);
 
+      void set_holdoff(int holdoff);
+      int get_holdoff() const;
     };
 
   } // namespace ecss
@@ -27,6 +27,8 @@ description here (python/__init__.py).
 try:
 	# this might fail if the module is python-only
 	from .ecss_swig import *
+	# name of the complex signal search before the real input version
+	signal_search_fft_v = signal_search_fft_vcc
 except ImportError:
 	pass
 
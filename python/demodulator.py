@@ -20,6 +20,7 @@
 # 
 from gnuradio import gr
 from gnuradio import digital
+from gnuradio import fec
 from gnuradio import blocks
 from gnuradio import analog
 from gnuradio import filter
@@ -31,7 +32,7 @@ class demodulator(gr.hier_block2):
     """
     docstring for block demodulator
     """
-    def __init__(self, k, cl_loop_bandwidth, cl_order, cl_freq_sub, ss_sps, ss_loop_bandwidth, ss_ted_gain, ss_damping, ss_max_dev, ss_out_ss, ss_interpolation, ss_ted_type, ss_constellation, ss_nfilter, ss_pfb_mf_taps, sel_costas, sel_spl, samp_rate):
+    def __init__(self, k, cl_loop_bandwidth, cl_order, cl_freq_sub, ss_sps, ss_loop_bandwidth, ss_ted_gain, ss_damping, ss_max_dev, ss_out_ss, ss_interpolation, ss_ted_type, ss_constellation, ss_nfilter, ss_pfb_mf_taps, sel_costas, sel_spl, samp_rate, packed=False, endianness=gr.GR_MSB_FIRST, decoder=None):
         gr.hier_block2.__init__(self,
             "demodulator",
             gr.io_signature(1, 1, gr.sizeof_float),  # Input signature
@@ -60,6 +61,10 @@ class demodulator(gr.hier_block2):
         self.sel_costas = sel_costas
         self.sel_spl = sel_spl
         self.samp_rate = samp_rate
+        self.packed = packed
+        self.endianness = endianness
+        self.decoder = decoder
+        self.puncpat = '11'
 
         ##################################################
         # Blocks
@@ -67,7 +72,14 @@ class demodulator(gr.hier_block2):
 
         self.digital_sync = digital.symbol_sync_ff(self.ss_ted_type, self.ss_sps, self.ss_loop_bandwidth, self.ss_damping, self.ss_ted_gain, self.ss_max_dev, self.ss_out_ss, self.ss_constellation, self.ss_interpolation, self.ss_nfilter, (self.ss_pfb_mf_taps))
 
-        self.spl_decoder = ecss.spl_decoder()
+        # with a convolutional decoder the SP-L decoder feeds it with soft bits
+        if (decoder is None):
+            self.spl_decoder = ecss.spl_decoder()
+            self.spl_decoder.set_packed(packed)
+            self.spl_decoder.set_endianness(endianness)
+        else:
+            self.spl_decoder = ecss.spl_decoder(ecss.DECISION_SOFT)
+            self.convolutional_decoder = fec.extended_decoder(decoder_obj_list=self.decoder, threading=None, ann=None, puncpat=self.puncpat, integration_period=10000)
 
         self.costas_loop_cc = digital.costas_loop_cc(self.cl_loop_bandwidth, self.cl_order, False)
         self.signal_gen = analog.sig_source_c(samp_rate, analog.GR_SIN_WAVE, self.cl_freq_sub , 1, 0)
@@ -78,6 +90,7 @@ class demodulator(gr.hier_block2):
         self.null_float = blocks.null_sink(gr.sizeof_float*1)
         self.to_char = blocks.float_to_uchar()
         self.unpack = blocks.unpack_k_bits_bb(k)
+        self.pack = blocks.unpacked_to_packed_bb(1, endianness)
 
         ##################################################
         # Connections
@@ -97,7 +110,25 @@ class demodulator(gr.hier_block2):
         else:
             self.connect(self, self.digital_sync)
         
-        if (sel_spl == 0):
+        # the decoded bits are unpacked, one for each byte
+        if (decoder is not None):
+            if (sel_spl == 0):
+                self.connect(self.digital_sync, self.spl_decoder, self.convolutional_decoder)
+            else:
+                self.connect(self.digital_sync, self.convolutional_decoder)
+
+            # the FEC decoder already outputs one bit for each byte
+            if (packed):
+                self.connect(self.convolutional_decoder, self.pack, self)
+            else:
+                self.connect(self.convolutional_decoder, self)
+
+        # with packed bytes the SP-L decoder packs the bits itself, no unpack stage
+        elif (sel_spl == 0 and packed):
+            self.connect(self.digital_sync, self.spl_decoder, self)
+        elif (sel_spl == 0):
             self.connect(self.digital_sync, self.spl_decoder, self.unpack, self)
+        elif (packed):
+            self.connect(self.digital_sync, self.to_char, self.pack, self)
         else:
             self.connect(self.digital_sync, self.to_char, self.unpack, self)
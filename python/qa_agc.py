@@ -115,7 +115,7 @@ def plot(self, data, reference, error, zero, settling_time):
     # plt.show()
     self.pdf.add_to_pdf(fig)
 
-def test_sine(self, param):
+def test_sine(self, param, mode = ecss.AGC_EXACT):
     """this function run the defined test, for easier understanding"""
 
     tb = self.tb
@@ -141,6 +141,7 @@ def test_sine(self, param):
     head = blocks.head(gr.sizeof_gr_complex, int (param.N))
 
     agc = ecss.agc_cc(param.settling_time, param.reference, 1.0, 65536.0, param.samp_rate)
+    agc.set_mode(mode)
 
     tb.connect(src_square, (float_to_complex, 0))
     tb.connect(src_square, multiply_const)
@@ -680,6 +681,72 @@ class qa_agc (gr_unittest.TestCase):
         print ("-Output error after swing: %.3f%%" % data_transient.error_percentage_mean_start)
         print ("-Output error before swing: %.3f%%" % data_transient.error_percentage_mean_end)
 
+    def test_015_t (self):
+        """test_015_t: positive step of 100 times in fast mode against the exact mode"""
+        param = namedtuple('param', 'reference settling_time input_amplitude_max input_amplitude_min samp_rate freq_sine freq_square N noise')
+
+        param.reference = 1.0
+        param.settling_time = 10.0
+        param.input_amplitude_max = 100
+        param.input_amplitude_min = 1
+        param.noise = 0
+        param.samp_rate = 100000
+        param.freq_sine = param.samp_rate / 10
+        param.freq_square = 1000.0 / (20 * param.settling_time)
+        param.N = param.samp_rate / param.freq_square
+
+        print_parameters(param)
+
+        time_error_measure = 0.05
+        error = 0.05
+
+        data_exact = test_sine(self, param)
+        transient_exact = transient_evaluation(self, data_exact, param, error, time_error_measure)
+        self.tb = gr.top_block ()
+        data_fast = test_sine(self, param, ecss.AGC_FAST)
+        transient_fast = transient_evaluation(self, data_fast, param, error, time_error_measure)
+
+        self.assertAlmostEqual(transient_fast.settling_time, transient_exact.settling_time, delta = transient_exact.settling_time * 0.05)
+        self.assertEqual(transient_fast.stable_start, True)
+        self.assertLessEqual(transient_fast.error_percentage_mean_start, error * 100)
+        self.assertLessEqual(transient_fast.error_percentage_mean_end, error * 100)
+        print ("-Settling time (exact): %.3f ms" % transient_exact.settling_time)
+        print ("-Settling time (fast): %.3f ms" % transient_fast.settling_time)
+        print ("-Output error after swing (fast): %.3f%%" % transient_fast.error_percentage_mean_start)
+        print ("-Output error before swing (fast): %.3f%%" % transient_fast.error_percentage_mean_end)
+
+    def test_016_t (self):
+        """test_016_t: negative step of 100 times in block mode"""
+        param = namedtuple('param', 'reference settling_time input_amplitude_max input_amplitude_min samp_rate freq_sine freq_square N noise')
+
+        param.reference = 1.0
+        param.settling_time = 10.0
+        param.input_amplitude_max = 1
+        param.input_amplitude_min = 100
+        param.noise = 0
+        param.samp_rate = 10000
+        param.freq_sine = param.samp_rate / 10
+        param.freq_square = 1000.0 / (20 * param.settling_time)
+        param.N = param.samp_rate / param.freq_square
+
+        print_parameters(param)
+
+        time_error_measure = 0.05
+        error = 0.05
+        block_size = 64
+
+        data_sine = test_sine(self, param, ecss.AGC_BLOCK)
+        data_transient = transient_evaluation(self, data_sine, param, error, time_error_measure)
+
+        #the gain follows the step within one block
+        self.assertLessEqual(data_transient.settling_time, block_size * 1000.0 / param.samp_rate)
+        self.assertEqual(data_transient.stable_start, True)
+        self.assertLessEqual(data_transient.error_percentage_mean_start, error * 100)
+        self.assertLessEqual(data_transient.error_percentage_mean_end, error * 100)
+        print ("-Settling time: %.3f ms" % data_transient.settling_time)
+        print ("-Output error after swing: %.3f%%" % data_transient.error_percentage_mean_start)
+        print ("-Output error before swing: %.3f%%" % data_transient.error_percentage_mean_end)
+
 if __name__ == '__main__':
     suite = gr_unittest.TestLoader().loadTestsFromTestCase(qa_agc)
     runner = runner.HTMLTestRunner(output='../TestResults', template='DEFAULT_TEMPLATE_3')
@@ -393,6 +393,53 @@ class qa_coherent_phase_modulator (gr_unittest.TestCase):
         self.assertAlmostEqual(np.var(phase), 0)
         print ("-No phase jump found.")
 
+    def test_004_t (self):
+        """test_004_t: fast mode (table NCO) against the exact mode"""
+        param = namedtuple('param', 'samp_rate items fft_size N inputs step noise_bw')
+        param.N = 38
+        param.samp_rate = 4096 * 16
+        param.items = param.samp_rate
+        param.fft_size = 1024
+        param.inputs = 1
+        param.freq = 1000.0
+        param.noise_bw = 1000
+
+        print_parameters(param)
+
+        tb = self.tb
+        src = analog.sig_source_c(param.samp_rate, analog.GR_COS_WAVE, param.freq , 1, 0)
+        arg = blocks.complex_to_arg(1)
+        head = blocks.head(gr.sizeof_float, int (param.items))
+        pc = ecss.phase_converter(param.N)
+
+        cpm_exact = ecss.coherent_phase_modulator(param.N)
+        cpm_interp = ecss.coherent_phase_modulator(param.N)
+        cpm_interp.set_fast(True)
+        cpm_nearest = ecss.coherent_phase_modulator(param.N)
+        cpm_nearest.set_fast(True)
+        cpm_nearest.set_interpolation(False)
+
+        dst_exact = blocks.vector_sink_c()
+        dst_interp = blocks.vector_sink_c()
+        dst_nearest = blocks.vector_sink_c()
+
+        tb.connect(src, arg, head, pc)
+        tb.connect(pc, cpm_exact, dst_exact)
+        tb.connect(pc, cpm_interp, dst_interp)
+        tb.connect(pc, cpm_nearest, dst_nearest)
+        self.tb.run()
+
+        out_exact = np.asarray(dst_exact.data())
+        error_interp = max(np.abs(np.asarray(dst_interp.data()) - out_exact))
+        error_nearest = max(np.abs(np.asarray(dst_nearest.data()) - out_exact))
+
+        #the errors are bounded by the size of the table (12 bits)
+        self.assertTrue(cpm_interp.get_fast())
+        self.assertEqual(cpm_interp.get_table_bits(), 12)
+        self.assertLess(error_interp, 1e-6)
+        self.assertLess(error_nearest, math.pi / 2**12)
+        print ("-Maximum error (interpolated table): %g;" % error_interp)
+        print ("-Maximum error (nearest entry): %g;" % error_nearest)
 
 if __name__ == '__main__':
     suite = gr_unittest.TestLoader().loadTestsFromTestCase(qa_coherent_phase_modulator)
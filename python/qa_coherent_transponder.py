@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 Antonio Miraglia - ISISpace .
+#
+
+from gnuradio import gr, gr_unittest
+from gnuradio import blocks, analog
+from collections import namedtuple
+import ecss as ecss
+import math, time, datetime, os, abc, sys, pmt
+import runner
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_pdf import PdfPages
+import base64
+from io import BytesIO
+
+class Pdf_class(object):
+    """this class can print a single pdf for all the tests"""
+
+    graphs_list = []
+
+    def __init__(self, name_test='test'):
+        current_dir = os.getcwd()
+        dir_to = os.path.join(current_dir, '../TestResults/Graphs')
+
+        if not os.path.exists(dir_to):
+            os.makedirs(dir_to)
+        self.name_test = name_test.split('.')[0]
+        self.name_complete = dir_to + '/' + name_test.split('.')[0] + "_graphs.pdf"
+
+    def add_to_pdf(self, fig):
+        """this function can add a new element/page to the list of pages"""
+
+        fig_size = [21 / 2.54, 29.7 / 2.54] # width in inches & height in inches
+        fig.set_size_inches(fig_size)
+        Pdf_class.graphs_list.append(fig)
+
+    def finalize_pdf(self):
+        """this function print the final version of the pdf with all the pages"""
+
+        with PdfPages(self.name_complete) as pdf:
+            for graph in Pdf_class.graphs_list:
+                pdf.savefig(graph)   #write the figures for that list
+
+            d = pdf.infodict()
+            d['Title'] = self.name_test
+            d['Author'] = 'Antonio Miraglia - ISISpace'
+            d['Subject'] = 'self generated graphs from the qa test'
+            d['Keywords'] = self.name_test
+            d['CreationDate'] = datetime.datetime(2018, 8, 21)
+            d['ModDate'] = datetime.datetime.today()
+
+def print_parameters(data):
+    to_print = "/pr!Coeff1 (1st order) = %f; Coeff2 (2nd order) = %f; Coeff3 (3rd order) = %f; Bandwidth = %.2f Hz; Sample rate = %d Hz; Number of Bits = %d; Uplink = %d; Downlink = %d/pr!" \
+        %(data.coeff1, data.coeff2, data.coeff3, data.bw, data.samp_rate, data.N, data.uplink, data.downlink)
+    print (to_print)
+
+def plot(self, data_tr):
+    """this function create a defined graph with the output of the transponder and of the chain"""
+
+    fig, (ax1, ax2) = plt.subplots(2)
+
+    ax1.set_xlabel('Time [s]')
+    ax1.set_ylabel('Amplitude [V]')
+    ax1.set_title("Output 'downlink' (real part)", fontsize=20)
+    ax1.plot(data_tr.time, np.real(data_tr.out), scalex=True, scaley=True, linewidth=1)
+    ax1.grid(True)
+
+    ax2.set_xlabel('Time [s]')
+    ax2.set_ylabel('Error')
+    ax2.set_title("Difference with the chain", fontsize=20)
+    ax2.plot(data_tr.time, np.abs(np.asarray(data_tr.out) - np.asarray(data_tr.ref)), scalex=True, scaley=True, linewidth=1)
+    ax2.grid(True)
+
+    name_test = self.id().split("__main__.")[1]
+    name_test_usetex = name_test.replace('_', '\_').replace('.', ': ')
+
+    fig.suptitle(name_test_usetex, fontsize=30)
+    fig.tight_layout()  # otherwise the right y-label is slightly clipped
+    fig.subplots_adjust(hspace=0.6, top=0.85, bottom=0.15)
+
+    tmpfile = BytesIO()
+    fig.savefig(tmpfile, format='png')
+    fig_encoded = base64.b64encode(tmpfile.getvalue())
+    print("/im!{}/im!".format(fig_encoded.decode("utf-8")))#add in th template
+
+    # plt.show()
+    self.pdf.add_to_pdf(fig)
+
+def test_chain(self, param, tags, fast):
+    """this function runs the same uplink through the coherent transponder and through the chain
+    PLL -> gain phase accumulator -> coherent phase modulator"""
+
+    tb = self.tb
+    data_tr = namedtuple('data_tr', 'out ref pll pll_ref time')
+
+    coefficients = [param.coeff1, param.coeff2, param.coeff3]
+
+    src = analog.sig_source_c(param.samp_rate, analog.GR_COS_WAVE, param.freq, 1, 0)
+    head = blocks.head(gr.sizeof_gr_complex, param.items)
+    tagger = blocks.vector_source_c([0] * param.items, False, 1, tags)
+    adder = blocks.add_vcc(1)
+
+    transponder = ecss.coherent_transponder(param.samp_rate, param.N, coefficients, param.f_central, param.bw, param.uplink, param.downlink)
+    transponder.set_fast(fast)
+
+    pll = ecss.pll(param.samp_rate, param.N, coefficients, param.f_central, param.bw)
+    pll.set_fast(fast)
+    gpa = ecss.gain_phase_accumulator(False, param.uplink, param.downlink)
+    cpm = ecss.coherent_phase_modulator(param.N)
+    cpm.set_fast(fast)
+
+    dst_out = blocks.vector_sink_c()
+    dst_pll = blocks.vector_sink_c()
+    dst_ref = blocks.vector_sink_c()
+    dst_pll_ref = blocks.vector_sink_c()
+
+    tb.connect(src, head, (adder, 0))
+    tb.connect(tagger, (adder, 1))
+    tb.connect(adder, transponder)
+    tb.connect((transponder, 0), dst_out)
+    tb.connect((transponder, 1), dst_pll)
+
+    tb.connect(adder, pll)
+    tb.connect((pll, 0), dst_pll_ref)
+    tb.connect((pll, 1), blocks.null_sink(gr.sizeof_float))
+    tb.connect((pll, 2), blocks.null_sink(gr.sizeof_float))
+    tb.connect((pll, 3), gpa, cpm, dst_ref)
+
+    self.tb.run()
+
+    data_tr.out = dst_out.data()
+    data_tr.ref = dst_ref.data()
+    data_tr.pll = dst_pll.data()
+    data_tr.pll_ref = dst_pll_ref.data()
+    data_tr.time = np.linspace(0, (param.items * 1.0 / param.samp_rate), param.items, endpoint=False)
+
+    return transponder, data_tr
+
+def make_param():
+    param = namedtuple('param', 'coeff1 coeff2 coeff3 f_central bw samp_rate items N freq uplink downlink')
+
+    param.coeff1 = 0.065044
+    param.coeff2 = 0.00216
+    param.coeff3 = 0
+    param.f_central = 500
+    param.bw = 500
+    param.N = 38
+    param.samp_rate = 4096 * 4
+    param.items = param.samp_rate
+    param.freq = 600
+    param.uplink = 221
+    param.downlink = 240
+    return param
+
+class qa_coherent_transponder (gr_unittest.TestCase):
+
+    def setUp (self):
+        self.tb = gr.top_block ()
+        self.pdf = Pdf_class(self.id().split(".")[1])
+
+    def tearDown (self):
+        self.tb = None
+        self.pdf.finalize_pdf()
+
+    def test_001_t (self):
+        """test_001_t: transponder against the three blocks chain"""
+        param = make_param()
+
+        print_parameters(param)
+        transponder, data_tr = test_chain(self, param, [], False)
+        plot(self, data_tr)
+
+        #the output must be bit-identical to the chain
+        self.assertEqual(data_tr.out, data_tr.ref)
+        self.assertEqual(data_tr.pll, data_tr.pll_ref)
+        self.assertAlmostEqual(transponder.get_frequency(), param.freq, delta = param.freq * 0.05)
+        print ("-Frequency: %f Hz;" % transponder.get_frequency())
+
+    def test_002_t (self):
+        """test_002_t: transponder against the chain in fast mode, with stop and start tags"""
+        param = make_param()
+        param.uplink = 749
+        param.downlink = 880
+
+        tag_stop = gr.tag_t()
+        tag_stop.offset = int(param.items / 4)
+        tag_stop.key = pmt.intern("pll")
+        tag_stop.value = pmt.intern("stop")
+
+        tag_start = gr.tag_t()
+        tag_start.offset = int(param.items / 2)
+        tag_start.key = pmt.intern("pll")
+        tag_start.value = pmt.intern("start")
+
+        print_parameters(param)
+        transponder, data_tr = test_chain(self, param, [tag_stop, tag_start], True)
+        plot(self, data_tr)
+
+        self.assertEqual(data_tr.out, data_tr.ref)
+        self.assertTrue(transponder.get_fast())
+        print ("-Fast mode output identical to the chain;")
+
+    def test_004_t (self):
+        """test_004_t: transponder against the chain, seeded by a reset and a frequency tag"""
+        param = make_param()
+
+        # the same pair of tags emitted by the FFT signal search
+        tag_reset = gr.tag_t()
+        tag_reset.offset = int(param.items / 2)
+        tag_reset.key = pmt.intern("pll")
+        tag_reset.value = pmt.intern("reset")
+
+        tag_freq = gr.tag_t()
+        tag_freq.offset = int(param.items / 2)
+        tag_freq.key = pmt.intern("pll")
+        tag_freq.value = pmt.cons(pmt.intern("freq"), pmt.from_double(param.freq))
+
+        print_parameters(param)
+        transponder, data_tr = test_chain(self, param, [tag_reset, tag_freq], False)
+        plot(self, data_tr)
+
+        self.assertEqual(data_tr.out, data_tr.ref)
+        self.assertEqual(data_tr.pll, data_tr.pll_ref)
+        self.assertAlmostEqual(transponder.get_frequency(), param.freq, delta = param.freq * 0.05)
+        print ("-Seeded output identical to the chain;")
+
+    def test_003_t (self):
+        """test_003_t: phase added to the downlink by the optional input"""
+        param = make_param()
+        phase = 0.5
+
+        print_parameters(param)
+
+        tb = self.tb
+        coefficients = [param.coeff1, param.coeff2, param.coeff3]
+        src = analog.sig_source_c(param.samp_rate, analog.GR_COS_WAVE, param.freq, 1, 0)
+        head = blocks.head(gr.sizeof_gr_complex, param.items)
+        src_phase = analog.sig_source_f(param.samp_rate, analog.GR_CONST_WAVE, 0, phase, 0)
+        pc = ecss.phase_converter(param.N)
+        tr_phase = ecss.coherent_transponder(param.samp_rate, param.N, coefficients, param.f_central, param.bw, param.uplink, param.downlink)
+        tr_ref = ecss.coherent_transponder(param.samp_rate, param.N, coefficients, param.f_central, param.bw, param.uplink, param.downlink)
+        dst_phase = blocks.vector_sink_c()
+        dst_ref = blocks.vector_sink_c()
+
+        tb.connect(src, head)
+        tb.connect(head, (tr_phase, 0))
+        tb.connect(src_phase, pc, (tr_phase, 1))
+        tb.connect(tr_phase, dst_phase)
+        tb.connect(head, tr_ref, dst_ref)
+        self.tb.run()
+
+        #the phase input rotates the downlink carrier
+        out = np.asarray(dst_phase.data())
+        ref = np.asarray(dst_ref.data()) * np.exp(1j * phase)
+        self.assertLess(max(np.abs(out - ref)), 1e-5)
+        print ("-Maximum error of the rotated carrier: %g;" % max(np.abs(out - ref)))
+
+
+if __name__ == '__main__':
+    suite = gr_unittest.TestLoader().loadTestsFromTestCase(qa_coherent_transponder)
+    runner = runner.HTMLTestRunner(output='../TestResults', template='DEFAULT_TEMPLATE_3')
+    runner.run(suite)
+    #gr_unittest.TestProgram()
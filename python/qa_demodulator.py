@@ -5,7 +5,7 @@
 #
 
 from gnuradio import gr, gr_unittest
-from gnuradio import blocks, analog
+from gnuradio import blocks, analog, digital, fec
 from gnuradio.fft import logpwrfft
 from collections import namedtuple
 from gnuradio.fft import window
@@ -136,6 +136,38 @@ class qa_demodulator (gr_unittest.TestCase):
 
         plot(self, data)
 
+    def test_002_t (self):
+        """test_002_t: convolutional decoder path, one decoded bit for each output byte"""
+
+        tb = self.tb
+        samp_rate = 64000
+        sps = 8
+        nbits = 4096
+        polys = [109, 79]
+
+        bits = np.random.randint(0, 2, nbits).tolist()
+        src = blocks.vector_source_b(bits, False)
+        encoder = fec.extended_encoder(encoder_obj_list=fec.cc_encoder_make(1, 7, 2, polys, 0, fec.CC_STREAMING, False), threading=None, puncpat='11')
+        to_float = blocks.char_to_float(1, 1)
+        to_nrz = blocks.multiply_const_ff(2)
+        offset = blocks.add_const_ff(-1)
+        repeat = blocks.repeat(gr.sizeof_float, sps)
+
+        decoder = fec.cc_decoder.make(1, 7, 2, polys, 0, -1, fec.CC_STREAMING, False)
+        demod = ecss.demodulator(8, 6.28/100, 2, 16000, sps, 0.045, 1.0, 1.0, 1.5, 1, digital.IR_MMSE_8TAP,
+                                 digital.TED_MUELLER_AND_MULLER, digital.constellation_bpsk().base(), 128, [],
+                                 1, 1, samp_rate, False, gr.GR_MSB_FIRST, decoder)
+        dst = blocks.vector_sink_b()
+
+        tb.connect(src, encoder, to_float, to_nrz, offset, repeat, demod, dst)
+        self.tb.run()
+
+        out = dst.data()
+        #without a second unpack stage there are at most as many output bytes as encoded bits
+        self.assertGreater(len(out), nbits // 2)
+        self.assertLessEqual(len(out), nbits)
+        self.assertTrue(set(out) <= set([0, 1]))
+        print ("-Decoded bits: %d for %d encoded bits;" % (len(out), nbits))
 
 
 if __name__ == '__main__':
@@ -10,12 +10,13 @@ from collections import namedtuple
 from gnuradio.fft import window
 import ecss as ecss
 import flaress
-import math, time, datetime, os, abc, sys
+import math, time, datetime, os, abc, sys, pmt
 import runner, threading
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_pdf import PdfPages
 import base64
+from fractions import Fraction
 from io import BytesIO
 
 class Pdf_class(object):
@@ -84,6 +85,42 @@ def check_integer_phase(data_out, N, items):
 
     return ((minimum_step >> (64 - N)) * precision), (slope / items)
 
+def wrap_int64(value):
+    """this function wraps a python integer as an int64 word"""
+
+    return ((value + (1 << 63)) % (1 << 64)) - (1 << 63)
+
+def reference_gain(data_in, uplink, downlink):
+    """this function evaluates the output of the gain phase accumulator with the C++ int64 arithmetic"""
+
+    out = []
+    integer_phase = data_in[0]
+    accumulator = 0
+    for value in data_in:
+        out.append(integer_phase)
+        step = wrap_int64(value - accumulator)
+        quotient = abs(step) // abs(uplink)
+        if (step < 0) != (uplink < 0):
+            quotient = -quotient
+        integer_phase = wrap_int64(integer_phase + quotient * downlink)
+        accumulator = value
+    return out
+
+def ratio_error(data_in, data_out, uplink, downlink):
+    """this function returns the maximum distance, in units of the int64 word, of the output from the exact turn around ratio"""
+
+    error = 0
+    steps = 0
+    accumulator = 0
+    for i in range(len(data_in)):
+        exact = Fraction(steps * downlink, uplink)
+        distance = Fraction(wrap_int64(data_out[i] - data_out[0])) - exact
+        distance = (distance + (1 << 63)) % (1 << 64) - (1 << 63)
+        error = max(error, abs(distance))
+        steps += wrap_int64(data_in[i] - accumulator)
+        accumulator = data_in[i]
+    return float(error)
+
 def plot(self, data_gain):
     """this function create a defined graph for the pll with the data input and output"""
 
@@ -123,7 +160,7 @@ def plot(self, data_gain):
     # plt.show()
     self.pdf.add_to_pdf(fig)
 
-def test_pa(self, param):
+def test_pa(self, param, exact = False):
     """this function run the defined test, for easier understanding"""
 
     tb = self.tb
@@ -141,6 +178,7 @@ def test_pa(self, param):
 
     pc = ecss.phase_converter(param.N)
     gain = ecss.gain_phase_accumulator(param.reset, param.uplink, param.downlink)
+    gain.set_exact(exact)
 
     tb.connect(src_phase_acc, (adder, 0))
     tb.connect(src_noise, (adder, 1))
@@ -384,6 +422,97 @@ class qa_gain_phase_accumulator (gr_unittest.TestCase):
         print ("-Output Slope : %f rad/s;" % (gain_slope * param.samp_rate))
         print ("-Output Min step : %f rad." % gain_min_step)
 
+    def test_006_t (self):
+        """test_006_t: bit-exactness of the output with random phase steps"""
+        param = namedtuple('param', 'samp_rate items N noise uplink downlink value reset')
+        param.N = 52
+        param.samp_rate = 4096
+        param.items = param.samp_rate * 4
+        param.value = 0.0
+        param.noise = 2.0
+        param.reset = False
+
+        for param.uplink, param.downlink in ((221, 240), (749, 880)):
+            self.tb = gr.top_block ()
+            print_parameters(param)
+
+            data_gain = test_pa(self, param)
+
+            #the output must match the int64 arithmetic sample by sample
+            reference = reference_gain(data_gain.src, param.uplink, param.downlink)
+            mismatch = sum(1 for a, b in zip(data_gain.out, reference) if a != b)
+            self.assertEqual(len(data_gain.out), len(reference))
+            self.assertEqual(mismatch, 0)
+            print ("-Turn Around Ration %d/%d: %d mismatches on %d items;" % (param.downlink, param.uplink, mismatch, len(reference)))
+
+    def test_007_t (self):
+        """test_007_t: drift of the output in exact mode"""
+        param = namedtuple('param', 'samp_rate items N noise uplink downlink value reset')
+        param.N = 38
+        param.samp_rate = 4096
+        param.items = param.samp_rate * 4
+        param.value = 0.1   # rad for each sample
+        param.noise = 0.0
+        param.uplink = 749
+        param.downlink = 880
+        param.reset = False
+
+        print_parameters(param)
+
+        data_exact = test_pa(self, param, True)
+        plot(self, data_exact)
+        self.tb = gr.top_block ()
+        data_truncated = test_pa(self, param, False)
+
+        error_exact = ratio_error(data_exact.src, data_exact.out, param.uplink, param.downlink)
+        error_truncated = ratio_error(data_truncated.src, data_truncated.out, param.uplink, param.downlink)
+
+        #the exact mode never differs from the ratio by more than one unit of the int64 word
+        self.assertLess(error_exact, 1)
+        self.assertGreater(error_truncated, 1000)
+        print ("-Maximum distance from the ratio (exact mode): %f;" % error_exact)
+        print ("-Maximum distance from the ratio (truncated): %f." % error_truncated)
+
+    def test_008_t (self):
+        """test_008_t: ratio changed by a message"""
+        gain = ecss.gain_phase_accumulator(False, 221, 240)
+
+        gain.set_ratio(749, 880)
+        self.assertEqual(gain.get_uplink(), 749)
+        self.assertEqual(gain.get_downlink(), 880)
+
+        src = blocks.vector_source_f([0.0] * 1024, False)
+        pc = ecss.phase_converter(38)
+        dst = flaress.vector_sink_int64()
+        self.tb.connect(src, pc, gain, dst)
+        gain._post(pmt.intern("ratio"), pmt.cons(pmt.from_long(221), pmt.from_long(240)))
+        self.tb.run()
+
+        self.assertEqual(gain.get_uplink(), 221)
+        self.assertEqual(gain.get_downlink(), 240)
+        print ("-Ratio after the message: %d/%d." % (gain.get_downlink(), gain.get_uplink()))
+
+    def test_009_t (self):
+        """test_009_t: ratio messages out of the int range or not positive are ignored"""
+        gain = ecss.gain_phase_accumulator(False, 749, 880)
+
+        src = blocks.vector_source_f([0.0] * 1024, False)
+        pc = ecss.phase_converter(38)
+        dst = flaress.vector_sink_int64()
+        self.tb.connect(src, pc, gain, dst)
+
+        # 2**32 is zero and 2**32 + 221 is 221 once narrowed to int
+        gain._post(pmt.intern("ratio"), pmt.cons(pmt.from_long(2**32), pmt.from_long(240)))
+        gain._post(pmt.intern("ratio"), pmt.cons(pmt.from_long(2**32 + 221), pmt.from_long(240)))
+        gain._post(pmt.intern("ratio"), pmt.cons(pmt.from_long(221), pmt.from_long(2**31)))
+        gain._post(pmt.intern("ratio"), pmt.cons(pmt.from_long(-221), pmt.from_long(240)))
+        gain._post(pmt.intern("ratio"), pmt.cons(pmt.from_long(221), pmt.from_long(0)))
+        self.tb.run()
+
+        self.assertEqual(gain.get_uplink(), 749)
+        self.assertEqual(gain.get_downlink(), 880)
+        print ("-Ratio after the invalid messages: %d/%d." % (gain.get_downlink(), gain.get_uplink()))
+
 
 if __name__ == '__main__':
     suite = gr_unittest.TestLoader().loadTestsFromTestCase(qa_gain_phase_accumulator)
@@ -91,17 +91,24 @@ def plot(self, data_out, data_src):
     # plt.show()
     self.pdf.add_to_pdf(fig)
 
-def test_nrzl(self, param):
+def pack_bits(bits):
+    """this function packs the bits in bytes, MSB first"""
+
+    return tuple(sum(bits[i + k] << (7 - k) for k in range(8)) for i in range(0, len(bits), 8))
+
+def test_nrzl(self, param, packed = False):
     """this function run the defined test, for easier understanding"""
 
     tb = self.tb
 
-    src = blocks.vector_source_b(param.data_src, True, 1, [])
+    data_src = pack_bits(param.data_src) if packed else param.data_src
+    src = blocks.vector_source_b(data_src, True, 1, [])
     dst = blocks.vector_sink_f()
 
-    head = blocks.head(gr.sizeof_char, len(param.data_src))
+    head = blocks.head(gr.sizeof_char, len(data_src))
 
     nrzl = ecss.nrzl_encoder(param.bit_rate, param.samp_rate)
+    nrzl.set_packed(packed)
 
     tb.connect(src, head)
     tb.connect(head, nrzl)
@@ -159,6 +166,24 @@ class qa_nrzl_encoder (gr_unittest.TestCase):
         self.assertAlmostEqual(data_out, expected_data)
         print ("- Data correctly encoded.")
 
+    def test_003_t (self):
+        """test_003_t: packed input against one bit for each byte"""
+        param = namedtuple('param', 'data_src bit_rate samp_rate')
+
+        param.bit_rate = 1000
+        param.samp_rate = 4000
+        param.data_src = tuple(np.random.randint(0, 2, 8 * 125))
+
+        print_parameters(param)
+
+        data_unpacked = test_nrzl(self, param)
+        self.tb = gr.top_block ()
+        data_packed = test_nrzl(self, param, True)
+
+        expected_data = tuple(v for bit in param.data_src for v in (4 * ((1,) if bit else (-1,))))
+        self.assertFloatTuplesAlmostEqual(data_unpacked, expected_data)
+        self.assertFloatTuplesAlmostEqual(data_packed, expected_data)
+        print ("- Packed data correctly encoded.")
 
 
 if __name__ == '__main__':
@@ -91,17 +91,25 @@ def plot(self, data_out, data_src):
     # plt.show()
     self.pdf.add_to_pdf(fig)
 
-def test_nrlz(self, param):
+def pack_bits(bits):
+    """this function packs the bits in bytes, MSB first"""
+
+    return tuple(sum(bits[i + k] << (7 - k) for k in range(8)) for i in range(0, len(bits), 8))
+
+def test_nrlz(self, param, packed = False, continuous = False):
     """this function run the defined test, for easier understanding"""
 
     tb = self.tb
 
-    src = blocks.vector_source_b(param.data_src, True, 1, [])
+    data_src = pack_bits(param.data_src) if packed else param.data_src
+    src = blocks.vector_source_b(data_src, True, 1, [])
     dst = blocks.vector_sink_f()
 
-    head = blocks.head(gr.sizeof_char, len(param.data_src))
+    head = blocks.head(gr.sizeof_char, len(data_src))
 
     nrzl = ecss.nrzl_encoder_subcarrier(param.sine, param.freq_sub, param.bit_rate, param.samp_rate)
+    nrzl.set_packed(packed)
+    nrzl.set_continuous(continuous)
 
     tb.connect(src, head)
     tb.connect(head, nrzl)
@@ -260,6 +268,65 @@ class qa_nrzl_encoder_subcarrier (gr_unittest.TestCase):
         self.assertFloatTuplesAlmostEqual(data_out, expected_data)
         print ("- Data correctly encoded.")
 
+    def test_007_t (self):
+        """test_007_t: packed input against one bit for each byte"""
+        param = namedtuple('param', 'data_src bit_rate samp_rate sine freq_sub')
+
+        param.bit_rate = 1000
+        param.samp_rate = 16000
+        param.sine = True
+        param.freq_sub = 2000
+        param.data_src = tuple(np.random.randint(0, 2, 8 * 16))
+
+        print_parameters(param)
+
+        data_unpacked = test_nrlz(self, param)
+        self.tb = gr.top_block ()
+        data_packed = test_nrlz(self, param, True)
+
+        self.assertEqual(len(data_packed), len(param.data_src) * 16)
+        self.assertFloatTuplesAlmostEqual(data_packed, data_unpacked)
+        print ("- Packed data correctly encoded.")
+
+    def test_008_t (self):
+        """test_008_t: phase continuous sub-carrier with a non integer ratio on the bit rate"""
+        param = namedtuple('param', 'data_src bit_rate samp_rate sine freq_sub')
+
+        param.bit_rate = 1000
+        param.samp_rate = 48000
+        param.freq_sub = 4321.75
+        param.data_src = tuple(int(b) for b in np.random.randint(0, 2, 200))
+
+        print_parameters(param)
+
+        #NRZ-L levels on a sub-carrier that never restarts
+        samples_per_bit = param.samp_rate // param.bit_rate
+        n = np.arange(len(param.data_src) * samples_per_bit)
+        levels = np.repeat([1.0 if bit else -1.0 for bit in param.data_src], samples_per_bit)
+        cycles = np.mod(n * param.freq_sub / param.samp_rate, 1.0)
+
+        param.sine = True
+        data_sine = test_nrlz(self, param, continuous = True)
+        param.sine = False
+        self.tb = gr.top_block ()
+        data_square = test_nrlz(self, param, continuous = True)
+
+        plot(self, data_sine, param.data_src)
+
+        self.assertFloatTuplesAlmostEqual(data_sine, tuple(levels * np.sin(2 * np.pi * cycles)), 5)
+        self.assertFloatTuplesAlmostEqual(data_square, tuple(levels * np.where(cycles < 0.5, 1.0, -1.0)))
+
+        #with an integer ratio the continuous sub-carrier is the one restarted on each bit
+        param.freq_sub = 8000
+        param.sine = True
+        self.tb = gr.top_block ()
+        data_restart = test_nrlz(self, param)
+        self.tb = gr.top_block ()
+        data_continuous = test_nrlz(self, param, continuous = True)
+
+        self.assertFloatTuplesAlmostEqual(data_continuous, data_restart, 5)
+        print ("- Phase continuous sub-carrier correctly encoded.")
+
 
 if __name__ == '__main__':
     suite = gr_unittest.TestLoader().loadTestsFromTestCase(qa_nrzl_encoder_subcarrier)
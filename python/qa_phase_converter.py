@@ -10,7 +10,7 @@ from collections import namedtuple
 from gnuradio.fft import window
 import ecss as ecss
 import flaress
-import math, time, datetime, os, abc, sys
+import math, time, datetime, os, abc, sys, pmt
 import runner, threading
 import numpy as np
 import matplotlib.pyplot as plt
@@ -123,6 +123,21 @@ def plot(self, data_pe):
     # plt.show()
     self.pdf.add_to_pdf(fig)
 
+def reference_phase(value, N):
+    """this function converts a phase with the scalar algorithm of the block (C++ double arithmetic)"""
+
+    phase = float(np.float32(value))
+    while phase > math.pi:
+        phase -= 2.0 * math.pi
+    while phase <= -math.pi:
+        phase += 2.0 * math.pi
+    scaled = (phase / math.pi) / math.pow(2, (- (N - 1)))
+    integer_phase = math.trunc(scaled)
+    if abs(scaled - integer_phase) >= 0.5:
+        integer_phase += int(math.copysign(1, scaled))
+    integer_phase = integer_phase << (64 - N)
+    return ((integer_phase + (1 << 63)) % (1 << 64)) - (1 << 63)
+
 def test_ramp(self, param):
     """this function run the defined test, for easier understanding"""
 
@@ -213,6 +228,127 @@ class qa_phase_converter (gr_unittest.TestCase):
         print ("-Output Slope : %f rad/s;" % (pc_slope * param.samp_rate))
         print ("-Output Min step : %f rad." % pc_min_step)
 
+    def test_003_t (self):
+        """test_003_t: message output batched every N items"""
+        param = namedtuple('param', 'samp_rate items N min_value max_value')
+        param.N = 38
+        param.samp_rate = 4096
+        param.items = param.samp_rate * 4
+        param.max_value = math.pi
+        param.min_value = -math.pi
+        pdu_items = 1024
+
+        print_parameters(param)
+
+        src = analog.sig_source_f(param.samp_rate, analog.GR_SAW_WAVE, 1, param.max_value - param.min_value, param.min_value)
+        head = blocks.head(gr.sizeof_float, int (param.items))
+        pc = ecss.phase_converter(param.N)
+        pc.set_pdu_items(pdu_items)
+        pc.set_pdu_mode(ecss.PDU_ITEMS)
+        dst_pc_out = flaress.vector_sink_int64()
+        dbg = blocks.message_debug()
+
+        self.tb.connect(src, head, pc, dst_pc_out)
+        self.tb.msg_connect((pc, 'async_out'), (dbg, 'store'))
+        self.tb.run()
+
+        #every message has the same size and together they are the stream output
+        messages = [pmt.s64vector_elements(dbg.get_message(i)) for i in range(dbg.num_messages())]
+        self.assertEqual(len(messages), param.items // pdu_items)
+        for message in messages:
+            self.assertEqual(len(message), pdu_items)
+        self.assertEqual([x for message in messages for x in message], list(dst_pc_out.data()))
+        self.assertEqual(pc.get_pdu_mode(), ecss.PDU_ITEMS)
+        print ("-Messages: %d of %d items;" % (len(messages), pdu_items))
+
+    def test_004_t (self):
+        """test_004_t: message output disabled"""
+        param = namedtuple('param', 'samp_rate items N min_value max_value')
+        param.N = 38
+        param.samp_rate = 4096
+        param.items = param.samp_rate
+        param.max_value = math.pi
+        param.min_value = -math.pi
+
+        print_parameters(param)
+
+        src = analog.sig_source_f(param.samp_rate, analog.GR_SAW_WAVE, 1, param.max_value - param.min_value, param.min_value)
+        head = blocks.head(gr.sizeof_float, int (param.items))
+        pc = ecss.phase_converter(param.N)
+        pc.set_pdu_mode(ecss.PDU_OFF)
+        dst_pc_out = flaress.vector_sink_int64()
+        dbg = blocks.message_debug()
+
+        self.tb.connect(src, head, pc, dst_pc_out)
+        self.tb.msg_connect((pc, 'async_out'), (dbg, 'store'))
+        self.tb.run()
+
+        self.assertEqual(dbg.num_messages(), 0)
+        self.assertEqual(len(dst_pc_out.data()), param.items)
+        print ("-Messages: %d;" % dbg.num_messages())
+
+    def test_005_t (self):
+        """test_005_t: batched conversion against the scalar reference for every N"""
+        rng = np.random.RandomState(1)
+        special = [0.0, -0.0, math.pi, -math.pi, 3 * math.pi, -3 * math.pi, math.pi / 2, -math.pi / 2,
+                   float(np.nextafter(np.float32(math.pi), np.float32(4))), float(np.nextafter(np.float32(-math.pi), np.float32(-4))),
+                   1e-30, 100.0, -100.0, 1e6]
+        values = special + list(rng.uniform(-3.5, 3.5, 2000)) + list(rng.uniform(-20, 20, 500))
+        values = [float(np.float32(v)) for v in values]
+
+        for N in range(1, 53):
+            self.tb = gr.top_block ()
+            src = blocks.vector_source_f(values, False)
+            pc = ecss.phase_converter(N)
+            dst_pc_out = flaress.vector_sink_int64()
+            self.tb.connect(src, pc, dst_pc_out)
+            self.tb.run()
+
+            #every output item must be the same of the scalar conversion
+            reference = [reference_phase(v, N) for v in values]
+            mismatch = [i for i in range(len(values)) if dst_pc_out.data()[i] != reference[i]]
+            self.assertEqual(len(dst_pc_out.data()), len(values))
+            self.assertEqual(mismatch, [], "N = %d" % N)
+
+        print ("-Items checked for each N in [1, 52]: %d;" % len(values))
+
+    def test_006_t (self):
+        """test_006_t: message output batched by a timer"""
+        param = namedtuple('param', 'samp_rate items N min_value max_value')
+        param.N = 38
+        param.samp_rate = 4096
+        param.items = param.samp_rate
+        param.max_value = math.pi
+        param.min_value = -math.pi
+        pdu_items = 1024
+        period = 0.1
+
+        print_parameters(param)
+
+        src = analog.sig_source_f(param.samp_rate, analog.GR_SAW_WAVE, 1, param.max_value - param.min_value, param.min_value)
+        throttle = blocks.throttle(gr.sizeof_float, param.samp_rate, True)
+        head = blocks.head(gr.sizeof_float, int (param.items))
+        pc = ecss.phase_converter(param.N)
+        pc.set_pdu_items(pdu_items)
+        pc.set_pdu_period(period)
+        pc.set_pdu_mode(ecss.PDU_TIMER)
+        dst_pc_out = flaress.vector_sink_int64()
+        dbg = blocks.message_debug()
+
+        self.tb.connect(src, throttle, head, pc, dst_pc_out)
+        self.tb.msg_connect((pc, 'async_out'), (dbg, 'store'))
+        self.tb.run()
+
+        #about one message for each period of the one second run, together they are the stream output
+        messages = [pmt.s64vector_elements(dbg.get_message(i)) for i in range(dbg.num_messages())]
+        self.assertGreaterEqual(len(messages), 5)
+        self.assertLessEqual(len(messages), 20)
+        for message in messages:
+            self.assertLessEqual(len(message), pdu_items)
+        self.assertEqual([x for message in messages for x in message], list(dst_pc_out.data()))
+        self.assertEqual(pc.get_pdu_mode(), ecss.PDU_TIMER)
+        print ("-Messages: %d in %d items;" % (len(messages), param.items))
+
 
 if __name__ == '__main__':
     suite = gr_unittest.TestLoader().loadTestsFromTestCase(qa_phase_converter)
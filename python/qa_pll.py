@@ -1306,6 +1306,330 @@ class qa_pll (gr_unittest.TestCase):
         # print ("-Output Slope : %f rad/s;" % (pa_slope * param.samp_rate))
         # print ("-Output Min step : %f rad." % pa_min_step)
 
+    def test_012_t (self):
+        """test_012_t: stop and start tags on the input stream"""
+
+        tb = self.tb
+        param = namedtuple('param', 'coeff1 coeff2 coeff3 f_central bw samp_rate items N freq stop start')
+
+        param.coeff1 = 0.065044
+        param.coeff2 = 0.00216
+        param.coeff3 = 0
+        param.f_central = 500
+        param.bw = 500
+        param.N = 38
+        param.samp_rate = 4096 * 4
+        param.items = param.samp_rate
+        param.freq = 600
+        param.stop = int(param.items / 4)
+        param.start = int(param.items / 2)
+
+        tag_stop = gr.tag_t()
+        tag_stop.offset = param.stop
+        tag_stop.key = pmt.intern("pll")
+        tag_stop.value = pmt.intern("stop")
+
+        tag_start = gr.tag_t()
+        tag_start.offset = param.start
+        tag_start.key = pmt.intern("pll")
+        tag_start.value = pmt.intern("start")
+
+        src_sine = analog.sig_source_c(param.samp_rate, analog.GR_COS_WAVE, param.freq, 1, 0)
+        head_sine = blocks.head(gr.sizeof_gr_complex, param.items)
+        dst_sine = blocks.vector_sink_c()
+        tb.connect(src_sine, head_sine, dst_sine)
+        tb.run()
+
+        tb = gr.top_block()
+        src = blocks.vector_source_c(dst_sine.data(), False, 1, [tag_stop, tag_start])
+        pll = ecss.pll(param.samp_rate, param.N, [param.coeff1, param.coeff2, param.coeff3], param.f_central, param.bw)
+
+        dst_pll_out = blocks.vector_sink_c()
+        dst_pll_freq = blocks.vector_sink_f()
+        dst_pll_pe = blocks.vector_sink_f()
+        dst_pll_tags = blocks.tag_debug(gr.sizeof_float * 2, "pa", "")
+        dst_pll_tags.set_display(False)
+
+        tb.connect(src, pll)
+        tb.connect((pll, 0), dst_pll_out)
+        tb.connect((pll, 1), dst_pll_freq)
+        tb.connect((pll, 2), dst_pll_pe)
+        tb.connect((pll, 3), dst_pll_tags)
+        tb.run()
+
+        pe = dst_pll_pe.data()
+        freq = dst_pll_freq.data()
+
+        #check the loop is frozen on the central frequency while stopped
+        self.assertEqual(max(np.abs(pe[param.stop:param.start])), 0)
+        self.assertAlmostEqual(freq[param.start - 1], param.f_central)
+
+        #check the loop is tracking again after the start
+        self.assertAlmostEqual(freq[-1], param.freq, delta = param.freq * 0.05)
+
+        #check the tags forwarded to the phase accumulator port
+        tags = dst_pll_tags.current_tags()
+        self.assertEqual(len(tags), 2)
+        self.assertEqual(tags[0].offset, param.stop)
+        self.assertEqual(pmt.symbol_to_string(tags[0].key), "modulator")
+        self.assertEqual(tags[1].offset, param.start)
+        self.assertEqual(pmt.symbol_to_string(tags[1].key), "accumulator")
+        print ("-Tags on the phase accumulator port: %d;" % len(tags))
+
+    def test_013_t (self):
+        """test_013_t: fast mode against the exact mode"""
+
+        tb = self.tb
+        param = namedtuple('param', 'coeff1 coeff2 coeff3 f_central bw samp_rate items N freq')
+
+        param.coeff1 = 0.065044
+        param.coeff2 = 0.00216
+        param.coeff3 = 0
+        param.f_central = 500
+        param.bw = 500
+        param.N = 16
+        param.samp_rate = 4096 * 4
+        param.items = param.samp_rate
+        param.freq = 600
+
+        src = analog.sig_source_c(param.samp_rate, analog.GR_COS_WAVE, param.freq, 1, 0)
+        head = blocks.head(gr.sizeof_gr_complex, param.items)
+
+        pll_exact = ecss.pll(param.samp_rate, param.N, [param.coeff1, param.coeff2, param.coeff3], param.f_central, param.bw)
+        pll_fast = ecss.pll(param.samp_rate, param.N, [param.coeff1, param.coeff2, param.coeff3], param.f_central, param.bw)
+        pll_fast.set_fast(True)
+
+        dst_exact_out = blocks.vector_sink_c()
+        dst_exact_freq = blocks.vector_sink_f()
+        dst_fast_out = blocks.vector_sink_c()
+        dst_fast_freq = blocks.vector_sink_f()
+
+        tb.connect(src, head)
+        tb.connect(head, pll_exact)
+        tb.connect(head, pll_fast)
+        tb.connect((pll_exact, 0), dst_exact_out)
+        tb.connect((pll_exact, 1), dst_exact_freq)
+        tb.connect((pll_fast, 0), dst_fast_out)
+        tb.connect((pll_fast, 1), dst_fast_freq)
+        self.tb.run()
+
+        self.assertTrue(pll_fast.get_fast())
+        self.assertFalse(pll_exact.get_fast())
+
+        exact_out = np.asarray(dst_exact_out.data())
+        fast_out = np.asarray(dst_fast_out.data())
+        exact_freq = np.asarray(dst_exact_freq.data())
+        fast_freq = np.asarray(dst_fast_freq.data())
+
+        #the two loops must track the same signal with an error bounded by the approximations
+        out_error_max = max(np.abs(exact_out - fast_out))
+        freq_error_max = max(np.abs(exact_freq - fast_freq))
+        self.assertLess(out_error_max, 1e-2)
+        self.assertLess(freq_error_max, 1)
+        self.assertAlmostEqual(fast_freq[-1], param.freq, delta = param.freq * 0.05)
+        print ("-Output 'Out' maximum difference (fast - exact): %g;" % out_error_max)
+        print ("-Output 'freq' maximum difference (fast - exact): %g Hz;" % freq_error_max)
+
+    def test_014_t (self):
+        """test_014_t: lock detector messages with a stop tag in the middle of the signal"""
+
+        tb = self.tb
+        param = namedtuple('param', 'coeff1 coeff2 coeff3 f_central bw samp_rate items N freq')
+
+        param.coeff1 = 0.065044
+        param.coeff2 = 0.00216
+        param.coeff3 = 0
+        param.f_central = 500
+        param.bw = 500
+        param.N = 38
+        param.samp_rate = 4096 * 4
+        param.items = param.samp_rate
+        param.freq = 600
+
+        tag_stop = gr.tag_t()
+        tag_stop.offset = int(param.items / 2)
+        tag_stop.key = pmt.intern("pll")
+        tag_stop.value = pmt.intern("stop")
+
+        src = analog.sig_source_c(param.samp_rate, analog.GR_COS_WAVE, param.freq, 1, 0)
+        head = blocks.head(gr.sizeof_gr_complex, param.items)
+        tagger = blocks.vector_source_c([0] * param.items, False, 1, [tag_stop])
+        adder = blocks.add_vcc(1)
+        pll = ecss.pll(param.samp_rate, param.N, [param.coeff1, param.coeff2, param.coeff3], param.f_central, param.bw)
+        pll.set_lock_alpha(0.05)
+        pll.set_lock_decimation(64)
+        dst_out = blocks.vector_sink_c()
+        dbg = blocks.message_debug()
+
+        tb.connect(src, head, (adder, 0))
+        tb.connect(tagger, (adder, 1))
+        tb.connect(adder, pll)
+        tb.connect((pll, 0), dst_out)
+        tb.msg_connect((pll, 'lock_out'), (dbg, 'store'))
+        self.tb.run()
+
+        #the loop must lock on the tone and unlock after the stop tag
+        self.assertEqual(dbg.num_messages(), 2)
+        self.assertEqual(pmt.symbol_to_string(dbg.get_message(0)), "LOCK")
+        self.assertEqual(pmt.symbol_to_string(dbg.get_message(1)), "UNLOCK")
+        self.assertFalse(pll.get_locked())
+        self.assertAlmostEqual(pll.get_lock_threshold(), 0.8, 6)
+        self.assertAlmostEqual(pll.get_unlock_threshold(), 0.5, 6)
+        self.assertEqual(pll.get_lock_decimation(), 64)
+        print ("-Lock detector messages: %d;" % dbg.num_messages())
+
+    def test_015_t (self):
+        """test_015_t: decimated and averaged optional outputs against a full rate PLL"""
+
+        tb = self.tb
+        param = namedtuple('param', 'coeff1 coeff2 coeff3 f_central bw samp_rate items N freq decimation')
+
+        param.coeff1 = 0.065044
+        param.coeff2 = 0.00216
+        param.coeff3 = 0
+        param.f_central = 500
+        param.bw = 500
+        param.N = 38
+        param.samp_rate = 4096 * 4
+        param.items = param.samp_rate
+        param.freq = 600
+        param.decimation = 16
+
+        tag_start = gr.tag_t()
+        tag_start.offset = 1000
+        tag_start.key = pmt.intern("pll")
+        tag_start.value = pmt.intern("start")
+
+        src = analog.sig_source_c(param.samp_rate, analog.GR_COS_WAVE, param.freq, 1, 0)
+        head = blocks.head(gr.sizeof_gr_complex, param.items)
+        tagger = blocks.vector_source_c([0] * param.items, False, 1, [tag_start])
+        adder = blocks.add_vcc(1)
+
+        coefficients = [param.coeff1, param.coeff2, param.coeff3]
+        pll_full = ecss.pll(param.samp_rate, param.N, coefficients, param.f_central, param.bw)
+        pll_decim = ecss.pll(param.samp_rate, param.N, coefficients, param.f_central, param.bw)
+        pll_avg = ecss.pll(param.samp_rate, param.N, coefficients, param.f_central, param.bw)
+        pll_decim.set_decimation(param.decimation)
+        pll_avg.set_decimation(param.decimation)
+        pll_avg.set_average(True)
+
+        dst = []
+        for pll in (pll_full, pll_decim, pll_avg):
+            sinks = [blocks.vector_sink_c(), blocks.vector_sink_f(), blocks.vector_sink_f(), blocks.vector_sink_s(4)]
+            tb.connect(adder, pll)
+            for port in range(4):
+                tb.connect((pll, port), sinks[port])
+            dst.append(sinks)
+
+        tb.connect(src, head, (adder, 0))
+        tb.connect(tagger, (adder, 1))
+        self.tb.run()
+
+        full_out = np.asarray(dst[0][0].data())
+        full_freq = np.asarray(dst[0][1].data())
+        full_error = np.asarray(dst[0][2].data())
+        groups = param.items // param.decimation
+
+        #the main output is never decimated
+        self.assertComplexTuplesAlmostEqual(dst[1][0].data(), full_out, 6)
+        self.assertComplexTuplesAlmostEqual(dst[2][0].data(), full_out, 6)
+
+        #the decimated outputs are the last sample of each group
+        self.assertEqual(len(dst[1][1].data()), groups)
+        self.assertFloatTuplesAlmostEqual(dst[1][1].data(), full_freq[param.decimation - 1::param.decimation], 6)
+        self.assertFloatTuplesAlmostEqual(dst[1][2].data(), full_error[param.decimation - 1::param.decimation], 6)
+        self.assertEqual(len(dst[1][3].data()), groups * 4)
+        self.assertEqual(dst[1][3].data()[-4:], dst[0][3].data()[-4:])
+
+        #the averaged outputs are the mean of each group
+        freq_mean = full_freq.reshape(groups, param.decimation).mean(axis=1)
+        error_mean = full_error.reshape(groups, param.decimation).mean(axis=1)
+        self.assertLess(max(np.abs(np.asarray(dst[2][1].data()) - freq_mean)), 1e-3)
+        self.assertLess(max(np.abs(np.asarray(dst[2][2].data()) - error_mean)), 1e-5)
+        self.assertEqual(pll_avg.get_decimation(), param.decimation)
+        self.assertTrue(pll_avg.get_average())
+
+        #the reset tag of the accumulator moves on the decimated stream
+        tags = dst[1][3].tags()
+        self.assertEqual(len(tags), 1)
+        self.assertEqual(tags[0].offset, tag_start.offset // param.decimation)
+        print ("-Decimated items: %d of %d;" % (len(dst[1][1].data()), param.items))
+
+    def test_016_t (self):
+        """test_016_t: frequency tag after the reset tag, as placed by the FFT signal search"""
+
+        tb = self.tb
+        param = namedtuple('param', 'coeff1 coeff2 coeff3 f_central bw samp_rate items N freq')
+
+        param.coeff1 = 0.065044
+        param.coeff2 = 0.00216
+        param.coeff3 = 0
+        param.f_central = 500
+        param.bw = 500
+        param.N = 38
+        param.samp_rate = 4096 * 4
+        param.items = param.samp_rate
+        param.freq = 700
+
+        tag_reset = gr.tag_t()
+        tag_reset.offset = 0
+        tag_reset.key = pmt.intern("pll")
+        tag_reset.value = pmt.intern("reset")
+
+        tag_freq = gr.tag_t()
+        tag_freq.offset = 0
+        tag_freq.key = pmt.intern("pll")
+        tag_freq.value = pmt.cons(pmt.intern("freq"), pmt.from_double(param.freq))
+
+        src = analog.sig_source_c(param.samp_rate, analog.GR_COS_WAVE, param.freq, 1, 0)
+        head = blocks.head(gr.sizeof_gr_complex, param.items)
+        tagger = blocks.vector_source_c([0] * param.items, False, 1, [tag_reset, tag_freq])
+        adder = blocks.add_vcc(1)
+
+        coefficients = [param.coeff1, param.coeff2, param.coeff3]
+        pll_seeded = ecss.pll(param.samp_rate, param.N, coefficients, param.f_central, param.bw)
+        pll_free = ecss.pll(param.samp_rate, param.N, coefficients, param.f_central, param.bw)
+        dst_seeded = blocks.vector_sink_f()
+        dst_free = blocks.vector_sink_f()
+
+        tb.connect(src, head, (adder, 0))
+        tb.connect(tagger, (adder, 1))
+        tb.connect(adder, pll_seeded)
+        tb.connect((pll_seeded, 0), blocks.null_sink(gr.sizeof_gr_complex))
+        tb.connect((pll_seeded, 1), dst_seeded)
+        tb.connect(head, pll_free)
+        tb.connect((pll_free, 0), blocks.null_sink(gr.sizeof_gr_complex))
+        tb.connect((pll_free, 1), dst_free)
+        self.tb.run()
+
+        freq_seeded = np.asarray(dst_seeded.data())
+        freq_free = np.asarray(dst_free.data())
+        settled = int(param.samp_rate / 1000)
+
+        #the seeded loop starts on the frequency of the tag, the other one pulls in from the central frequency
+        self.assertLess(max(np.abs(freq_seeded[settled:] - param.freq)), param.freq * 0.01)
+        self.assertGreater(abs(freq_free[settled] - param.freq), param.freq * 0.05)
+        self.assertAlmostEqual(pll_seeded.get_frequency(), param.freq, delta = param.freq * 0.01)
+        print ("-Frequency after %d samples: %f Hz (seeded), %f Hz (free);" % (settled, freq_seeded[settled], freq_free[settled]))
+
+    def test_017_t (self):
+        """test_017_t: hysteresis of the lock detector thresholds"""
+
+        pll = ecss.pll(4096 * 4, 38, [0.065044, 0.00216, 0], 500, 500)
+
+        #the lock threshold can not cross the unlock threshold with a single setter
+        self.assertRaises((IndexError, RuntimeError), pll.set_lock_threshold, 0.4)
+        self.assertRaises((IndexError, RuntimeError), pll.set_unlock_threshold, 0.9)
+        self.assertRaises((IndexError, RuntimeError), pll.set_lock_thresholds, 0.3, 0.4)
+        self.assertAlmostEqual(pll.get_lock_threshold(), 0.8, 6)
+        self.assertAlmostEqual(pll.get_unlock_threshold(), 0.5, 6)
+
+        #both thresholds move together
+        pll.set_lock_thresholds(0.4, 0.3)
+        self.assertAlmostEqual(pll.get_lock_threshold(), 0.4, 6)
+        self.assertAlmostEqual(pll.get_unlock_threshold(), 0.3, 6)
+        print ("-Inverted thresholds rejected;")
+
 if __name__ == '__main__':
     suite = gr_unittest.TestLoader().loadTestsFromTestCase(qa_pll)
     runner = runner.HTMLTestRunner(output='../TestResults', template='DEFAULT_TEMPLATE_3')
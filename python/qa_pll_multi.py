@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+#
+# Copyright 2018 Antonio Miraglia - ISISpace .
+#
+
+from gnuradio import gr, gr_unittest
+from gnuradio import blocks, analog
+from collections import namedtuple
+import ecss as ecss
+import math, time, datetime, os, abc, sys, pmt
+import runner
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_pdf import PdfPages
+import base64
+from io import BytesIO
+
+class Pdf_class(object):
+    """this class can print a single pdf for all the tests"""
+
+    graphs_list = []
+
+    def __init__(self, name_test='test'):
+        current_dir = os.getcwd()
+        dir_to = os.path.join(current_dir, '../TestResults/Graphs')
+
+        if not os.path.exists(dir_to):
+            os.makedirs(dir_to)
+        self.name_test = name_test.split('.')[0]
+        self.name_complete = dir_to + '/' + name_test.split('.')[0] + "_graphs.pdf"
+
+    def add_to_pdf(self, fig):
+        """this function can add a new element/page to the list of pages"""
+
+        fig_size = [21 / 2.54, 29.7 / 2.54] # width in inches & height in inches
+        fig.set_size_inches(fig_size)
+        Pdf_class.graphs_list.append(fig)
+
+    def finalize_pdf(self):
+        """this function print the final version of the pdf with all the pages"""
+
+        with PdfPages(self.name_complete) as pdf:
+            for graph in Pdf_class.graphs_list:
+                pdf.savefig(graph)   #write the figures for that list
+
+            d = pdf.infodict()
+            d['Title'] = self.name_test
+            d['Author'] = 'Antonio Miraglia - ISISpace'
+            d['Subject'] = 'self generated graphs from the qa test'
+            d['Keywords'] = self.name_test
+            d['CreationDate'] = datetime.datetime(2018, 8, 21)
+            d['ModDate'] = datetime.datetime.today()
+
+def print_parameters(data):
+    to_print = "/pr!Coeff1 (1st order) = %f; Coeff2 (2nd order) = %f; Coeff3 (3rd order) = %f; Bandwidth = %.2f Hz; Sample rate = %d Hz; Number of Bits = %d; Channels = %d/pr!" \
+        %(data.coeff1, data.coeff2, data.coeff3, data.bw, data.samp_rate, data.N, len(data.freq))
+    print (to_print)
+
+def plot(self, data_multi):
+    """this function create a defined graph with the frequency of each channel"""
+
+    fig, ax1 = plt.subplots(1)
+
+    ax1.set_xlabel('Time [s]')
+    ax1.set_ylabel('Frequency [Hz]')
+    ax1.set_title("Output 'freq'", fontsize=20)
+    for freq in data_multi.freq:
+        ax1.plot(data_multi.time, freq, scalex=True, scaley=True, linewidth=1)
+    ax1.grid(True)
+
+    name_test = self.id().split("__main__.")[1]
+    name_test_usetex = name_test.replace('_', '\_').replace('.', ': ')
+
+    fig.suptitle(name_test_usetex, fontsize=30)
+    fig.tight_layout()  # otherwise the right y-label is slightly clipped
+    fig.subplots_adjust(hspace=0.6, top=0.85, bottom=0.15)
+
+    tmpfile = BytesIO()
+    fig.savefig(tmpfile, format='png')
+    fig_encoded = base64.b64encode(tmpfile.getvalue())
+    print("/im!{}/im!".format(fig_encoded.decode("utf-8")))#add in th template
+
+    # plt.show()
+    self.pdf.add_to_pdf(fig)
+
+def test_multi(self, param, tags):
+    """this function runs every channel through the pll_multi block and a single ecss PLL"""
+
+    tb = self.tb
+    data_multi = namedtuple('data_multi', 'out ref freq time')
+
+    coefficients = [param.coeff1, param.coeff2, param.coeff3]
+    multi = ecss.pll_multi(param.samp_rate, param.N, coefficients, param.f_central, param.bw)
+
+    dst_multi = []
+    dst_single = []
+    dst_freq = []
+    for c in range(len(param.freq)):
+        src = analog.sig_source_c(param.samp_rate, analog.GR_COS_WAVE, param.freq[c], 1, 0)
+        head = blocks.head(gr.sizeof_gr_complex, param.items)
+        tagger = blocks.vector_source_c([0] * param.items, False, 1, tags[c])
+        adder = blocks.add_vcc(1)
+        single = ecss.pll(param.samp_rate, param.N, coefficients, param.f_central[c], param.bw)
+
+        dst_multi.append(blocks.vector_sink_c())
+        dst_single.append(blocks.vector_sink_c())
+        dst_freq.append(blocks.vector_sink_f())
+
+        tb.connect(src, head, (adder, 0))
+        tb.connect(tagger, (adder, 1))
+        tb.connect(adder, (multi, c))
+        tb.connect(adder, single)
+        tb.connect((multi, c), dst_multi[c])
+        tb.connect((single, 0), dst_single[c])
+        tb.connect((single, 1), dst_freq[c])
+
+    self.tb.run()
+
+    data_multi.out = [dst.data() for dst in dst_multi]
+    data_multi.ref = [dst.data() for dst in dst_single]
+    data_multi.freq = [dst.data() for dst in dst_freq]
+    data_multi.time = np.linspace(0, (param.items * 1.0 / param.samp_rate), param.items, endpoint=False)
+
+    return multi, data_multi
+
+class qa_pll_multi (gr_unittest.TestCase):
+
+    def setUp (self):
+        self.tb = gr.top_block ()
+        self.pdf = Pdf_class(self.id().split(".")[1])
+
+    def tearDown (self):
+        self.tb = None
+        self.pdf.finalize_pdf()
+
+    def test_001_t (self):
+        """test_001_t: three channels against three single PLLs"""
+        param = namedtuple('param', 'coeff1 coeff2 coeff3 f_central bw samp_rate items N freq')
+
+        param.coeff1 = 0.065044
+        param.coeff2 = 0.00216
+        param.coeff3 = 0
+        param.f_central = [500, 1000, -1000]
+        param.bw = 500
+        param.N = 38
+        param.samp_rate = 4096 * 4
+        param.items = param.samp_rate
+        param.freq = [600, 900, -1100]
+
+        print_parameters(param)
+        multi, data_multi = test_multi(self, param, [[], [], []])
+        plot(self, data_multi)
+
+        #the output of every channel must be the same of a single PLL
+        for c in range(len(param.freq)):
+            self.assertComplexTuplesAlmostEqual(data_multi.out[c], data_multi.ref[c], 6)
+            self.assertAlmostEqual(multi.get_frequency(c), param.freq[c], delta = param.freq[c] * 0.05)
+            print ("-Channel %d frequency: %f Hz;" % (c, multi.get_frequency(c)))
+
+    def test_002_t (self):
+        """test_002_t: stop and start tags on a single channel"""
+        param = namedtuple('param', 'coeff1 coeff2 coeff3 f_central bw samp_rate items N freq')
+
+        param.coeff1 = 0.065044
+        param.coeff2 = 0.00216
+        param.coeff3 = 0
+        param.f_central = [500, 500]
+        param.bw = 500
+        param.N = 38
+        param.samp_rate = 4096 * 4
+        param.items = param.samp_rate
+        param.freq = [600, 600]
+
+        tag_stop = gr.tag_t()
+        tag_stop.offset = int(param.items / 4)
+        tag_stop.key = pmt.intern("pll")
+        tag_stop.value = pmt.intern("stop")
+
+        tag_start = gr.tag_t()
+        tag_start.offset = int(param.items / 2)
+        tag_start.key = pmt.intern("pll")
+        tag_start.value = pmt.intern("start")
+
+        print_parameters(param)
+        multi, data_multi = test_multi(self, param, [[tag_stop, tag_start], []])
+        plot(self, data_multi)
+
+        #the tags of a channel must not affect the other channels
+        for c in range(len(param.freq)):
+            self.assertComplexTuplesAlmostEqual(data_multi.out[c], data_multi.ref[c], 6)
+
+        self.assertNotEqual(data_multi.out[0][int(param.items / 2) - 1], data_multi.out[1][int(param.items / 2) - 1])
+        self.assertEqual(multi.get_channels(), 2)
+        print ("-Channels with independent tags: %d;" % multi.get_channels())
+
+
+if __name__ == '__main__':
+    suite = gr_unittest.TestLoader().loadTestsFromTestCase(qa_pll_multi)
+    runner = runner.HTMLTestRunner(output='../TestResults', template='DEFAULT_TEMPLATE_3')
+    runner.run(suite)
+    #gr_unittest.TestProgram()
@@ -27,6 +27,12 @@ def make_tag(key, value, offset, srcid=None):
 def compare_tags(a, b):
     return a.offset == b.offset and pmt.equal(a.key, b.key) and pmt.equal(a.value, b.value)
 
+def freq_tag(tag):
+    """this function returns the frequency of a ("pll", ("freq" . f)) tag, None for the other tags"""
+    if pmt.symbol_to_string(tag.key) == "pll" and pmt.is_pair(tag.value) and pmt.eq(pmt.car(tag.value), pmt.intern("freq")):
+        return pmt.to_double(pmt.cdr(tag.value))
+    return None
+
 def print_parameters(data):
     to_print = "/pr!Frequency central = %.2f Hz; Bandwidth = %.2f Hz; Average = %s; Frequency cut-off (average) = %.1f; Sample rate = %d Hz; Input frequency = %d Hz; Input noise = %.2f V; Threshold = %.1f dB; Decimation = %d; FFT size = %d/pr!" \
         %(data.f_central, data.bw, data.average, data.cutoff, data.samp_rate, data.freq, data.noise, data.threshold, data.fft_size, data.decimation)
@@ -82,6 +88,45 @@ def test_sine(self, param):
 
     return data_signal_search
 
+def test_sine_real(self, param):
+    """this function run the defined test with a real input"""
+
+    tb = self.tb
+    data_signal_search = namedtuple('data_signal_search', 'src out tags')
+
+    amplitude = 1
+    offset = 0
+    Average = False
+
+    src_sine = analog.sig_source_f(param.samp_rate, analog.GR_COS_WAVE, param.freq, amplitude, offset)
+    src_noise = analog.noise_source_f(analog.GR_GAUSSIAN, param.noise, offset)
+
+    adder = blocks.add_vff(1)
+    head = blocks.head(gr.sizeof_float, int (param.items))
+
+    dst_source = blocks.vector_sink_f()
+    dst_out = blocks.vector_sink_f()
+
+    signal_search = ecss.signal_search_fft_hier(True, param.fft_size, param.decimation, Average, firdes.WIN_BLACKMAN_hARRIS, param.f_central, param.bw, param.average, param.threshold, param.samp_rate, True)
+
+    agc = ecss.agc_ff(10, 1, 1, 65536, param.samp_rate)
+
+    tb.connect(src_sine, (adder, 0))
+    tb.connect(src_noise,(adder, 1))
+    tb.connect(adder, head)
+    tb.connect(head, agc)
+    tb.connect(agc, dst_source)
+    tb.connect(agc, signal_search)
+    tb.connect(signal_search, dst_out)
+
+    self.tb.run()
+
+    data_signal_search.src = dst_source.data()
+    data_signal_search.out = dst_out.data()
+    data_signal_search.tags = dst_out.tags()
+
+    return data_signal_search
+
 class qa_signal_search_fft_hier (gr_unittest.TestCase):
 
     def setUp (self):
@@ -110,11 +155,14 @@ class qa_signal_search_fft_hier (gr_unittest.TestCase):
 
         data_sine = test_sine(self, param)
 
-        expected_tags = tuple([ make_tag("reset", "pll", 0, 'src_sine')])
+        expected_tags = tuple([ make_tag("pll", "reset", 0, 'src_sine')])
 
+        #the reset of the PLL is followed by the frequency of the detected sine
         self.assertEqual(len(data_sine.out), len(data_sine.src))
-        self.assertEqual(len(data_sine.tags), 1)
+        self.assertEqual(len(data_sine.tags), 2)
         self.assertTrue(compare_tags(data_sine.tags[0], expected_tags[0]))
+        self.assertEqual(data_sine.tags[1].offset, 0)
+        self.assertAlmostEqual(freq_tag(data_sine.tags[1]), param.freq, delta = 0.1)
         self.assertComplexTuplesAlmostEqual(data_sine.out, data_sine.src)
 
 
@@ -139,7 +187,7 @@ class qa_signal_search_fft_hier (gr_unittest.TestCase):
         data_sine = test_sine(self, param)
 
         self.assertEqual(len(data_sine.out), len(data_sine.src))
-        self.assertEqual(len(data_sine.tags), 1)
+        self.assertEqual(len(data_sine.tags), 2)
         self.assertComplexTuplesAlmostEqual(data_sine.out, data_sine.src)
 
     def test_003_t (self):
@@ -191,6 +239,53 @@ class qa_signal_search_fft_hier (gr_unittest.TestCase):
         self.assertGreater(len(data_sine.out), 0)
         self.assertGreaterEqual(len(data_sine.tags), 1)
 
+    def test_005_t (self):
+        """test_005_t: with a real input sine without noise in the central BW"""
+        param = namedtuple('param', 'f_central bw samp_rate items average cutoff threshold decimation fft_size freq noise')
+
+        param.f_central = 2000
+        param.bw = 1000
+        param.average = False
+        param.cutoff = 1000
+        param.samp_rate = 4096 * 8
+        param.items = param.samp_rate
+        param.freq = 2000
+        param.threshold = 10
+        param.noise = 0
+        param.fft_size = 4096
+        param.decimation = 1
+
+        print_parameters(param)
+
+        data_sine = test_sine_real(self, param)
+
+        self.assertEqual(len(data_sine.out), len(data_sine.src))
+        self.assertEqual(len(data_sine.tags), 2)
+        self.assertFloatTuplesAlmostEqual(data_sine.out, data_sine.src)
+
+    def test_006_t (self):
+        """test_006_t: with a real input sine without noise outside BW"""
+        param = namedtuple('param', 'f_central bw samp_rate items average cutoff threshold decimation fft_size freq noise')
+
+        param.f_central = 2000
+        param.bw = 1000
+        param.average = False
+        param.cutoff = 1000
+        param.samp_rate = 4096 * 8
+        param.items = param.samp_rate
+        param.freq = 2550
+        param.threshold = 10
+        param.noise = 0
+        param.fft_size = 4096
+        param.decimation = 1
+
+        print_parameters(param)
+
+        data_sine = test_sine_real(self, param)
+
+        self.assertEqual(len(data_sine.out), 0)
+        self.assertEqual(len(data_sine.tags), 0)
+
 
 
 if __name__ == '__main__':
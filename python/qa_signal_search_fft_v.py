@@ -26,6 +26,12 @@ def make_tag(key, value, offset, srcid=None):
 def compare_tags(a, b):
     return a.offset == b.offset and pmt.equal(a.key, b.key) and pmt.equal(a.value, b.value)
 
+def freq_tag(tag):
+    """this function returns the frequency of a ("pll", ("freq" . f)) tag, None for the other tags"""
+    if pmt.symbol_to_string(tag.key) == "pll" and pmt.is_pair(tag.value) and pmt.eq(pmt.car(tag.value), pmt.intern("freq")):
+        return pmt.to_double(pmt.cdr(tag.value))
+    return None
+
 def print_parameters(data):
     to_print = "/pr!Frequency central = %.2f Hz; Bandwidth = %.2f Hz; Average = %s; Frequency cut-off (average) = %.1f; Sample rate = %d Hz; Input frequency = %d Hz; Input noise = %.2f V; Threshold = %.1f dB; Decimation = %d; FFT size = %d /pr!" \
         %(data.f_central, data.bw, data.average, data.cutoff, data.samp_rate, data.freq, data.noise, data.threshold, data.fft_size, data.decimation)
@@ -53,9 +59,12 @@ def test_sine(self, param):
     dst_out = blocks.vector_sink_c()
     null = blocks.null_sink(gr.sizeof_gr_complex*1)
 
-    ecss_signal_search_fft_v = ecss.signal_search_fft_v(True, param.fft_size, param.decimation, Average, firdes.WIN_BLACKMAN_hARRIS, param.f_central, param.bw, param.average, param.threshold, param.samp_rate)
+    ecss_signal_search_fft_v = ecss.signal_search_fft_vcc(True, param.fft_size, param.decimation, Average, firdes.WIN_BLACKMAN_hARRIS, param.f_central, param.bw, param.average, param.threshold, param.samp_rate)
     blocks_stream_to_vector = blocks.stream_to_vector(gr.sizeof_gr_complex*1, param.fft_size * param.decimation)
     blocks_vector_to_stream = blocks.vector_to_stream(gr.sizeof_gr_complex*1, param.fft_size * param.decimation)
+    if hasattr(param, 'averages'):
+        ecss_signal_search_fft_v.set_averages(param.averages)
+        ecss_signal_search_fft_v.set_overlap(param.overlap)
 
     agc = ecss.agc_cc(10, 1, 1, 65536, param.samp_rate)
 
@@ -85,6 +94,38 @@ def test_sine(self, param):
 
     return data_signal_search
 
+def test_peaks(self, param):
+    """this function runs a sum of sines through the block and returns the published peak lists"""
+
+    tb = self.tb
+    offset = 0
+
+    adder = blocks.add_vcc(1)
+    for c in range(len(param.freq)):
+        src_sine = analog.sig_source_c(param.samp_rate, analog.GR_COS_WAVE, param.freq[c], param.amplitude[c], offset)
+        tb.connect(src_sine, (adder, c))
+    src_noise = analog.noise_source_c(analog.GR_GAUSSIAN, param.noise, offset)
+    tb.connect(src_noise, (adder, len(param.freq)))
+
+    head = blocks.head(gr.sizeof_gr_complex, int (param.items))
+    debug = blocks.message_debug()
+    null = blocks.null_sink(gr.sizeof_gr_complex * param.fft_size * param.decimation)
+
+    ecss_signal_search_fft_v = ecss.signal_search_fft_vcc(True, param.fft_size, param.decimation, False, firdes.WIN_BLACKMAN_hARRIS, param.f_central, param.bw, param.average, param.threshold, param.samp_rate)
+    ecss_signal_search_fft_v.set_peaks(param.peaks)
+    blocks_stream_to_vector = blocks.stream_to_vector(gr.sizeof_gr_complex*1, param.fft_size * param.decimation)
+
+    tb.connect(adder, head, blocks_stream_to_vector, ecss_signal_search_fft_v, null)
+    tb.msg_connect((ecss_signal_search_fft_v, 'peaks'), (debug, 'store'))
+
+    self.tb.run()
+
+    peaks = []
+    for i in range(debug.num_messages()):
+        msg = debug.get_message(i)
+        peaks.append([pmt.f32vector_elements(pmt.dict_ref(msg, pmt.intern(key), pmt.PMT_NIL)) for key in ('freq', 'snr', 'power')])
+    return peaks
+
 class qa_signal_search_fft_v (gr_unittest.TestCase):
 
     def setUp (self):
@@ -113,11 +154,14 @@ class qa_signal_search_fft_v (gr_unittest.TestCase):
 
         data_sine = test_sine(self, param)
 
-        expected_tags = tuple([ make_tag("reset", "pll", 0, 'src_sine')])
+        expected_tags = tuple([ make_tag("pll", "reset", 0, 'src_sine')])
 
+        #the reset of the PLL is followed by the frequency of the detected sine
         self.assertEqual(len(data_sine.out), len(data_sine.src))
-        self.assertEqual(len(data_sine.tags), 1)
+        self.assertEqual(len(data_sine.tags), 2)
         self.assertTrue(compare_tags(data_sine.tags[0], expected_tags[0]))
+        self.assertEqual(data_sine.tags[1].offset, 0)
+        self.assertAlmostEqual(freq_tag(data_sine.tags[1]), param.freq, delta = 0.1)
         self.assertComplexTuplesAlmostEqual(data_sine.out, data_sine.src)
 
 
@@ -142,7 +186,7 @@ class qa_signal_search_fft_v (gr_unittest.TestCase):
         data_sine = test_sine(self, param)
 
         self.assertGreaterEqual(len(data_sine.out), len(data_sine.src))
-        self.assertEqual(len(data_sine.tags), 1)
+        self.assertEqual(len(data_sine.tags), 2)
         self.assertComplexTuplesAlmostEqual(data_sine.out, data_sine.src)
         
     def test_003_t (self):
@@ -193,7 +237,191 @@ class qa_signal_search_fft_v (gr_unittest.TestCase):
         self.assertGreaterEqual(len(data_sine.src), len(data_sine.out))
         self.assertGreater(len(data_sine.out), 0)
         self.assertGreaterEqual(len(data_sine.tags), 1)
-    
+
+    def test_005_t (self):
+        """test_005_t: with a input sine with noise in the central BW after the decimation"""
+        param = namedtuple('param', 'f_central bw samp_rate items average cutoff threshold decimation fft_size freq noise')
+
+        param.f_central = 0
+        param.bw = 1000
+        param.average = False
+        param.cutoff = 1000
+        param.samp_rate = 4096 * 8
+        param.items = param.samp_rate
+        param.freq = 100
+        param.threshold = 10
+        param.noise = 0.1
+        param.fft_size = 1024
+        param.decimation = 4
+
+        print_parameters(param)
+
+        data_sine = test_sine(self, param)
+
+        self.assertEqual(len(data_sine.out), len(data_sine.src))
+        self.assertEqual(len(data_sine.tags), 2)
+        self.assertComplexTuplesAlmostEqual(data_sine.out, data_sine.src)
+
+    def test_006_t (self):
+        """test_006_t: with a input sine with noise on the image of the central BW folded by the decimation"""
+        param = namedtuple('param', 'f_central bw samp_rate items average cutoff threshold decimation fft_size freq noise')
+
+        param.f_central = 0
+        param.bw = 1000
+        param.average = False
+        param.cutoff = 1000
+        param.samp_rate = 4096 * 8
+        param.items = param.samp_rate
+        param.freq = 4096 * 2 + 100
+        param.threshold = 10
+        param.noise = 0.1
+        param.fft_size = 1024
+        param.decimation = 4
+
+        print_parameters(param)
+
+        data_sine = test_sine(self, param)
+
+        #the anti-aliasing filter must reject the image of the sine
+        self.assertEqual(len(data_sine.out), 0)
+        self.assertEqual(len(data_sine.tags), 0)
+
+    def test_007_t (self):
+        """test_007_t: with a input sine with strong noise in the central BW and Welch average"""
+        param = namedtuple('param', 'f_central bw samp_rate items average cutoff threshold decimation fft_size freq noise averages overlap')
+
+        param.f_central = 0
+        param.bw = 1000
+        param.average = False
+        param.cutoff = 1000
+        param.samp_rate = 4096 * 8
+        param.items = param.samp_rate * 2
+        param.freq = 100
+        param.threshold = 2
+        param.noise = 2.5
+        param.fft_size = 1024
+        param.decimation = 1
+        param.averages = 16
+        param.overlap = 0.75
+
+        print_parameters(param)
+
+        data_sine = test_sine(self, param)
+
+        #once detected, the averaged spectrum must keep the signal above the threshold
+        self.assertGreater(len(data_sine.out), 0)
+        self.assertEqual(len(data_sine.tags), 2)
+        self.assertComplexTuplesAlmostEqual(data_sine.out, data_sine.src[len(data_sine.src) - len(data_sine.out):])
+
+    def test_008_t (self):
+        """test_008_t: with strong noise only in the central BW and Welch average"""
+        param = namedtuple('param', 'f_central bw samp_rate items average cutoff threshold decimation fft_size freq noise averages overlap')
+
+        param.f_central = 0
+        param.bw = 1000
+        param.average = False
+        param.cutoff = 1000
+        param.samp_rate = 4096 * 8
+        param.items = param.samp_rate * 2
+        param.freq = 5000
+        param.threshold = 2
+        param.noise = 2.5
+        param.fft_size = 1024
+        param.decimation = 1
+        param.averages = 16
+        param.overlap = 0.75
+
+        print_parameters(param)
+
+        data_sine = test_sine(self, param)
+
+        self.assertEqual(len(data_sine.out), 0)
+        self.assertEqual(len(data_sine.tags), 0)
+
+    def test_009_t (self):
+        """test_009_t: peak list of two sines with noise on the whole spectrum"""
+        param = namedtuple('param', 'f_central bw samp_rate items average cutoff threshold decimation fft_size freq amplitude noise peaks')
+
+        param.f_central = 0
+        param.bw = 1000
+        param.average = False
+        param.cutoff = 1000
+        param.samp_rate = 4096 * 8
+        param.items = param.samp_rate
+        param.freq = [1000, -3000]
+        param.amplitude = [1, 0.5]
+        param.threshold = 10
+        param.noise = 0.1
+        param.fft_size = 1024
+        param.decimation = 1
+        param.peaks = 3
+
+        peaks = test_peaks(self, param)
+        bin_width = param.samp_rate / param.fft_size
+
+        #a list for each vector, the two sines are the strongest peaks
+        self.assertEqual(len(peaks), param.items // (param.fft_size * param.decimation))
+        for freq, snr, power in peaks:
+            self.assertGreaterEqual(len(freq), 2)
+            self.assertLessEqual(len(freq), param.peaks)
+            self.assertAlmostEqual(freq[0], param.freq[0], delta = bin_width)
+            self.assertAlmostEqual(freq[1], param.freq[1], delta = bin_width)
+            self.assertGreater(snr[1], 10 * math.log10(param.threshold))
+            self.assertAlmostEqual(snr[0] - snr[1], 20 * math.log10(param.amplitude[0] / param.amplitude[1]), delta = 1)
+            self.assertGreater(power[0], power[1])
+
+    def test_010_t (self):
+        """test_010_t: the detection is tagged with the reset of the PLL"""
+        param = namedtuple('param', 'f_central bw samp_rate items average cutoff threshold decimation fft_size freq noise')
+
+        param.f_central = 0
+        param.bw = 1000
+        param.average = False
+        param.cutoff = 1000
+        param.samp_rate = 4096 * 8
+        param.items = param.samp_rate
+        param.freq = 200
+        param.threshold = 10
+        param.noise = 0
+        param.fft_size = 4096
+        param.decimation = 1
+
+        print_parameters(param)
+
+        data_sine = test_sine(self, param)
+
+        #the PLL only applies the tags with key "pll", the reset is their value
+        resets = [tag for tag in data_sine.tags if pmt.symbol_to_string(tag.key) == "pll" and pmt.eq(tag.value, pmt.intern("reset"))]
+        self.assertEqual(len(resets), 1)
+        self.assertEqual(resets[0].offset, 0)
+        self.assertFalse(any(pmt.symbol_to_string(tag.key) == "reset" for tag in data_sine.tags))
+
+    def test_011_t (self):
+        """test_011_t: frequency tag of a sine between two bins"""
+        param = namedtuple('param', 'f_central bw samp_rate items average cutoff threshold decimation fft_size freq noise')
+
+        param.f_central = 0
+        param.bw = 1000
+        param.average = False
+        param.cutoff = 1000
+        param.samp_rate = 4096 * 8
+        param.items = param.samp_rate
+        param.freq = 234.5
+        param.threshold = 10
+        param.noise = 0
+        param.fft_size = 4096
+        param.decimation = 1
+
+        print_parameters(param)
+
+        data_sine = test_sine(self, param)
+
+        #the bins are 8 Hz wide, the estimate must be within a small fraction of a bin
+        self.assertEqual(len(data_sine.tags), 2)
+        self.assertIsNone(freq_tag(data_sine.tags[0]))
+        self.assertAlmostEqual(freq_tag(data_sine.tags[1]), param.freq, delta = 0.1)
+        print ("-Estimated frequency: %f Hz;" % freq_tag(data_sine.tags[1]))
+
 
 
 if __name__ == '__main__':
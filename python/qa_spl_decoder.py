@@ -9,7 +9,7 @@ from gnuradio import blocks, analog
 from collections import namedtuple
 import ecss_swig as ecss
 import runner
-import math, time, datetime, os, abc, sys
+import math, time, datetime, os, abc, sys, pmt
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_pdf import PdfPages
@@ -86,17 +86,24 @@ def plot(self, data_out, data_src):
     # plt.show()
     self.pdf.add_to_pdf(fig)
 
-def test_spl(self, data_src):
+def pack_bits(bits, msb_first = True):
+    """this function packs the bits in bytes, MSB or LSB first"""
+
+    return tuple(sum(bits[i + k] << ((7 - k) if msb_first else k) for k in range(8)) for i in range(0, len(bits), 8))
+
+def test_spl(self, data_src, packed = False, endianness = gr.GR_MSB_FIRST, decision = ecss.DECISION_HARD):
     """this function run the defined test, for easier understanding"""
 
     tb = self.tb
 
     src = blocks.vector_source_f(data_src, True, 1, [])
-    dst = blocks.vector_sink_b()
+    dst = blocks.vector_sink_f() if decision == ecss.DECISION_SOFT else blocks.vector_sink_b()
 
     head = blocks.head(gr.sizeof_float, len(data_src))
 
-    spl = ecss.spl_decoder()
+    spl = ecss.spl_decoder(decision)
+    spl.set_packed(packed)
+    spl.set_endianness(endianness)
 
     tb.connect(src, head)
     tb.connect(head, spl)
@@ -131,6 +138,90 @@ class qa_spl_decoder (gr_unittest.TestCase):
         self.assertAlmostEqual(data_out, expected_data)
         print ("- Data correctly encoded.")
 
+    def test_002_t (self):
+        """test_002_t: packed output, MSB and LSB first"""
+
+        bits = [int(b) for b in np.random.randint(0, 2, 8 * 300)]
+        data_src = []
+        for bit in bits:
+            data_src += [1, -1] if bit else [-1, 1]
+        data_src = [x + np.random.uniform(-0.5, 0.5) for x in data_src]
+
+        data_unpacked = test_spl(self, data_src)
+        self.tb = gr.top_block ()
+        data_msb = test_spl(self, data_src, True, gr.GR_MSB_FIRST)
+        self.tb = gr.top_block ()
+        data_lsb = test_spl(self, data_src, True, gr.GR_LSB_FIRST)
+
+        plot(self, data_msb, data_src)
+
+        self.assertEqual(tuple(data_unpacked), tuple(bits))
+        self.assertEqual(tuple(data_msb), pack_bits(bits, True))
+        self.assertEqual(tuple(data_lsb), pack_bits(bits, False))
+        print ("- Packed bytes: %d;" % len(data_msb))
+
+    def test_003_t (self):
+        """test_003_t: soft decisions on both half-symbols, float and int8"""
+
+        bits = [int(b) for b in np.random.randint(0, 2, 1000)]
+        data_src = []
+        for bit in bits:
+            data_src += [1, -1] if bit else [-1, 1]
+        data_src = [x + np.random.normal(0, 0.5) for x in data_src]
+
+        data_hard = test_spl(self, data_src)
+        self.tb = gr.top_block ()
+        data_soft = test_spl(self, data_src, decision = ecss.DECISION_SOFT)
+        self.tb = gr.top_block ()
+        data_int8 = test_spl(self, data_src, decision = ecss.DECISION_SOFT_INT8)
+
+        plot(self, data_soft, data_src)
+
+        #the soft bit is half the difference of the half-symbols, positive for a one
+        difference = np.asarray(data_src[0::2], dtype=np.float32) - np.asarray(data_src[1::2], dtype=np.float32)
+        expected_soft = tuple(0.5 * difference)
+        expected_int8 = tuple(int(v) for v in np.clip(np.rint(32 * difference), -128, 127))
+        expected_hard = tuple(int(v >= 0) for v in difference)
+        self.assertFloatTuplesAlmostEqual(data_soft, expected_soft, 5)
+        self.assertEqual(tuple(np.asarray(data_int8, dtype=np.uint8).view(np.int8)), expected_int8)
+        self.assertEqual(tuple(data_hard), expected_hard)
+        print ("- Bit errors with soft bits sliced: %d;" % sum(int(v >= 0) != bit for v, bit in zip(data_soft, bits)))
+
+    def test_004_t (self):
+        """test_004_t: clock phase slip on a stream starting on the second half-symbol"""
+
+        tb = self.tb
+        bits = [int(b) for b in np.random.randint(0, 2, 2000)]
+        data_src = []
+        for bit in bits:
+            data_src += [1, -1] if bit else [-1, 1]
+        data_src = [x + np.random.normal(0, 0.3) for x in data_src[1:] + [0]]
+
+        src = blocks.vector_source_f(data_src, False, 1, [])
+        dst = blocks.vector_sink_b()
+        spl = ecss.spl_decoder()
+        spl.set_slip_window(128)
+        spl.set_slip_threshold(0.35)
+
+        tb.connect(src, spl, dst)
+        self.tb.run()
+
+        data_out = dst.data()
+        tags = dst.tags()
+        plot(self, data_out, data_src)
+
+        #one slip, on random data it is decided within the first window
+        self.assertEqual(spl.get_slips(), 1)
+        self.assertEqual(len(tags), 1)
+        self.assertEqual(pmt.symbol_to_string(tags[0].key), "clock_slip")
+        self.assertEqual(pmt.to_uint64(tags[0].value), 1)
+        slip = tags[0].offset
+        self.assertLess(slip, 2 * 128)
+
+        #after the slip the bits are aligned again
+        self.assertEqual(tuple(data_out[slip + 1:-1]), tuple(bits[slip + 1:-1]))
+        print ("- Clock phase slipped on the bit %d;" % slip)
+
 
 if __name__ == '__main__':
     suite = gr_unittest.TestLoader().loadTestsFromTestCase(qa_spl_decoder)
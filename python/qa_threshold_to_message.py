@@ -9,7 +9,7 @@ from gnuradio import blocks, analog
 from collections import namedtuple
 import ecss as ecss
 import runner
-import math, time, datetime, os, abc, sys
+import math, time, datetime, os, abc, sys, pmt
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_pdf import PdfPages
@@ -107,6 +107,45 @@ def test_spl(self, data_src):
     out = dst.data()
     return out
 
+def reference_messages(data_src, upper, lower, init_state, holdoff):
+    """this function returns the indexes and the states of the expected messages"""
+
+    messages = []
+    state = init_state
+    left = 0
+    for i, x in enumerate(data_src):
+        if left > 0:
+            left -= 1
+        elif x >= upper and state:
+            state = False
+            messages.append((i, "LOCK"))
+            left = holdoff
+        elif x < lower and not state:
+            state = True
+            messages.append((i, "UNLOCK"))
+            left = holdoff
+    return messages
+
+def test_threshold(self, data_src, holdoff):
+    """this function runs a noisy lock metric through the block and returns the messages"""
+
+    tb = self.tb
+
+    src = blocks.vector_source_f(data_src, False, 1, [])
+    dst = blocks.vector_sink_f()
+    debug = blocks.message_debug()
+
+    th = ecss.threshold_to_message(0.8, 0.5, pmt.intern("LOCK"), pmt.intern("UNLOCK"), True)
+    th.set_holdoff(holdoff)
+
+    tb.connect(src, th, dst)
+    tb.msg_connect((th, 'threshold_msg'), (debug, 'store'))
+
+    self.tb.run()
+
+    messages = [pmt.symbol_to_string(debug.get_message(i)) for i in range(debug.num_messages())]
+    return messages, dst.data()
+
 class qa_threshold_to_message (gr_unittest.TestCase):
 
     def setUp (self):
@@ -131,6 +170,28 @@ class qa_threshold_to_message (gr_unittest.TestCase):
         self.assertAlmostEqual(data_out, expected_data)
         print ("- Data correctly encoded.")
 
+    def test_002_t (self):
+        """test_002_t: messages of a noisy lock metric, with and without hold-off"""
+
+        data_src = tuple(float(x) for x in np.clip(0.65 + 0.2 * np.random.randn(20000), 0, 1).astype(np.float32))
+
+        messages, data_out = test_threshold(self, data_src, 0)
+        self.tb = gr.top_block ()
+        messages_holdoff, data_out_holdoff = test_threshold(self, data_src, 100)
+
+        plot(self, data_out, data_src)
+
+        #the output is a copy of the input, the hold-off keeps each state for 100 items at least
+        upper, lower = float(np.float32(0.8)), float(np.float32(0.5))
+        expected = reference_messages(data_src, upper, lower, True, 0)
+        expected_holdoff = reference_messages(data_src, upper, lower, True, 100)
+        self.assertFloatTuplesAlmostEqual(data_out, data_src)
+        self.assertEqual(messages, [m for i, m in expected])
+        self.assertEqual(messages_holdoff, [m for i, m in expected_holdoff])
+        self.assertTrue(all(b[0] - a[0] > 100 for a, b in zip(expected_holdoff[:-1], expected_holdoff[1:])))
+        self.assertLess(len(messages_holdoff), len(messages))
+        print ("- Messages: %d without hold-off, %d with hold-off;" % (len(messages), len(messages_holdoff)))
+
 
 if __name__ == '__main__':
     suite = gr_unittest.TestLoader().loadTestsFromTestCase(qa_threshold_to_message)
@@ -26,13 +26,16 @@ from gnuradio import blocks
 class signal_search_fft_hier(gr.hier_block2):
     """
     docstring for block signal_search_fft_hier
+
+    With real=True the block searches a float stream, with a real to complex FFT.
     """
 
-    def __init__(self, enable, fftsize, decimation, average, wintype, freq_central, bandwidth, freq_cutoff, threshold, samp_rate):
+    def __init__(self, enable, fftsize, decimation, average, wintype, freq_central, bandwidth, freq_cutoff, threshold, samp_rate, real=False):
+        itemsize = gr.sizeof_float if real else gr.sizeof_gr_complex
         gr.hier_block2.__init__(self,
             "signal_search_fft_hier",
-            gr.io_signature(1, 1, gr.sizeof_gr_complex),
-            gr.io_signature(1, 1, gr.sizeof_gr_complex))
+            gr.io_signature(1, 1, itemsize),
+            gr.io_signature(1, 1, itemsize))
 
         self.enable = enable
         self.average = average
@@ -44,13 +47,15 @@ class signal_search_fft_hier(gr.hier_block2):
         self.wintype = wintype
         self.decimation = decimation
         self.fftsize = fftsize
+        self.real = real
 
-        self.ecss_signal_search_fft_v = ecss.signal_search_fft_v(
+        signal_search_fft_v = ecss.signal_search_fft_vff if real else ecss.signal_search_fft_vcc
+        self.ecss_signal_search_fft_v = signal_search_fft_v(
             self.enable, self.fftsize, self.decimation, self.average, self.wintype, self.freq_central, self.bandwidth, self.freq_cutoff, self.threshold, self.samp_rate)
         self.blocks_stream_to_vector = blocks.stream_to_vector(
-            gr.sizeof_gr_complex*1, self.fftsize * self.decimation)
+            itemsize, self.fftsize * self.decimation)
         self.blocks_vector_to_stream = blocks.vector_to_stream(
-            gr.sizeof_gr_complex*1, self.fftsize * self.decimation)
+            itemsize, self.fftsize * self.decimation)
 
         ##################################################
         # Connections
@@ -62,6 +67,9 @@ class signal_search_fft_hier(gr.hier_block2):
                      (self.blocks_vector_to_stream, 0))
         self.connect((self.blocks_vector_to_stream, 0), self)
 
+        self.message_port_register_hier_out("peaks")
+        self.msg_connect((self.ecss_signal_search_fft_v, "peaks"), (self, "peaks"))
+
 
     def get_freq_central(self):
         return self.ecss_signal_search_fft_v.get_freq_central()
@@ -90,6 +98,15 @@ class signal_search_fft_hier(gr.hier_block2):
     def get_fftsize(self):
         return self.ecss_signal_search_fft_v.get_fftsize()
 
+    def get_averages(self):
+        return self.ecss_signal_search_fft_v.get_averages()
+
+    def get_overlap(self):
+        return self.ecss_signal_search_fft_v.get_overlap()
+
+    def get_peaks(self):
+        return self.ecss_signal_search_fft_v.get_peaks()
+
  
     def set_freq_central(self, freq_central):
         self.ecss_signal_search_fft_v.set_freq_central(freq_central)
@@ -112,3 +129,12 @@ class signal_search_fft_hier(gr.hier_block2):
     def set_enable(self, enable):
         self.ecss_signal_search_fft_v.set_enable(enable)
 
+    def set_averages(self, averages):
+        self.ecss_signal_search_fft_v.set_averages(averages)
+
+    def set_overlap(self, overlap):
+        self.ecss_signal_search_fft_v.set_overlap(overlap)
+
+    def set_peaks(self, peaks):
+        self.ecss_signal_search_fft_v.set_peaks(peaks)
+
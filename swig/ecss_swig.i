@@ -10,7 +10,9 @@
 %{
 #include "ecss/agc.h"
 #include "ecss/pll.h"
+#include "ecss/pll_multi.h"
 #include "ecss/coherent_phase_modulator.h"
+#include "ecss/coherent_transponder.h"
 #include "ecss/phase_converter.h"
 #include "ecss/loop_filter.h"
 #include "ecss/gain_phase_accumulator.h"
@@ -30,9 +32,13 @@ GR_SWIG_BLOCK_MAGIC2_TMPL(ecss, agc_cc, agc<gr_complex>);
 
 %include "ecss/pll.h"
 GR_SWIG_BLOCK_MAGIC2(ecss, pll);
+%include "ecss/pll_multi.h"
+GR_SWIG_BLOCK_MAGIC2(ecss, pll_multi);
 
 %include "ecss/coherent_phase_modulator.h"
 GR_SWIG_BLOCK_MAGIC2(ecss, coherent_phase_modulator);
+%include "ecss/coherent_transponder.h"
+GR_SWIG_BLOCK_MAGIC2(ecss, coherent_transponder);
 %include "ecss/phase_converter.h"
 GR_SWIG_BLOCK_MAGIC2(ecss, phase_converter);
 %include "ecss/loop_filter.h"
@@ -44,7 +50,8 @@ GR_SWIG_BLOCK_MAGIC2(ecss, signal_search_goertzel);
 
 
 %include "ecss/signal_search_fft_v.h"
-GR_SWIG_BLOCK_MAGIC2(ecss, signal_search_fft_v);
+GR_SWIG_BLOCK_MAGIC2_TMPL(ecss, signal_search_fft_vcc, signal_search_fft_v<gr_complex>);
+GR_SWIG_BLOCK_MAGIC2_TMPL(ecss, signal_search_fft_vff, signal_search_fft_v<float>);
 %include "ecss/spl_encoder.h"
 GR_SWIG_BLOCK_MAGIC2(ecss, spl_encoder);
 %include "ecss/spl_decoder.h"